@@ -0,0 +1,411 @@
+"""2048 的 expectimax AI，用于提示和自动游戏
+
+棋盘用指数元组表示：0 表示空格，k 表示数值 2**k。
+本模块不依赖 pygame，可以在工作进程中直接导入。
+"""
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+# 方向名称，与 Game2048.move_* 方法对应
+DIRECTIONS = ("up", "down", "left", "right")
+DIRECTION_NAMES = {"up": "上", "down": "下", "left": "左", "right": "右"}
+
+# 新数字的分布，与 Game2048.add_new_number 一致：90% 为2，10% 为4
+SPAWN_CHOICES = ((1, 0.9), (2, 0.1))
+
+# 启发式权重
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+SMOOTHNESS_WEIGHT = 10.0
+
+# 概率低于该值的分支直接用启发式估值
+PROBABILITY_CUTOFF = 0.0001
+# 每搜索这么多节点检查一次时间
+TIME_CHECK_INTERVAL = 512
+# 并行搜索时检查取消标志的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.005
+
+
+class SearchTimeout(Exception):
+    """搜索超出时间预算"""
+
+
+def encode_board(board):
+    """把 Game2048.board（数值二维列表）转换为指数元组"""
+    return tuple(tuple(value.bit_length() - 1 if value else 0 for value in row) for row in board)
+
+
+def decode_board(board):
+    """把指数元组转换回数值二维列表"""
+    return [[(1 << value) if value else 0 for value in row] for row in board]
+
+
+@lru_cache(maxsize=1 << 16)
+def slide_row(row):
+    """把一行向左滑动合并，返回(新行, 得分)
+
+    合并规则与 Game2048.move_left 完全一致。
+    """
+    tiles = [value for value in row if value]
+    score = 0
+    j = 0
+    while j < len(tiles) - 1:
+        if tiles[j] == tiles[j + 1]:
+            tiles[j] += 1
+            score += 1 << tiles[j]
+            del tiles[j + 1]
+        else:
+            j += 1
+    tiles.extend([0] * (len(row) - len(tiles)))
+    return tuple(tiles), score
+
+
+def move(board, direction):
+    """执行一次移动，返回(新棋盘, 得分, 是否移动)"""
+    if direction in ("up", "down"):
+        lines = tuple(zip(*board))
+    else:
+        lines = board
+    reverse = direction in ("right", "down")
+
+    new_lines = []
+    score = 0
+    for line in lines:
+        if reverse:
+            new_line, gained = slide_row(line[::-1])
+            new_line = new_line[::-1]
+        else:
+            new_line, gained = slide_row(line)
+        new_lines.append(new_line)
+        score += gained
+
+    if direction in ("up", "down"):
+        new_board = tuple(zip(*new_lines))
+    else:
+        new_board = tuple(new_lines)
+    return new_board, score, new_board != board
+
+
+def legal_moves(board):
+    """返回所有能改变棋盘的移动 [(方向, 新棋盘, 得分)]"""
+    result = []
+    for direction in DIRECTIONS:
+        new_board, score, moved = move(board, direction)
+        if moved:
+            result.append((direction, new_board, score))
+    return result
+
+
+def empty_cells(board):
+    return [(i, j) for i, row in enumerate(board) for j, value in enumerate(row) if value == 0]
+
+
+def place(board, i, j, value):
+    """返回在(i, j)放置指数 value 后的新棋盘"""
+    row = board[i]
+    new_row = row[:j] + (value,) + row[j + 1:]
+    return board[:i] + (new_row,) + board[i + 1:]
+
+
+def spawn_random(board, rng=random):
+    """按游戏的分布随机生成一个新数字，没有空格时原样返回"""
+    cells = empty_cells(board)
+    if not cells:
+        return board
+    i, j = rng.choice(cells)
+    return place(board, i, j, 1 if rng.random() < 0.9 else 2)
+
+
+@lru_cache(maxsize=1 << 16)
+def _line_heuristic(line):
+    """单行（或单列）的启发式分数"""
+    empty = 0
+    merges = 0
+    prev = 0
+    counter = 0
+    total = 0.0
+    for value in line:
+        total += value ** SUM_POWER
+        if value == 0:
+            empty += 1
+            continue
+        if prev == value:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        prev = value
+    if counter > 0:
+        merges += 1 + counter
+
+    # 单调性：只惩罚较差的方向
+    mono_left = 0.0
+    mono_right = 0.0
+    smoothness = 0
+    for a, b in zip(line, line[1:]):
+        if a > b:
+            mono_left += a ** MONOTONICITY_POWER - b ** MONOTONICITY_POWER
+        else:
+            mono_right += b ** MONOTONICITY_POWER - a ** MONOTONICITY_POWER
+        if a and b:
+            smoothness += abs(a - b)
+
+    return (LOST_PENALTY
+            + EMPTY_WEIGHT * empty
+            + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(mono_left, mono_right)
+            - SMOOTHNESS_WEIGHT * smoothness
+            - SUM_WEIGHT * total)
+
+
+def evaluate(board):
+    """整个棋盘的启发式分数：所有行和列的分数之和"""
+    score = 0.0
+    for row in board:
+        score += _line_heuristic(row)
+    for column in zip(*board):
+        score += _line_heuristic(column)
+    return score
+
+
+class ExpectimaxSearch:
+    """深度受限的 expectimax 搜索，带置换表
+
+    depth 以玩家移动的层数计；置换表以棋盘为键，保存(搜索深度, 到达概率, 估值)。
+    到达概率越低，子树中被 PROBABILITY_CUTOFF 剪掉的部分越多，所以只复用
+    深度不浅于、到达概率不低于当前需求的结果。
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.cache = {}
+        self.nodes = 0
+        self.cache_hits = 0
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % TIME_CHECK_INTERVAL == 0:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+    def max_node(self, board, depth, probability):
+        """玩家节点：取所有移动中的最大值"""
+        self._tick()
+        best = None
+        for _, new_board, score in legal_moves(board):
+            value = score + self.chance_node(new_board, depth, probability)
+            if best is None or value > best:
+                best = value
+        # 无法移动即游戏结束
+        return 0.0 if best is None else best
+
+    def chance_node(self, board, depth, probability):
+        """随机节点：对所有空格和新数字取期望"""
+        self._tick()
+        if depth <= 0 or probability < PROBABILITY_CUTOFF:
+            return evaluate(board)
+
+        cached = self.cache.get(board)
+        if cached is not None and cached[0] >= depth and cached[1] >= probability:
+            self.cache_hits += 1
+            return cached[2]
+
+        cells = empty_cells(board)
+        if not cells:
+            value = self.max_node(board, depth - 1, probability)
+        else:
+            cell_probability = probability / len(cells)
+            value = 0.0
+            for i, j in cells:
+                for tile, tile_probability in SPAWN_CHOICES:
+                    child = place(board, i, j, tile)
+                    value += tile_probability * self.max_node(
+                        child, depth - 1, cell_probability * tile_probability)
+            value /= len(cells)
+
+        self.cache[board] = (depth, probability, value)
+        return value
+
+
+def evaluate_root_move(board, deadline, max_depth):
+    """在工作进程中评估一个根移动后的棋盘
+
+    逐步加深搜索直到超时，返回(各深度估值, 节点数)；
+    values[d] 为深度 d 的估值，values[0] 为静态评估。
+    """
+    search = ExpectimaxSearch(deadline)
+    values = [evaluate(board)]
+    for depth in range(1, max_depth + 1):
+        try:
+            values.append(search.chance_node(board, depth, 1.0))
+        except SearchTimeout:
+            break
+    return values, search.nodes
+
+
+def default_depth(board):
+    """根据空格数选择最大搜索深度，空格越少搜得越深"""
+    empty = len(empty_cells(board))
+    if empty >= 8:
+        return 2
+    if empty >= 4:
+        return 3
+    return 4
+
+
+class Expectimax2048AI:
+    """2048 AI：四个根移动在工作进程中并行评估
+
+    workers 为0时在当前进程中依次评估。
+    """
+
+    def __init__(self, time_budget=0.1, max_depth=None, workers=4):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.workers = workers
+        self.executor = None
+        # 统计信息
+        self.total_nodes = 0
+        self.total_time = 0.0
+        self.last_depth = 0
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def best_move(self, board, token=None):
+        """返回最佳方向，无法移动时返回None；board 为指数元组
+
+        token 为 ai_scheduler.CancelToken，其截止时间早于自己的时间预算时以它为准，
+        搜索被取消时返回None。
+        """
+        moves = legal_moves(board)
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0][0]
+
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        if token is not None and token.deadline is not None:
+            deadline = min(deadline, token.deadline)
+        max_depth = self.max_depth or default_depth(board)
+
+        if self.workers:
+            executor = self._get_executor()
+            futures = [executor.submit(evaluate_root_move, new_board, deadline, max_depth)
+                       for _, new_board, _ in moves]
+            # 等待期间定期检查是否被取消
+            while not all(future.done() for future in futures):
+                if token is not None and token.cancelled:
+                    for future in futures:
+                        future.cancel()
+                    return None
+                wait(futures, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+            results = [future.result() for future in futures]
+        else:
+            results = [evaluate_root_move(new_board, deadline, max_depth)
+                       for _, new_board, _ in moves]
+        if token is not None and token.cancelled:
+            return None
+
+        # 不同深度的估值不可比，所有移动都按共同完成的最深一层比较；
+        # 只有都没搜完一层时才退回静态评估
+        depth = min(len(values) - 1 for values, _ in results)
+        nodes = sum(move_nodes for _, move_nodes in results)
+        best_direction = None
+        best_value = None
+        for (direction, _, score), (values, _) in zip(moves, results):
+            value = values[depth]
+            if best_value is None or score + value > best_value:
+                best_value = score + value
+                best_direction = direction
+
+        self.total_nodes += nodes
+        self.total_time += time.perf_counter() - start
+        self.last_depth = depth
+        return best_direction
+
+    @property
+    def nodes_per_second(self):
+        if self.total_time <= 0:
+            return 0.0
+        return self.total_nodes / self.total_time
+
+
+def play_game(ai, rng, size=4, max_moves=100000):
+    """用AI完成一局游戏，返回(得分, 最大数字, 步数)"""
+    board = tuple(tuple(0 for _ in range(size)) for _ in range(size))
+    board = spawn_random(spawn_random(board, rng), rng)
+    score = 0
+    moves = 0
+    while moves < max_moves:
+        direction = ai.best_move(board)
+        if direction is None:
+            break
+        board, gained, _ = move(board, direction)
+        score += gained
+        board = spawn_random(board, rng)
+        moves += 1
+    max_tile = 1 << max(max(row) for row in board)
+    return score, max_tile, moves
+
+
+def run_statistics(games=10, time_budget=0.05, workers=4, seed=0, target=2048):
+    """自我对局统计胜率、得分和每秒节点数"""
+    rng = random.Random(seed)
+    ai = Expectimax2048AI(time_budget=time_budget, workers=workers)
+    wins = 0
+    scores = []
+    tiles = {}
+    try:
+        for index in range(games):
+            score, max_tile, moves = play_game(ai, rng)
+            scores.append(score)
+            tiles[max_tile] = tiles.get(max_tile, 0) + 1
+            if max_tile >= target:
+                wins += 1
+            print(f"第{index + 1}局: 得分 {score}, 最大数字 {max_tile}, 步数 {moves}")
+    finally:
+        ai.close()
+
+    print(f"胜率: {wins}/{games} ({wins * 100.0 / games:.1f}%)")
+    print(f"平均得分: {sum(scores) / len(scores):.0f}")
+    print("最大数字分布: " + ", ".join(f"{tile}: {count}" for tile, count in sorted(tiles.items())))
+    print(f"每秒节点数: {ai.nodes_per_second:.0f}")
+    return {
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games,
+        "mean_score": sum(scores) / len(scores),
+        "max_tiles": tiles,
+        "nodes_per_second": ai.nodes_per_second,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="2048 expectimax AI 自我对局统计")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.05, help="每步的时间预算（秒）")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run_statistics(args.games, args.budget, args.workers, args.seed)
+    sys.exit(0)
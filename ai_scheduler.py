@@ -0,0 +1,108 @@
+"""异步AI调度器
+
+游戏把AI搜索交给 AIScheduler 在后台线程中运行，渲染循环每帧检查结果，
+不会因为搜索而卡顿。每个任务带一个 CancelToken：搜索函数应定期检查
+token.cancelled 和 token.expired()，任务被取消后结果会被丢弃。
+游戏重置或退出时用 cancel(owner) 取消它的所有任务。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CancelToken:
+    """任务的取消标志和截止时间"""
+
+    def __init__(self, budget=None):
+        self.event = threading.Event()
+        self.deadline = None if budget is None else time.perf_counter() + budget
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def expired(self):
+        """已取消或超过时间预算"""
+        return self.cancelled or (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+
+class AITask:
+    """一次提交的AI搜索
+
+    purpose 由游戏自己定义（比如“提示”还是“自动游戏”）；
+    future 为None时任务不在本地运行，结果由调用方从其他来源（回放记录）获得。
+    """
+
+    def __init__(self, owner, purpose, token, future):
+        self.owner = owner
+        self.purpose = purpose
+        self.token = token
+        self.future = future
+        self.submitted = time.perf_counter()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self):
+        """已完成任务的结果，任务出错时返回None并打印错误"""
+        try:
+            return self.future.result()
+        except Exception as e:
+            print(f"AI任务出错: {e}")
+            return None
+
+    def cancel(self):
+        self.token.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.submitted
+
+
+class AIScheduler:
+    """所有游戏共用的AI线程池"""
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.executor = None
+        self.tasks = []
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai")
+        return self.executor
+
+    def submit(self, owner, function, *args, purpose=None, budget=None, run=True):
+        """提交 function(*args, token=token)，返回 AITask
+
+        run 为False时只创建任务而不运行（回放时结果来自记录）。
+        """
+        token = CancelToken(budget)
+        future = self._get_executor().submit(function, *args, token=token) if run else None
+        task = AITask(owner, purpose, token, future)
+        self.tasks = [item for item in self.tasks if not item.done()]
+        self.tasks.append(task)
+        return task
+
+    def cancel(self, owner):
+        """取消 owner 提交的所有任务"""
+        remaining = []
+        for task in self.tasks:
+            if task.owner is owner:
+                task.cancel()
+            else:
+                remaining.append(task)
+        self.tasks = remaining
+
+    def shutdown(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,133 @@
+"""每帧内存分配审计
+
+打开后把 pygame.Surface、pygame.Rect、pygame.font.Font 和
+pygame.font.SysFont 换成会计数的版本，按类型、当前场景（游戏或菜单）
+和调用位置统计每帧新建的对象数；同时用 tracemalloc 记录Python层面
+的内存增长。前 WARMUP_FRAMES 帧不计入稳定状态的统计。
+"""
+import sys
+import tracemalloc
+from collections import Counter
+
+import pygame
+
+WARMUP_FRAMES = 120
+# 退出时显示的分配位置和内存增长的条数
+TOP_SITES = 12
+
+
+class AllocationAudit:
+    """统计每帧新建的 pygame 对象
+
+    context 为返回当前场景名称的函数，由调用方设置；每次分配时调用，
+    所以帧中途切换场景（例如在菜单中开始游戏）也能记到正确的场景。
+    counts 的键为(类型, 场景, 调用位置)，只包含稳定状态的帧；
+    begin_frame 和 end_frame 之外（例如基准测试创建游戏时）的分配不计入。
+    """
+
+    def __init__(self, warmup=WARMUP_FRAMES):
+        self.warmup = warmup
+        self.context = lambda: ""
+        self.frames = 0
+        self.in_frame = False
+        self.steady_frames = 0
+        self.frame_count = 0
+        self.peak_frame = 0
+        self.counts = Counter()
+        self.python_growth = 0
+        self.traced_before = 0
+        self.baseline_snapshot = None
+        self.originals = None
+
+    def _count(self, kind):
+        if not self.in_frame:
+            return
+        self.frame_count += 1
+        if self.frames >= self.warmup:
+            caller = sys._getframe(2).f_code
+            # co_qualname 从 Python 3.11 开始才有
+            site = getattr(caller, "co_qualname", caller.co_name)
+            self.counts[(kind, self.context(), site)] += 1
+
+    def install(self):
+        """替换 pygame 的构造函数并开始 tracemalloc"""
+        audit = self
+        font_module = pygame.font
+        self.originals = (pygame.Surface, pygame.Rect, font_module.Font, font_module.SysFont)
+        surface_type, rect_type, font_type, sysfont = self.originals
+
+        class CountedSurface(surface_type):
+            def __init__(self, *args, **kwargs):
+                audit._count("Surface")
+                super().__init__(*args, **kwargs)
+
+        class CountedRect(rect_type):
+            def __init__(self, *args, **kwargs):
+                audit._count("Rect")
+                super().__init__(*args, **kwargs)
+
+        class CountedFont(font_type):
+            def __init__(self, *args, **kwargs):
+                audit._count("Font")
+                super().__init__(*args, **kwargs)
+
+        def counted_sysfont(*args, **kwargs):
+            audit._count("Font")
+            return sysfont(*args, **kwargs)
+
+        pygame.Surface = CountedSurface
+        pygame.Rect = CountedRect
+        font_module.Font = CountedFont
+        font_module.SysFont = counted_sysfont
+        tracemalloc.start()
+
+    def uninstall(self):
+        if self.originals is None:
+            return
+        pygame.Surface, pygame.Rect, pygame.font.Font, pygame.font.SysFont = self.originals
+        self.originals = None
+        tracemalloc.stop()
+
+    def begin_frame(self):
+        self.in_frame = True
+        self.frame_count = 0
+        if self.frames == self.warmup:
+            self.baseline_snapshot = tracemalloc.take_snapshot()
+        self.traced_before = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        self.in_frame = False
+        if self.frames >= self.warmup:
+            self.steady_frames += 1
+            self.peak_frame = max(self.peak_frame, self.frame_count)
+            self.python_growth += tracemalloc.get_traced_memory()[0] - self.traced_before
+        self.frames += 1
+
+    def per_frame(self):
+        """稳定状态下平均每帧新建的对象数"""
+        return sum(self.counts.values()) / max(1, self.steady_frames)
+
+    def summary(self):
+        """返回审计结果的文本"""
+        frames = max(1, self.steady_frames)
+        lines = [f"分配审计: {self.frames} 帧，其中稳定状态 {self.steady_frames} 帧"]
+        by_type = Counter()
+        for (kind, _, _), count in self.counts.items():
+            by_type[kind] += count
+        lines.append(f"  平均每帧新建对象 {self.per_frame():.1f} 个，单帧最多 {self.peak_frame} 个")
+        for kind, count in by_type.most_common():
+            lines.append(f"    {kind:8} {count / frames:8.1f} /帧")
+        lines.append("  主要分配位置（每帧）:")
+        for (kind, context, site), count in self.counts.most_common(TOP_SITES):
+            lines.append(f"    {count / frames:8.1f}  {kind:8} {context or '-'}: {site}")
+        lines.append(f"  Python内存平均每帧净增长 {self.python_growth / frames:.0f} 字节")
+        if self.baseline_snapshot is not None:
+            snapshot = tracemalloc.take_snapshot()
+            growth = [stat for stat in snapshot.compare_to(self.baseline_snapshot, "lineno")
+                      if stat.size_diff > 0][:TOP_SITES]
+            if growth:
+                lines.append("  稳定状态后内存增长最多的位置:")
+                for stat in growth:
+                    frame = stat.traceback[0]
+                    lines.append(f"    {stat.size_diff / 1024:8.1f} KB  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines)
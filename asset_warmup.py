@@ -0,0 +1,62 @@
+"""菜单空闲时的资源预热
+
+预热任务是生成器：每完成一小份工作（导入一个模块、创建一个字体、渲染一段
+文本）就 yield 一次。AssetWarmup 每帧在时间预算内推进队列中的任务，
+工作量再大也不会让菜单掉帧。
+"""
+import time
+from collections import deque
+
+# 每帧用于预热的时间（毫秒）
+WARMUP_BUDGET_MS = 4.0
+
+
+class AssetWarmup:
+    """按优先级分帧执行的预热任务队列，每个键只预热一次"""
+
+    def __init__(self, budget_ms=WARMUP_BUDGET_MS):
+        self.budget = budget_ms / 1000
+        self.queue = deque()
+        self.current = None
+        self.done = set()
+
+    def schedule(self, key, job, urgent=False):
+        """加入预热任务，job() 返回生成器；urgent 为真时排到最前面"""
+        if key in self.done or (self.current is not None and self.current[0] == key):
+            return
+        for item in self.queue:
+            if item[0] == key:
+                if not urgent:
+                    return
+                self.queue.remove(item)
+                break
+        if urgent:
+            self.queue.appendleft((key, job))
+        else:
+            self.queue.append((key, job))
+
+    def step(self):
+        """在时间预算内推进任务，返回是否还有剩余的任务"""
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            if self.current is None:
+                if not self.queue:
+                    return False
+                key, job = self.queue.popleft()
+                self.current = (key, iter(job()))
+            key, steps = self.current
+            try:
+                next(steps)
+            except StopIteration:
+                self.done.add(key)
+                self.current = None
+            except Exception as e:
+                # 预热失败不影响游戏，用到时再正常加载
+                print(f"预热失败 {key}: {e}")
+                self.done.add(key)
+                self.current = None
+        return True
+
+    @property
+    def idle(self):
+        return self.current is None and not self.queue
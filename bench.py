@@ -0,0 +1,116 @@
+"""帧时间基准测试的统计和基线比较
+
+game_collection.py --bench 无界面地运行每个游戏，把每帧的逻辑更新和
+绘制时间交给这里汇总，结果保存为JSON，并可以与保存的基线比较。
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+
+# 参与比较的统计量
+COMPARED_STATS = ("mean", "p99")
+# 差值小于这个毫秒数时不算退化，避免极短的帧被计时噪声误判
+MIN_REGRESSION_MS = 0.25
+
+
+def percentile(sorted_values, fraction):
+    """已排序数据的百分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """把一组秒为单位的耗时汇总为毫秒的 mean/p50/p99/max"""
+    values = sorted(samples)
+    count = len(values)
+    return {
+        "mean": sum(values) / count * 1000 if count else 0.0,
+        "p50": percentile(values, 0.50) * 1000,
+        "p99": percentile(values, 0.99) * 1000,
+        "max": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def summarize_frames(update_times, draw_times):
+    """每帧的更新、绘制和总耗时的统计"""
+    return {
+        "update": summarize(update_times),
+        "draw": summarize(draw_times),
+        "frame": summarize([u + d for u, d in zip(update_times, draw_times)]),
+    }
+
+
+def fastest(runs):
+    """多次运行中平均帧时间最短的一次，减少其他进程造成的噪声"""
+    return min(runs, key=lambda result: result["frame"]["mean"])
+
+
+def git_commit():
+    """当前的git提交，不在git仓库中时返回None"""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def make_report(results, **settings):
+    """带运行环境信息的完整结果"""
+    return {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": settings,
+        "results": results,
+    }
+
+
+def save_report(report, path):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(results, baseline, threshold):
+    """与基线比较，返回退化的描述列表
+
+    某项统计比基线慢超过 threshold（比例）且超过 MIN_REGRESSION_MS 时算退化。
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for part, stats in result.items():
+            for stat in COMPARED_STATS:
+                old = base.get(part, {}).get(stat)
+                new = stats.get(stat)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + threshold) and new - old > MIN_REGRESSION_MS:
+                    regressions.append(f"{name} {part} {stat}: {old:.3f}ms -> {new:.3f}ms "
+                                       f"(+{(new / old - 1) * 100 if old else math.inf:.0f}%)")
+    return regressions
+
+
+def format_table(results):
+    """结果的文本表格"""
+    lines = [f"{'':12} {'更新 mean/p99':>18} {'绘制 mean/p99':>18} {'帧 p50/p99/max':>24}"]
+    for name, result in results.items():
+        update, draw, frame = result["update"], result["draw"], result["frame"]
+        lines.append(f"{name:12} {update['mean']:8.3f} {update['p99']:8.3f}ms "
+                     f"{draw['mean']:8.3f} {draw['p99']:8.3f}ms "
+                     f"{frame['p50']:7.3f} {frame['p99']:7.3f} {frame['max']:7.3f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+"""运行中按需采集CPU性能数据
+
+开始后同时运行 cProfile 和一个采样线程，持续指定的秒数：
+cProfile 的结果保存为 pstats 文件（可用 python -m pstats 或 snakeviz 查看），
+采样线程定期记录主线程的调用栈，保存为 flamegraph.pl / speedscope
+可以读取的折叠栈格式（每行 "根;...;叶 次数"）。
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# 采样间隔（秒）
+SAMPLE_INTERVAL = 0.002
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """在后台线程中定期采样指定线程的调用栈"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        # 主线程持有GIL时采样线程无法运行，缩短GIL的切换间隔让采样更均匀
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval / 2))
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            sys.setswitchinterval(self.switch_interval)
+
+    def _run(self):
+        names = {}
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = frame_name(code)
+                stack.append(name)
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def write_collapsed(self, path, root=None):
+        """写入折叠栈文件，root 不为None时作为所有栈的根"""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                if root is not None:
+                    stack = (root,) + stack
+                # 折叠栈格式中分号和空格有特殊含义
+                names = [name.replace(";", ":").replace(" ", "_") for name in stack]
+                file.write(f"{';'.join(names)} {count}\n")
+
+
+class CpuCapture:
+    """限时的CPU性能采集，只能在主线程中开始和结束"""
+
+    def __init__(self, directory="profiles"):
+        self.directory = directory
+        self.profile = None
+        self.sampler = None
+        self.deadline = 0.0
+        self.tag = ""
+        self.writer = None
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self, seconds, tag=""):
+        if self.active:
+            return
+        self.tag = tag
+        self.deadline = time.perf_counter() + seconds
+        self.sampler = StackSampler(threading.get_ident())
+        self.sampler.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def poll(self):
+        """到时间后结束采集，返回输出文件的路径前缀，否则返回None"""
+        if self.active and time.perf_counter() >= self.deadline:
+            return self.stop()
+        return None
+
+    def stop(self):
+        """结束采集并在后台线程中写入文件，返回输出文件的路径前缀"""
+        if not self.active:
+            return None
+        self.profile.disable()
+        profile, sampler = self.profile, self.sampler
+        self.profile = None
+        self.sampler = None
+
+        name = time.strftime("%Y%m%d-%H%M%S")
+        if self.tag:
+            name += f"-{self.tag}"
+        prefix = os.path.join(self.directory, name)
+
+        def write():
+            sampler.stop()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                profile.dump_stats(prefix + ".pstats")
+                sampler.write_collapsed(prefix + ".collapsed", self.tag or None)
+            except OSError as e:
+                print(f"保存CPU性能数据失败: {e}")
+
+        self.writer = threading.Thread(target=write, name="cpu-profile-writer", daemon=True)
+        self.writer.start()
+        return prefix
+
+    def wait(self):
+        """等待文件写完"""
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
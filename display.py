@@ -0,0 +1,105 @@
+"""逻辑分辨率的渲染目标
+
+所有游戏都按固定的逻辑分辨率绘制到 Display.surface 上，Display 负责把它
+显示到真实的窗口或全屏上，游戏不需要按屏幕大小重新布局：
+
+- scaled：使用 pygame.SCALED，窗口表面就是逻辑大小，SDL 用GPU把它缩放到
+  窗口或全屏（保持比例，多余部分为黑边），鼠标坐标也由SDL换算回逻辑坐标。
+  高分辨率屏幕上只绘制逻辑大小的画面，缩放只做一次。
+- software：SCALED 不可用时，在逻辑大小的 Surface 上绘制，每帧缩放到预先
+  分配好的 Surface 再显示，整数倍时用最近邻缩放，否则用 smoothscale；
+  鼠标坐标用 to_logical 换算。
+- plain：不缩放，无界面模式（回放、基准测试）使用。
+"""
+import pygame
+
+
+class Display:
+    """逻辑画面和真实窗口
+
+    surface 在切换全屏后仍然是同一个对象，游戏模块可以在导入时保存它。
+    """
+
+    def __init__(self, size, mode="scaled", fullscreen=False, caption=""):
+        self.size = size
+        self.mode = mode
+        self.fullscreen = fullscreen
+        self.window = None
+        self.surface = None
+        # 软件缩放：目标 Surface、逻辑画面在窗口中的位置和窗口大小
+        self.scaled = None
+        self.dest = pygame.Rect((0, 0), size)
+        self.window_size = None
+        pygame.display.set_caption(caption)
+        self._open()
+
+    def _open(self):
+        if self.mode == "scaled":
+            flags = pygame.SCALED | (pygame.FULLSCREEN if self.fullscreen else 0)
+            try:
+                self.window = self.surface = pygame.display.set_mode(self.size, flags)
+                return
+            except pygame.error as e:
+                print(f"无法使用 pygame.SCALED，改用软件缩放: {e}")
+                self.mode = "software"
+        if self.mode == "plain":
+            self.window = self.surface = pygame.display.set_mode(self.size)
+            return
+
+        if self.fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(self.size, pygame.RESIZABLE)
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size)
+        self._layout()
+
+    def _layout(self):
+        # 保持比例缩放到窗口中央，两边留黑边
+        self.window_size = self.window.get_size()
+        width, height = self.size
+        scale = min(self.window_size[0] / width, self.window_size[1] / height)
+        self.dest = pygame.Rect(0, 0, max(1, int(width * scale)), max(1, int(height * scale)))
+        self.dest.center = (self.window_size[0] // 2, self.window_size[1] // 2)
+        if self.dest.size == self.size:
+            self.scaled = None
+        else:
+            self.scaled = pygame.Surface(self.dest.size, 0, self.surface)
+        self.integer_scale = scale == int(scale)
+        self.window.fill((0, 0, 0))
+
+    def present(self):
+        """把逻辑画面显示到屏幕上"""
+        if self.mode == "software":
+            if self.window.get_size() != self.window_size:
+                self._layout()
+            if self.scaled is None:
+                self.window.blit(self.surface, self.dest)
+            else:
+                if self.integer_scale:
+                    pygame.transform.scale(self.surface, self.dest.size, self.scaled)
+                else:
+                    pygame.transform.smoothscale(self.surface, self.dest.size, self.scaled)
+                self.window.blit(self.scaled, self.dest)
+        pygame.display.flip()
+
+    def toggle_fullscreen(self):
+        if self.mode == "plain":
+            return
+        self.fullscreen = not self.fullscreen
+        if self.mode == "scaled":
+            try:
+                pygame.display.toggle_fullscreen()
+                return
+            except pygame.error:
+                # 有的平台不支持直接切换，重新创建窗口
+                pass
+        self._open()
+
+    def to_logical(self, pos):
+        """把窗口坐标换算为逻辑坐标（scaled 和 plain 模式下已经是逻辑坐标）"""
+        if self.mode != "software":
+            return pos
+        x = (pos[0] - self.dest.x) * self.size[0] // self.dest.width
+        y = (pos[1] - self.dest.y) * self.size[1] // self.dest.height
+        return (min(max(x, 0), self.size[0] - 1), min(max(y, 0), self.size[1] - 1))
@@ -0,0 +1,472 @@
+"""2048：支持撤销、调整棋盘大小和AI提示/自动游戏"""
+import pygame
+import random
+import struct
+
+from history import UndoHistory, pack_cells, unpack_cells, packed_size
+from ui import Label
+from particles import ParticleSystem
+from ai_2048 import Expectimax2048AI, DIRECTIONS, DIRECTION_NAMES, encode_board, move as ai_move_board
+from game_common import (
+    screen, game_font, font_options, render_text, get_sysfont, warm_texts, SCREEN_WIDTH,
+    SCREEN_HEIGHT, HISTORY_MAX_BYTES, WHITE, ai_scheduler, submit_ai, poll_ai, draw_thinking,
+    THINKING_TEXTS)
+
+
+class Game2048:
+    ai = None
+    MIN_SIZE = 3
+    MAX_SIZE = 16
+    # 预渲染的方块（背景和数字），键为(数值, 格子大小)，所有实例共用
+    tile_cache = {}
+    # 菜单空闲时预热的固定文本
+    WARM_TEXTS = [("自动游戏中（A键停止）", WHITE, 24), ("游戏结束！", WHITE, None), ("按R重试", WHITE, None)] + \
+        [(f"提示: {name}", WHITE, 24) for name in DIRECTION_NAMES.values()] + THINKING_TEXTS
+    
+    def __init__(self, size=4, seed=None):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.score_label = Label("分数: 0", WHITE, None, (20, 20))
+        # 浅色背景上粒子不变暗；merged 为上一次移动中合并出的格子
+        self.particles = ParticleSystem(fade=False, seed=seed)
+        self.merged = []
+        self.history = None
+        self.reset()
+    
+    def reset(self):
+        # 棋盘大小可调，最大16x16，格子大小随之缩放
+        self.cell_size = min(120, 640 // self.size)
+        self.cell_gap = max(2, self.cell_size // 12)
+        self.board_start_x = (SCREEN_WIDTH - self.cell_size * self.size) // 2
+        self.board_start_y = (SCREEN_HEIGHT - self.cell_size * self.size) // 2
+        
+        # 创建空白棋盘
+        self.board = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        
+        # 空格列表及每个空格在列表中的位置，增删和随机选择都是O(1)
+        self.empty_cells = [(i, j) for i in range(self.size) for j in range(self.size)]
+        self.empty_index = {cell: k for k, cell in enumerate(self.empty_cells)}
+        # 相邻且相同的非零数字对的数量，大于0说明还能合并
+        self.equal_pairs = 0
+        
+        # 每个方向上的所有行，每行的格子按移动方向从前到后排列
+        rows = [[(i, j) for j in range(self.size)] for i in range(self.size)]
+        cols = [[(i, j) for i in range(self.size)] for j in range(self.size)]
+        self.lines = {
+            "left": rows,
+            "right": [row[::-1] for row in rows],
+            "up": cols,
+            "down": [col[::-1] for col in cols]
+        }
+        
+        # 初始化两个数字
+        self.add_new_number()
+        self.add_new_number()
+        
+        self.score = 0
+        self.game_over = False
+        self.victory = False
+        
+        # 撤销历史：每步记录压缩后的棋盘（每格5位指数）和移动方向；
+        # 棋盘大小没变时重新开始复用原来的缓冲区
+        record_size = packed_size(self.size * self.size, 5) + 1
+        if self.history is None or self.history.record_size != record_size:
+            self.history = UndoHistory(record_size, HISTORY_MAX_BYTES)
+        else:
+            self.history.clear()
+        
+        # AI提示和自动游戏，ai_task 为正在后台进行的搜索
+        self.cancel_ai()
+        self.hint = None
+        self.autoplay = False
+    
+    def cancel_ai(self):
+        # 棋盘变化后，还没完成的搜索结果已经没用了
+        ai_scheduler.cancel(self)
+        self.ai_task = None
+    
+    def suspend(self):
+        # 返回菜单时挂起：停止后台搜索，恢复后重新提交
+        self.cancel_ai()
+    
+    def resize(self, size):
+        # 改变棋盘大小并重新开始
+        size = max(self.MIN_SIZE, min(self.MAX_SIZE, size))
+        if size != self.size:
+            self.size = size
+            self.reset()
+    
+    def set_cell(self, i, j, value):
+        # 修改一个格子，同时增量更新空格列表和相同数字对的数量
+        old = self.board[i][j]
+        if old == value:
+            return
+        
+        for ni, nj in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            if 0 <= ni < self.size and 0 <= nj < self.size:
+                neighbor = self.board[ni][nj]
+                if neighbor:
+                    if neighbor == old:
+                        self.equal_pairs -= 1
+                    if neighbor == value:
+                        self.equal_pairs += 1
+        
+        self.board[i][j] = value
+        if old == 0:
+            # 从空格列表中删除：用最后一个元素填补空位
+            k = self.empty_index.pop((i, j))
+            last = self.empty_cells.pop()
+            if k < len(self.empty_cells):
+                self.empty_cells[k] = last
+                self.empty_index[last] = k
+        elif value == 0:
+            self.empty_index[(i, j)] = len(self.empty_cells)
+            self.empty_cells.append((i, j))
+    
+    def pack_state(self):
+        # 存档：大小、分数、状态和棋盘，撤销历史不保存
+        return struct.pack("<BIBB", self.size, self.score, self.game_over, self.victory) + \
+            self.pack_board()
+    
+    def load_state(self, data):
+        size, self.score, game_over, victory = struct.unpack_from("<BIBB", data)
+        self.resize(size)
+        self.load_board(data[struct.calcsize("<BIBB"):])
+        self.game_over = bool(game_over)
+        self.victory = bool(victory)
+        self.history.clear()
+        self.cancel_ai()
+        self.hint = None
+        self.autoplay = False
+    
+    def pack_board(self):
+        # 把棋盘压缩为字节串，每格保存5位指数
+        return pack_cells([value.bit_length() - 1 if value else 0
+                           for row in self.board for value in row], 5)
+    
+    def load_board(self, data):
+        # 从压缩的字节串恢复棋盘，只修改有变化的格子
+        exponents = unpack_cells(data, self.size * self.size, 5)
+        for index, exponent in enumerate(exponents):
+            i, j = divmod(index, self.size)
+            self.set_cell(i, j, (1 << exponent) if exponent else 0)
+    
+    def apply_move(self, direction):
+        # 执行一步移动，有变化时生成新数字并记入历史
+        before = self.pack_board()
+        moved = self.slide(direction)
+        if moved:
+            for i, j in self.merged:
+                self.particles.emit(self.board_start_x + j * self.cell_size, self.board_start_y + i * self.cell_size,
+                                    16, self.get_text_color(self.board[i][j]), speed=(1, 4), life=(10, 20),
+                                    width=self.cell_size, height=self.cell_size)
+            self.add_new_number()
+            self.history.push(before + bytes([DIRECTIONS.index(direction)]))
+            self.cancel_ai()
+            self.hint = None
+        return moved
+    
+    def move_gain(self, direction):
+        # 从当前棋盘按指定方向移动能得到的分数
+        return ai_move_board(encode_board(self.board), direction)[1]
+    
+    def undo(self):
+        # 撤销：记录中换入当前棋盘，以便重做
+        record = self.history.undo(lambda record: self.pack_board() + record[-1:])
+        if record is None:
+            return False
+        self.load_board(record[:-1])
+        self.score -= self.move_gain(DIRECTIONS[record[-1]])
+        self.game_over = False
+        self.cancel_ai()
+        self.hint = None
+        return True
+    
+    def redo(self):
+        # 重做：记录中换入当前棋盘，以便再次撤销
+        before = self.pack_board()
+        record = self.history.redo(lambda record: before + record[-1:])
+        if record is None:
+            return False
+        self.score += self.move_gain(DIRECTIONS[record[-1]])
+        self.load_board(record[:-1])
+        self.cancel_ai()
+        self.hint = None
+        return True
+    
+    def get_ai(self):
+        # 所有2048实例共用一个AI（以及它的工作进程池）
+        if Game2048.ai is None:
+            Game2048.ai = Expectimax2048AI(time_budget=0.05)
+        return Game2048.ai
+    
+    def request_ai(self, purpose):
+        # 在后台搜索当前棋盘的最佳方向，purpose 为"hint"（提示）或"move"（自动游戏）
+        self.cancel_ai()
+        ai = self.get_ai()
+        self.ai_task = submit_ai(self, ai.best_move, encode_board(self.board),
+                                 purpose=purpose, budget=ai.time_budget)
+    
+    def poll_ai(self):
+        # 搜索完成时使用结果；搜索受时间预算影响，结果通过 decision_log 记录或重放
+        code = poll_ai(self.ai_task, lambda direction: DIRECTIONS.index(direction)
+                       if direction is not None else len(DIRECTIONS))
+        if code is None:
+            return
+        purpose = self.ai_task.purpose
+        self.ai_task = None
+        direction = DIRECTIONS[code] if code < len(DIRECTIONS) else None
+        if purpose == "hint":
+            self.hint = direction
+        elif direction is not None:
+            self.apply_move(direction)
+    
+    def add_new_number(self):
+        if self.empty_cells:
+            i, j = self.rng.choice(self.empty_cells)
+            # 90%概率生成2，10%概率生成4
+            self.set_cell(i, j, 2 if self.rng.random() < 0.9 else 4)
+            
+            # 检查是否获胜
+            if self.board[i][j] == 2048:
+                self.victory = True
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+            # 任何状态下都可以撤销和重做
+            self.undo()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_y:
+            self.redo()
+        elif self.game_over:
+            # 游戏结束状态下的按键处理
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
+                    self.reset()
+        elif not self.victory:
+            # 游戏进行中的事件处理
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_UP:
+                    self.apply_move("up")
+                elif event.key == pygame.K_DOWN:
+                    self.apply_move("down")
+                elif event.key == pygame.K_LEFT:
+                    self.apply_move("left")
+                elif event.key == pygame.K_RIGHT:
+                    self.apply_move("right")
+                elif event.key == pygame.K_r:
+                    self.reset()
+                elif event.key == pygame.K_h:
+                    # 在后台计算提示
+                    self.request_ai("hint")
+                elif event.key == pygame.K_a:
+                    # 切换自动游戏
+                    self.autoplay = not self.autoplay
+                    if not self.autoplay:
+                        self.cancel_ai()
+                elif event.key in (pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    # 增大棋盘
+                    self.resize(self.size + 1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    # 减小棋盘
+                    self.resize(self.size - 1)
+        else:
+            # 胜利状态下的按键处理
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
+                    self.reset()
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 粒子在更新中前进，绘制时只画出来
+        self.particles.update()
+        
+        # AI在后台搜索，这里只检查结果；自动游戏时上一步完成后立即搜索下一步
+        if self.ai_task is not None:
+            self.poll_ai()
+        if self.autoplay and self.ai_task is None and not self.game_over and not self.victory:
+            self.request_ai("move")
+        
+        # 检查游戏是否结束
+        if not self.game_over and not self.can_move():
+            self.game_over = True
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def slide(self, direction):
+        # 沿指定方向移动所有行，只写回发生变化的格子
+        moved = False
+        self.merged.clear()
+        for line in self.lines[direction]:
+            # 压缩行
+            new_row = [self.board[i][j] for i, j in line if self.board[i][j] != 0]
+            
+            # 合并相同数字
+            j = 0
+            while j < len(new_row) - 1:
+                if new_row[j] == new_row[j + 1]:
+                    new_row[j] *= 2
+                    self.score += new_row[j]
+                    del new_row[j + 1]
+                    self.merged.append(line[j])
+                else:
+                    j += 1
+            
+            # 填充空白
+            while len(new_row) < self.size:
+                new_row.append(0)
+            
+            # 写回有变化的格子
+            for (i, j), value in zip(line, new_row):
+                if self.board[i][j] != value:
+                    self.set_cell(i, j, value)
+                    moved = True
+        
+        return moved
+    
+    def move_left(self):
+        return self.slide("left")
+    
+    def move_right(self):
+        return self.slide("right")
+    
+    def move_up(self):
+        return self.slide("up")
+    
+    def move_down(self):
+        return self.slide("down")
+    
+    def can_move(self):
+        # 有空格或有相邻的相同数字就还能移动
+        return bool(self.empty_cells) or self.equal_pairs > 0
+    
+    @classmethod
+    def warm_up(cls, size=4):
+        """分帧预热：默认大小棋盘的所有方块和固定文本，每完成一项让出一次"""
+        cell_size = min(120, 640 // size)
+        for exponent in range(12):
+            cls.tile_surface(1 << exponent if exponent else 0, cell_size)
+            yield
+        yield from warm_texts(cls.WARM_TEXTS)
+    
+    @classmethod
+    def tile_surface(cls, value, cell_size):
+        # 取得一个方块的图像，第一次用到时绘制
+        key = (value, cell_size)
+        tile = cls.tile_cache.get(key)
+        if tile is not None:
+            return tile
+        tile_size = cell_size - max(2, cell_size // 12)
+        tile = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+        pygame.draw.rect(tile, cls.get_cell_color(value), (0, 0, tile_size, tile_size), 0, 5)
+        if value != 0:
+            # 根据数值调整字体大小，并随格子大小缩放
+            if value < 100:
+                font_size = 40
+            elif value < 1000:
+                font_size = 35
+            else:
+                font_size = 30
+            font_size = max(10, font_size * cell_size // 120)
+            
+            try:
+                number_font = get_sysfont(font_options[0], font_size, bold=True)
+            except:
+                number_font = get_sysfont(None, font_size, bold=True)
+            
+            text = number_font.render(str(value), True, cls.get_text_color(value))
+            tile.blit(text, text.get_rect(center=(tile_size // 2, tile_size // 2)))
+        cls.tile_cache[key] = tile
+        return tile
+    
+    @staticmethod
+    def get_cell_color(value):
+        # 根据数值返回对应的颜色
+        colors = {
+            0: (205, 193, 180),
+            2: (238, 228, 218),
+            4: (237, 224, 200),
+            8: (242, 177, 121),
+            16: (245, 149, 99),
+            32: (246, 124, 95),
+            64: (246, 94, 59),
+            128: (237, 207, 114),
+            256: (237, 204, 97),
+            512: (237, 200, 80),
+            1024: (237, 197, 63),
+            2048: (237, 194, 46)
+        }
+        return colors.get(value, (60, 58, 50))
+    
+    @staticmethod
+    def get_text_color(value):
+        # 返回文字颜色（深色或白色）
+        return (249, 246, 242) if value >= 8 else (119, 110, 101)
+    
+    def draw(self):
+        screen.fill((187, 173, 160))
+        
+        # 绘制得分
+        self.score_label.set_text(f"分数: {self.score}")
+        self.score_label.draw(screen)
+        
+        # 绘制AI提示和自动游戏状态
+        if self.autoplay:
+            ai_text = render_text("自动游戏中（A键停止）", WHITE, 24)
+            screen.blit(ai_text, (20, 70))
+        elif self.ai_task is not None:
+            draw_thinking((20, 70))
+        elif self.hint:
+            ai_text = render_text(f"提示: {DIRECTION_NAMES[self.hint]}", WHITE, 24)
+            screen.blit(ai_text, (20, 70))
+        
+        # 绘制棋盘边框
+        pygame.draw.rect(screen, (119, 110, 101), 
+                        (self.board_start_x - 10, self.board_start_y - 10, 
+                        self.cell_size * self.size + 20, 
+                        self.cell_size * self.size + 20), 0, 10)
+        
+        # 绘制单元格：方块和数字都是预渲染的
+        for i in range(self.size):
+            for j in range(self.size):
+                x = self.board_start_x + j * self.cell_size
+                y = self.board_start_y + i * self.cell_size
+                screen.blit(self.tile_surface(self.board[i][j], self.cell_size), (x, y))
+        
+        self.particles.draw(screen)
+        
+        # 如果获胜，显示胜利消息
+        if self.victory and not self.game_over:
+            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            overlay.fill((255, 255, 255, 100))  # 半透明白色
+            screen.blit(overlay, (0, 0))
+            
+            win_text = game_font.render("你达到了2048！", True, (119, 110, 101))
+            continue_text = game_font.render("继续游戏还是按R重新开始？", True, (119, 110, 101))
+            
+            screen.blit(win_text, (SCREEN_WIDTH//2 - 120, SCREEN_HEIGHT//2 - 50))
+            screen.blit(continue_text, (SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 + 20))
+    
+    def show_game_over(self):
+        # 半透明覆盖层
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))  # 半透明黑色
+        screen.blit(overlay, (0, 0))
+        
+        # 使用render_text函数渲染文本以确保中文正确显示
+        game_over_text = render_text("游戏结束！", WHITE)
+        score_text = render_text(f"最终分数: {self.score}", WHITE)
+        retry_text = render_text("按R重试", WHITE)
+        
+        # 居中显示文本
+        screen.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//2 - 80))
+        screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 20))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - retry_text.get_width()//2, SCREEN_HEIGHT//2 + 40))
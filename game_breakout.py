@@ -0,0 +1,202 @@
+"""打砖块"""
+import pygame
+import random
+import struct
+
+from rewind import RewindBuffer
+from ui import Label
+from particles import ParticleSystem
+from game_common import (
+    screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, REWIND_MAX_BYTES,
+    WHITE, BLACK, RED, GREEN, BLUE, key_state, rewind_step)
+
+
+class BreakoutGame:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.rewind_buffer = RewindBuffer(REWIND_MAX_BYTES, FPS)
+        self.particles = ParticleSystem(gravity=0.15, seed=seed)
+        self.score_label = Label("分数: 0", WHITE, None, (10, 10))
+        self.lives_label = Label("生命: 3", WHITE, None, (SCREEN_WIDTH - 100, 10))
+        self.reset()
+    
+    def reset(self):
+        # 重新开始后不能倒带回上一局
+        self.rewind_buffer.clear()
+        self.paddle_width = 100
+        self.paddle_height = 15
+        self.paddle_x = SCREEN_WIDTH // 2 - self.paddle_width // 2
+        self.paddle_y = SCREEN_HEIGHT - 50
+        self.paddle_speed = 10
+        
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        self.ball_radius = 10
+        self.ball_dx = 4
+        self.ball_dy = -4
+        
+        # 创建砖块
+        self.bricks = []
+        brick_rows = 5
+        brick_cols = 10
+        brick_width = (SCREEN_WIDTH - 20) // brick_cols
+        brick_height = 20
+        
+        for row in range(brick_rows):
+            for col in range(brick_cols):
+                brick_x = 10 + col * brick_width
+                brick_y = 50 + row * (brick_height + 10)
+                brick_color = (255 - row * 30, 50 + row * 40, 100)
+                self.bricks.append({
+                    'id': len(self.bricks),
+                    'rect': pygame.Rect(brick_x, brick_y, brick_width - 5, brick_height),
+                    'color': brick_color
+                })
+        # 所有砖块的初始布局，倒带时按编号恢复
+        self.brick_layout = list(self.bricks)
+        
+        self.lives = 3
+        self.score = 0
+        self.game_over = False
+        self.victory = False
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递；挡板由按住的键控制"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            if self.game_over or self.victory:
+                self.reset()
+    
+    def pack_state(self):
+        # 倒带快照：挡板、球、生命、分数、状态和剩余砖块的位图
+        brick_mask = 0
+        for brick in self.bricks:
+            brick_mask |= 1 << brick['id']
+        return struct.pack("<ddddd", self.paddle_x, self.ball_x, self.ball_y,
+                           self.ball_dx, self.ball_dy) + \
+            struct.pack("<BIBB", self.lives, self.score, self.game_over, self.victory) + \
+            brick_mask.to_bytes((len(self.brick_layout) + 7) // 8, "little")
+    
+    def load_state(self, data):
+        (self.paddle_x, self.ball_x, self.ball_y, self.ball_dx, self.ball_dy,
+         self.lives, self.score, game_over, victory) = struct.unpack_from("<dddddBIBB", data)
+        self.game_over = bool(game_over)
+        self.victory = bool(victory)
+        brick_mask = int.from_bytes(data[struct.calcsize("<dddddBIBB"):], "little")
+        self.bricks = [brick for brick in self.brick_layout if brick_mask >> brick['id'] & 1]
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 粒子在更新中前进，绘制时只画出来
+        self.particles.update()
+        
+        # 按住退格键倒带
+        if rewind_step(self):
+            return
+        
+        if self.game_over or self.victory:
+            return
+        
+        # 移动挡板
+        keys = key_state
+        if keys[pygame.K_LEFT] and self.paddle_x > 0:
+            self.paddle_x -= self.paddle_speed
+        if keys[pygame.K_RIGHT] and self.paddle_x < SCREEN_WIDTH - self.paddle_width:
+            self.paddle_x += self.paddle_speed
+        
+        # 移动球
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+        
+        # 墙壁碰撞检测
+        if self.ball_x - self.ball_radius <= 0 or self.ball_x + self.ball_radius >= SCREEN_WIDTH:
+            self.ball_dx = -self.ball_dx
+        if self.ball_y - self.ball_radius <= 0:
+            self.ball_dy = -self.ball_dy
+        
+        # 检测球是否落下
+        if self.ball_y - self.ball_radius > SCREEN_HEIGHT:
+            self.lives -= 1
+            if self.lives <= 0:
+                self.game_over = True
+            else:
+                self.reset_ball()
+        
+        # 挡板碰撞检测
+        paddle_rect = pygame.Rect(self.paddle_x, self.paddle_y, self.paddle_width, self.paddle_height)
+        ball_rect = pygame.Rect(self.ball_x - self.ball_radius, self.ball_y - self.ball_radius, 
+                              self.ball_radius * 2, self.ball_radius * 2)
+        
+        if paddle_rect.colliderect(ball_rect):
+            self.ball_dy = -abs(self.ball_dy)
+            # 根据击中挡板的位置调整反弹角度
+            hit_pos = (self.ball_x - self.paddle_x) / self.paddle_width
+            self.ball_dx = (hit_pos - 0.5) * 10
+        
+        # 砖块碰撞检测
+        for brick in self.bricks[:]:
+            if ball_rect.colliderect(brick['rect']):
+                self.bricks.remove(brick)
+                self.score += 10
+                # 砖块碎裂
+                rect = brick['rect']
+                self.particles.emit(rect.x, rect.y, 40, brick['color'], speed=(0.5, 3), life=(20, 45),
+                                    width=rect.width, height=rect.height)
+                self.ball_dy = -self.ball_dy
+                break
+        
+        # 检查胜利条件
+        if not self.bricks:
+            self.victory = True
+        
+        self.rewind_buffer.record(self.pack_state())
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over or self.victory:
+            self.show_end_screen()
+        else:
+            self.draw()
+    
+    def reset_ball(self):
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        self.ball_dx = 4
+        self.ball_dy = -4
+    
+    def draw(self):
+        screen.fill(BLACK)
+        
+        # 绘制挡板
+        pygame.draw.rect(screen, BLUE, (self.paddle_x, self.paddle_y, self.paddle_width, self.paddle_height))
+        
+        # 绘制球
+        pygame.draw.circle(screen, WHITE, (int(self.ball_x), int(self.ball_y)), self.ball_radius)
+        
+        # 绘制砖块
+        for brick in self.bricks:
+            pygame.draw.rect(screen, brick['color'], brick['rect'])
+        
+        self.particles.draw(screen)
+        
+        # 绘制分数和生命值
+        self.score_label.set_text(f"分数: {self.score}")
+        self.lives_label.set_text(f"生命: {self.lives}")
+        self.score_label.draw(screen)
+        self.lives_label.draw(screen)
+    
+    def show_end_screen(self):
+        screen.fill(BLACK)
+        if self.victory:
+            end_text = game_font.render("恭喜你赢了！", True, GREEN)
+        else:
+            end_text = game_font.render("游戏结束！", True, RED)
+        
+        score_text = game_font.render(f"最终分数: {self.score}", True, WHITE)
+        retry_text = game_font.render("按R重试，按ESC返回", True, WHITE)
+        
+        screen.blit(end_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 - 50))
+        screen.blit(score_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 50))
@@ -0,0 +1,333 @@
+"""所有游戏共用的运行环境
+
+初始化pygame、字体和窗口，定义屏幕尺寸、颜色、模拟时钟、按键状态、
+决策记录和后台AI调度器。游戏模块和 game_collection 都从这里导入，
+游戏模块不导入 game_collection（它作为主程序运行）。
+"""
+import pygame
+import sys
+import os
+from collections import OrderedDict
+
+from profiler import Profiler
+from ai_scheduler import AIScheduler
+from display import Display
+
+# 帧性能分析器，默认关闭
+profiler = Profiler()
+
+# 无界面模式（回放等）使用SDL的dummy视频驱动
+HEADLESS_FLAGS = ("--replay", "--bench", "--serve", "--selftest", "--soak", "--loadtest")
+HEADLESS = any(flag in sys.argv for flag in HEADLESS_FLAGS)
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# 初始化pygame
+pygame.init()
+
+# 设置中文字体
+pygame.font.init()
+print("系统可用字体列表:", pygame.font.get_fonts())
+
+# 尝试加载中文字体
+game_font = None
+
+# 方法1: 尝试使用pygame.font.Font直接加载系统TTF文件
+# 常见中文字体路径
+common_font_paths = [
+    '/System/Library/Fonts/PingFang.ttc',    # macOS 苹方
+    '/Library/Fonts/SimHei.ttf',            # macOS 黑体
+    '/Library/Fonts/Microsoft YaHei.ttf',   # Windows 雅黑
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',  # Linux 文泉驿
+    '/usr/share/fonts/truetype/simhei/simhei.ttf'      # Linux 黑体
+]
+
+print("尝试直接加载TTF文件...")
+for font_path in common_font_paths:
+    if os.path.exists(font_path):
+        try:
+            game_font = pygame.font.Font(font_path, 36)
+            print(f"成功直接加载字体文件: {font_path}")
+            break
+        except Exception as e:
+            print(f"加载TTF文件失败 {font_path}: {e}")
+
+# 中文字体选项列表，按优先级排序
+font_options = [
+    ('simhei', '黑体'),
+    ('wenquanyi', '文泉驿'),
+    ('heiti', '黑体'),
+    ('pingfang', '苹方'),
+    ('microsoftyahei', '微软雅黑'),
+    ('msyh', '微软雅黑'),
+    ('notosanssc', '思源黑体'),
+    ('noto', 'Noto'),
+    ('arialunicode', 'Arial Unicode'),
+    ('simsun', '宋体')
+]
+
+# 方法2: 如果TTF文件加载失败，尝试使用SysFont
+if not game_font:
+    print("尝试使用SysFont加载系统字体...")
+    
+    available_fonts = [font.lower() for font in pygame.font.get_fonts()]
+    print("可用字体:", available_fonts)
+    
+    for font_base, font_desc in font_options:
+        for available_font in available_fonts:
+            if font_base in available_font:
+                try:
+                    game_font = pygame.font.SysFont(available_font, 36)
+                    print(f"成功加载系统字体: {available_font} ({font_desc})")
+                    # 测试中文字体渲染
+                    test_surface = game_font.render("测试中文显示", True, (255, 255, 255))
+                    print(f"字体测试成功，渲染高度: {test_surface.get_height()}")
+                    break
+                except Exception as e:
+                    print(f"加载字体失败 {available_font}: {e}")
+        if game_font:
+            break
+
+# 方法3: 如果以上都失败，使用默认字体但做更多调试
+if not game_font:
+    try:
+        game_font = pygame.font.SysFont(None, 36)
+        print("使用默认字体，尝试最大兼容性模式")
+        # 尝试用默认字体渲染
+        test_surface = game_font.render("? 中文可能无法显示 ?", True, (255, 255, 255))
+        print(f"默认字体测试，渲染高度: {test_surface.get_height()}")
+    except:
+        print("警告: 无法加载任何字体，游戏可能无法正常显示文字")
+
+# 已创建的字体和渲染过的文本，创建字体和第一次渲染都比较慢
+font_cache = {}
+text_cache = OrderedDict()
+# 文本缓存最多保存的条数，超过时丢弃最久没用过的
+TEXT_CACHE_SIZE = 512
+
+# 添加全局字体对象以便所有游戏类使用
+def get_font(size=None):
+    """获取指定大小的字体，同一大小只创建一次"""
+    font = font_cache.get(size)
+    if font is None:
+        font = font_cache[size] = _create_font(size)
+    return font
+
+def get_sysfont(name, size, bold=False):
+    """按名称获取系统字体，同样缓存"""
+    key = (name, size, bold)
+    font = font_cache.get(key)
+    if font is None:
+        font = font_cache[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+def _create_font(size):
+    if size and game_font:
+        # 尝试创建新字体实例
+        try:
+            if hasattr(game_font, 'name'):
+                return pygame.font.SysFont(game_font.name, size)
+            elif hasattr(game_font, 'get_height'):  # 如果是Font对象
+                # 对于直接加载的TTF文件，尝试创建相同字体但不同大小
+                try:
+                    font_path = game_font.path
+                    return pygame.font.Font(font_path, size)
+                except:
+                    # 如果失败，返回原始字体
+                    return game_font
+            else:
+                return game_font
+        except Exception as e:
+            print(f"创建特定大小字体失败: {e}")
+            return game_font
+    return game_font
+
+def render_text(text, color, size=None):
+    """安全地渲染文本，处理可能的中文显示问题
+    
+    结果会被缓存，返回的 Surface 是共享的，调用方只能读取和绘制，不能修改。
+    """
+    key = (text, color, size)
+    surface = text_cache.get(key)
+    if surface is not None:
+        text_cache.move_to_end(key)
+        return surface
+    try:
+        with profiler.scope("render_text"):
+            surface = get_font(size).render(text, True, color)
+    except Exception as e:
+        print(f"渲染文本失败 '{text}': {e}")
+        # 尝试用英文替代或使用默认字体
+        try:
+            fallback_font = pygame.font.SysFont(None, size or 36)
+            return fallback_font.render("?" * len(text), True, color)
+        except:
+            # 如果所有都失败，返回一个空的surface
+            return pygame.Surface((len(text) * 10, 36))
+    text_cache[key] = surface
+    if len(text_cache) > TEXT_CACHE_SIZE:
+        text_cache.popitem(last=False)
+    return surface
+
+def warm_texts(items):
+    """逐个预渲染 (文本, 颜色, 字号)，每渲染一个让出一次，用于分帧预热"""
+    for text, color, size in items:
+        render_text(text, color, size)
+        yield
+
+# 游戏常量 - 提高分辨率以便更好地显示所有游戏
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 768
+FPS = 60
+
+# 撤销历史的内存上限（字节）
+HISTORY_MAX_BYTES = 1 << 20
+# 每个实时游戏倒带缓冲区的内存上限（字节）
+REWIND_MAX_BYTES = 4 << 20
+
+# 颜色定义
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+
+# 创建屏幕：所有游戏都按逻辑分辨率画在 screen 上，由 display 缩放到真实的窗口或全屏
+# --fullscreen 以全屏启动，--software-scale 不使用 pygame.SCALED
+if HEADLESS or os.environ.get("SDL_VIDEODRIVER") == "dummy":
+    DISPLAY_MODE = "plain"
+elif "--software-scale" in sys.argv:
+    DISPLAY_MODE = "software"
+else:
+    DISPLAY_MODE = "scaled"
+display = Display((SCREEN_WIDTH, SCREEN_HEIGHT), DISPLAY_MODE, "--fullscreen" in sys.argv,
+                  '多合一游戏集合')
+screen = display.surface
+
+class SimClock:
+    """按帧推进的模拟时钟，游戏逻辑用它计时，保证回放结果与录制时一致"""
+    def __init__(self):
+        self.frame = 0
+    
+    def reset(self):
+        self.frame = 0
+    
+    def advance(self):
+        self.frame += 1
+    
+    def get_ticks(self):
+        # 与pygame.time.get_ticks一样以毫秒为单位
+        return self.frame * 1000 // FPS
+
+sim_clock = SimClock()
+
+class KeyState:
+    """根据分发给游戏的按键事件维护当前按下的键，代替pygame.key.get_pressed"""
+    def __init__(self):
+        self.pressed = set()
+    
+    def update(self, event):
+        if event.type == pygame.KEYDOWN:
+            self.pressed.add(event.key)
+        elif event.type == pygame.KEYUP:
+            self.pressed.discard(event.key)
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # 失去焦点时收不到KEYUP，清空所有按键
+            self.pressed.clear()
+    
+    def clear(self):
+        self.pressed.clear()
+    
+    def __getitem__(self, key):
+        return key in self.pressed
+
+key_state = KeyState()
+
+class DecisionLog:
+    """记录或重放无法重算的决策结果（如受时间预算影响的AI搜索）
+    
+    决策按生效的帧记录，回放时在同一帧取出，后台AI何时算完不影响回放。
+    """
+    def __init__(self):
+        self.recorder = None
+        self.pending = None
+        self.upcoming = None
+    
+    def start(self, recorder=None, decisions=None):
+        # recorder 为记录函数；decisions 不为None时按帧重放其中的结果
+        self.recorder = recorder
+        self.pending = iter(decisions) if decisions is not None else None
+        self.upcoming = next(self.pending, None) if decisions is not None else None
+    
+    def replaying(self):
+        return self.pending is not None
+    
+    def record(self, value):
+        if self.recorder:
+            self.recorder(value)
+    
+    def take(self):
+        # 回放时：当前帧有记录的决策则取出，否则返回None
+        if self.upcoming is None or self.upcoming[0] != sim_clock.frame:
+            return None
+        value = self.upcoming[1]
+        self.upcoming = next(self.pending, None)
+        return value
+
+decision_log = DecisionLog()
+
+# 所有游戏共用的后台AI线程池
+ai_scheduler = AIScheduler()
+
+def submit_ai(owner, function, *args, purpose=None, budget=None):
+    """把AI搜索交给后台线程，回放时不运行搜索，结果从记录中取出"""
+    return ai_scheduler.submit(owner, function, *args, purpose=purpose, budget=budget,
+                               run=not decision_log.replaying())
+
+def poll_ai(task, encode):
+    """检查AI任务，结果可用时返回编码后的决策（0-255），否则返回None
+    
+    encode 把搜索结果编码为一个字节；结果在取出的这一帧记入回放日志。
+    """
+    if decision_log.replaying():
+        return decision_log.take()
+    if not task.done():
+        return None
+    code = encode(task.result())
+    decision_log.record(code)
+    return code
+
+# 预先绘制的渐变背景，键为底部颜色
+gradient_cache = {}
+
+def get_gradient(color, top=(0, 0, 0)):
+    """从顶部的 top 渐变到底部 color 的全屏背景，每组颜色只绘制一次"""
+    key = (color, top)
+    background = gradient_cache.get(key)
+    if background is None:
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        for y in range(SCREEN_HEIGHT):
+            pygame.draw.line(background,
+                             tuple(int(t + (c - t) * y / SCREEN_HEIGHT) for c, t in zip(color, top)),
+                             (0, y), (SCREEN_WIDTH, y))
+        gradient_cache[key] = background
+    return background
+
+# “AI思考中”指示的所有文本，供预热使用
+THINKING_TEXTS = [(f"AI思考中{'.' * dots}", WHITE, 24) for dots in range(4)]
+
+def draw_thinking(pos, color=WHITE):
+    """绘制“AI思考中”和转动的点，表示后台搜索还在进行"""
+    dots = "." * (pygame.time.get_ticks() // 250 % 4)
+    screen.blit(render_text(f"AI思考中{dots}", color, 24), pos)
+
+def rewind_step(game):
+    """按住退格键时让游戏倒退一帧，返回是否正在倒带"""
+    if not key_state[pygame.K_BACKSPACE]:
+        return False
+    snapshot = game.rewind_buffer.rewind()
+    if snapshot is not None:
+        game.load_state(snapshot)
+    return True
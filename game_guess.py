@@ -0,0 +1,189 @@
+"""猜数字"""
+import pygame
+import random
+import struct
+
+from game_common import (
+    screen, render_text, get_gradient, warm_texts, SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, RED,
+    GREEN, BLUE, YELLOW)
+
+
+class GuessNumberGame:
+    # 背景渐变的底部颜色
+    BACKGROUND = (20, 20, 40)
+    # 菜单空闲时预热的固定文本
+    WARM_TEXTS = [("猜数字游戏", WHITE, 48), ("我想了一个1到100之间的数字", WHITE, 28),
+                  ("输入一个数字并按回车", WHITE, 28), ("历史猜测:", WHITE, 30),
+                  ("你的猜测: ", YELLOW, 32), ("恭喜你猜对了！", GREEN, 48),
+                  ("按R重试，按ESC返回", YELLOW, 28)]
+    
+    @classmethod
+    def warm_up(cls):
+        """分帧预热背景和固定文本"""
+        get_gradient(cls.BACKGROUND)
+        yield
+        yield from warm_texts(cls.WARM_TEXTS)
+    
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.reset()
+    
+    def reset(self):
+        self.target_number = self.rng.randint(1, 100)
+        self.guesses = []
+        self.max_guesses = 10
+        self.game_over = False
+        self.won = False
+        self.current_guess = ""
+    
+    def pack_state(self):
+        # 存档：目标数字、机会数、状态、当前输入和历史猜测
+        current = self.current_guess.encode("ascii")
+        return struct.pack("<BBBBB", self.target_number, self.max_guesses, self.game_over,
+                           self.won, len(current)) + current + bytes(self.guesses)
+    
+    def load_state(self, data):
+        (self.target_number, self.max_guesses, game_over, won,
+         length) = struct.unpack_from("<BBBBB", data)
+        self.game_over = bool(game_over)
+        self.won = bool(won)
+        offset = struct.calcsize("<BBBBB")
+        self.current_guess = data[offset:offset + length].decode("ascii")
+        self.guesses = list(data[offset + length:])
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 猜数字完全由事件驱动，没有每帧的逻辑
+        pass
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        if event.type == pygame.KEYDOWN:
+            if self.game_over:
+                # 游戏结束状态下的按键处理
+                if event.key == pygame.K_r:
+                    self.reset()
+            else:
+                # 游戏进行中的按键处理
+                if event.key == pygame.K_RETURN and self.current_guess:
+                    # 提交猜测
+                    try:
+                        guess = int(self.current_guess)
+                        if 1 <= guess <= 100:
+                            self.guesses.append(guess)
+                            
+                            # 检查是否猜对
+                            if guess == self.target_number:
+                                self.game_over = True
+                                self.won = True
+                            elif len(self.guesses) >= self.max_guesses:
+                                self.game_over = True
+                                self.won = False
+                            
+                            self.current_guess = ""
+                    except ValueError:
+                        self.current_guess = ""
+                elif event.key == pygame.K_BACKSPACE:
+                    # 删除最后一个字符
+                    self.current_guess = self.current_guess[:-1]
+                elif event.unicode.isdecimal():
+                    # 添加数字；全角等非ASCII数字转换为ASCII，存档按ASCII保存
+                    if len(self.current_guess) < 3:  # 最多3位数字
+                        self.current_guess += str(int(event.unicode))
+    
+    def draw(self):
+        # 渐变背景（只绘制一次）
+        screen.blit(get_gradient(self.BACKGROUND), (0, 0))
+        
+        # 绘制标题，使用新的渲染函数
+        title = render_text("猜数字游戏", WHITE, 48)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH//2, 80))
+        screen.blit(title, title_rect)
+        
+        # 创建信息面板
+        info_panel = pygame.Rect(SCREEN_WIDTH//2 - 300, 150, 600, 500)
+        pygame.draw.rect(screen, (50, 50, 70), info_panel, 0, 10)
+        pygame.draw.rect(screen, (100, 100, 120), info_panel, 2, 10)
+        
+        # 绘制游戏说明
+        instructions = [
+            "我想了一个1到100之间的数字",
+            f"你有{self.max_guesses - len(self.guesses)}次机会猜测",
+            "输入一个数字并按回车"
+        ]
+        
+        for i, text in enumerate(instructions):
+            instruction_text = render_text(text, WHITE, 28)
+            text_rect = instruction_text.get_rect(center=(SCREEN_WIDTH//2, 200 + i * 50))
+            screen.blit(instruction_text, text_rect)
+        
+        # 绘制当前输入框
+        input_box = pygame.Rect(SCREEN_WIDTH//2 - 200, 350, 400, 60)
+        pygame.draw.rect(screen, (70, 70, 90), input_box, 0, 8)
+        pygame.draw.rect(screen, (120, 120, 140), input_box, 2, 8)
+        
+        # 绘制当前输入
+        guess_text = render_text(f"你的猜测: {self.current_guess}", YELLOW, 32)
+        guess_rect = guess_text.get_rect(center=input_box.center)
+        screen.blit(guess_text, guess_rect)
+        
+        # 绘制历史猜测标题
+        history_title = render_text("历史猜测:", WHITE, 30)
+        history_title_rect = history_title.get_rect(center=(SCREEN_WIDTH//2, 450))
+        screen.blit(history_title, history_title_rect)
+        
+        # 绘制历史猜测，限制显示数量避免溢出
+        max_display_guesses = 5  # 最多显示5条记录
+        start_index = max(0, len(self.guesses) - max_display_guesses)
+        
+        for i, guess in enumerate(self.guesses[start_index:], start=start_index):
+            display_index = i - start_index
+            if guess < self.target_number:
+                result = "太小了！"
+                color = BLUE
+            elif guess > self.target_number:
+                result = "太大了！"
+                color = RED
+            else:
+                result = "猜对了！"
+                color = GREEN
+            
+            guess_history = render_text(f"{guess} - {result}", color, 24)
+            history_rect = guess_history.get_rect(center=(SCREEN_WIDTH//2, 490 + display_index * 35))
+            screen.blit(guess_history, history_rect)
+    
+    def show_game_over(self):
+        # 渐变背景（只绘制一次）
+        screen.blit(get_gradient(self.BACKGROUND), (0, 0))
+        
+        # 创建结果面板
+        result_panel = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 150, 600, 300)
+        pygame.draw.rect(screen, (50, 50, 70), result_panel, 0, 10)
+        pygame.draw.rect(screen, (100, 100, 120), result_panel, 2, 10)
+        
+        # 绘制结果文本
+        if self.won:
+            result_text = render_text("恭喜你猜对了！", GREEN, 48)
+        else:
+            result_text = render_text(f"游戏结束！正确数字是 {self.target_number}", RED, 40)
+        
+        result_rect = result_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
+        screen.blit(result_text, result_rect)
+        
+        attempts_text = render_text(f"你用了 {len(self.guesses)} 次尝试", WHITE, 32)
+        attempts_rect = attempts_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 10))
+        screen.blit(attempts_text, attempts_rect)
+        
+        retry_text = render_text("按R重试，按ESC返回", YELLOW, 28)
+        retry_rect = retry_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 70))
+        screen.blit(retry_text, retry_rect)
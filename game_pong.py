@@ -0,0 +1,188 @@
+"""乒乓球"""
+import pygame
+import random
+import struct
+
+from rewind import RewindBuffer
+from ui import Label
+from game_common import (
+    screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, REWIND_MAX_BYTES,
+    WHITE, BLACK, RED, GREEN, key_state, rewind_step)
+
+
+class PongGame:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.rewind_buffer = RewindBuffer(REWIND_MAX_BYTES, FPS)
+        self.player_label = Label("0", WHITE, None, (SCREEN_WIDTH//4, 50))
+        self.ai_label = Label("0", WHITE, None, (SCREEN_WIDTH*3//4, 50))
+        self.reset()
+    
+    def reset(self):
+        # 重新开始后不能倒带回上一局
+        self.rewind_buffer.clear()
+        # 玩家球拍
+        self.player_width = 15
+        self.player_height = 100
+        self.player_x = 50
+        self.player_y = SCREEN_HEIGHT // 2 - self.player_height // 2
+        self.player_speed = 8
+        
+        # AI球拍
+        self.ai_width = 15
+        self.ai_height = 100
+        self.ai_x = SCREEN_WIDTH - 50 - self.ai_width
+        self.ai_y = SCREEN_HEIGHT // 2 - self.ai_height // 2
+        self.ai_speed = 5
+        
+        # 球
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        self.ball_radius = 10
+        self.ball_dx = 5
+        self.ball_dy = 5
+        
+        # 分数
+        self.player_score = 0
+        self.ai_score = 0
+        self.max_score = 10
+        self.game_over = False
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递；球拍由按住的键控制"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_r and self.game_over:
+            self.reset()
+    
+    def pack_state(self):
+        # 倒带快照：球拍、球、比分和状态
+        return struct.pack("<ddddddBBB", self.player_y, self.ai_y, self.ball_x, self.ball_y,
+                           self.ball_dx, self.ball_dy, self.player_score, self.ai_score,
+                           self.game_over)
+    
+    def load_state(self, data):
+        (self.player_y, self.ai_y, self.ball_x, self.ball_y, self.ball_dx, self.ball_dy,
+         self.player_score, self.ai_score, game_over) = struct.unpack("<ddddddBBB", data)
+        self.game_over = bool(game_over)
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 按住退格键倒带
+        if rewind_step(self):
+            return
+        
+        if self.game_over:
+            return
+        
+        # 移动玩家球拍
+        keys = key_state
+        if keys[pygame.K_UP] and self.player_y > 0:
+            self.player_y -= self.player_speed
+        if keys[pygame.K_DOWN] and self.player_y < SCREEN_HEIGHT - self.player_height:
+            self.player_y += self.player_speed
+        
+        # AI移动
+        self.ai_move()
+        
+        self.advance_ball()
+        self.rewind_buffer.record(self.pack_state())
+    
+    def advance_ball(self):
+        """移动球，处理碰撞和得分（联机对战也使用，见 net_pong）"""
+        # 移动球
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+        
+        # 墙壁碰撞
+        if self.ball_y - self.ball_radius <= 0 or self.ball_y + self.ball_radius >= SCREEN_HEIGHT:
+            self.ball_dy = -self.ball_dy
+        
+        # 检查得分
+        if self.ball_x - self.ball_radius <= 0:
+            self.ai_score += 1
+            if self.ai_score >= self.max_score:
+                self.game_over = True
+            else:
+                self.reset_ball()
+        elif self.ball_x + self.ball_radius >= SCREEN_WIDTH:
+            self.player_score += 1
+            if self.player_score >= self.max_score:
+                self.game_over = True
+            else:
+                self.reset_ball()
+        
+        # 球拍碰撞
+        player_rect = pygame.Rect(self.player_x, self.player_y, self.player_width, self.player_height)
+        ai_rect = pygame.Rect(self.ai_x, self.ai_y, self.ai_width, self.ai_height)
+        ball_rect = pygame.Rect(self.ball_x - self.ball_radius, self.ball_y - self.ball_radius, 
+                              self.ball_radius * 2, self.ball_radius * 2)
+        
+        if player_rect.colliderect(ball_rect):
+            self.ball_dx = abs(self.ball_dx)
+            # 根据击中位置调整角度
+            hit_pos = (self.ball_y - self.player_y) / self.player_height
+            self.ball_dy = (hit_pos - 0.5) * 10
+        elif ai_rect.colliderect(ball_rect):
+            self.ball_dx = -abs(self.ball_dx)
+            # 根据击中位置调整角度
+            hit_pos = (self.ball_y - self.ai_y) / self.ai_height
+            self.ball_dy = (hit_pos - 0.5) * 10
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def ai_move(self):
+        # 简单的AI逻辑
+        if self.ai_y + self.ai_height // 2 < self.ball_y - 20:
+            self.ai_y += self.ai_speed
+        elif self.ai_y + self.ai_height // 2 > self.ball_y + 20:
+            self.ai_y -= self.ai_speed
+        
+        # 限制AI在屏幕内
+        self.ai_y = max(0, min(self.ai_y, SCREEN_HEIGHT - self.ai_height))
+    
+    def reset_ball(self):
+        self.ball_x = SCREEN_WIDTH // 2
+        self.ball_y = SCREEN_HEIGHT // 2
+        # 随机方向
+        self.ball_dx = 5 if self.rng.random() > 0.5 else -5
+        self.ball_dy = (self.rng.random() - 0.5) * 10
+    
+    def draw(self):
+        screen.fill(BLACK)
+        
+        # 绘制中线
+        pygame.draw.line(screen, WHITE, (SCREEN_WIDTH//2, 0), (SCREEN_WIDTH//2, SCREEN_HEIGHT), 2)
+        
+        # 绘制球拍
+        pygame.draw.rect(screen, WHITE, (self.player_x, self.player_y, self.player_width, self.player_height))
+        pygame.draw.rect(screen, WHITE, (self.ai_x, self.ai_y, self.ai_width, self.ai_height))
+        
+        # 绘制球
+        pygame.draw.circle(screen, WHITE, (int(self.ball_x), int(self.ball_y)), self.ball_radius)
+        
+        # 绘制分数
+        self.player_label.set_text(str(self.player_score))
+        self.ai_label.set_text(str(self.ai_score))
+        self.player_label.draw(screen)
+        self.ai_label.draw(screen)
+    
+    def show_game_over(self):
+        screen.fill(BLACK)
+        if self.player_score >= self.max_score:
+            result_text = game_font.render("你赢了！", True, GREEN)
+        else:
+            result_text = game_font.render("电脑赢了！", True, RED)
+        
+        score_text = game_font.render(f"分数: {self.player_score} - {self.ai_score}", True, WHITE)
+        retry_text = game_font.render("按R重试，按ESC返回", True, WHITE)
+        
+        screen.blit(result_text, (SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT//2 - 50))
+        screen.blit(score_text, (SCREEN_WIDTH//2 - 120, SCREEN_HEIGHT//2))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 50))
@@ -0,0 +1,74 @@
+"""挂起的游戏实例池
+
+按ESC返回菜单时，游戏实例连同它的输入记录、帧计数和模拟时钟一起挂起到
+池中，保留预渲染的图像、撤销历史和倒带缓冲区；再次进入时直接恢复，
+不需要重新创建和读取存档。挂起期间模拟时钟不走，游戏的计时器（如俄罗斯
+方块的下落时间）也就一起暂停了。
+
+池的条目数和估计的内存都有上限，超出时淘汰最久没玩的游戏。
+"""
+from collections import OrderedDict
+
+POOL_SIZE = 4
+POOL_MAX_BYTES = 24 << 20
+
+
+def estimate_bytes(game):
+    """粗略估计一个游戏实例的内存：状态加上预分配的倒带缓冲区和撤销历史"""
+    size = len(game.pack_state())
+    for name in ("rewind_buffer", "history"):
+        part = getattr(game, name, None)
+        if part is not None:
+            size += len(part.buffer)
+    return size
+
+
+class SuspendedGame:
+    """池中的一局游戏"""
+
+    def __init__(self, game, recorder, tick, frame):
+        self.game = game
+        self.recorder = recorder
+        self.tick = tick
+        self.frame = frame
+        self.size = estimate_bytes(game) + (len(recorder.data) if recorder else 0)
+
+
+class GamePool:
+    """按游戏编号保存挂起的游戏，LRU淘汰"""
+
+    def __init__(self, max_games=POOL_SIZE, max_bytes=POOL_MAX_BYTES):
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+
+    def __contains__(self, game_index):
+        return game_index in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def total_bytes(self):
+        return sum(entry.size for entry in self.entries.values())
+
+    def put(self, game_index, entry):
+        """挂起一局游戏，返回被淘汰的 [(游戏编号, SuspendedGame)]"""
+        self.entries[game_index] = entry
+        self.entries.move_to_end(game_index)
+        evicted = []
+        # 刚挂起的游戏总是保留，即使它自己就超过了上限
+        while len(self.entries) > 1 and (len(self.entries) > self.max_games
+                                         or self.total_bytes > self.max_bytes):
+            evicted.append(self.entries.popitem(last=False))
+        return evicted
+
+    def take(self, game_index):
+        """取出一局挂起的游戏，没有时返回None"""
+        return self.entries.pop(game_index, None)
+
+    def drain(self):
+        """取出所有挂起的游戏，返回 [(游戏编号, SuspendedGame)]"""
+        entries = list(self.entries.items())
+        self.entries.clear()
+        return entries
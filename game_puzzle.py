@@ -0,0 +1,222 @@
+"""数字拼图"""
+import pygame
+import random
+import struct
+from itertools import chain
+
+from history import UndoHistory, pack_cells, unpack_cells
+from ui import Label
+from game_common import (
+    screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT, HISTORY_MAX_BYTES, WHITE,
+    BLACK, GREEN, BLUE)
+
+
+class PuzzleGame:
+    # 空白格子的移动方向：右、下、左、上
+    DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.moves_label = Label("步数: 0", WHITE, None, (20, 20))
+        self.hint_label = Label("点击数字方块或使用方向键移动", WHITE, None, (SCREEN_WIDTH // 2 - 200, SCREEN_HEIGHT - 50))
+        # 撤销历史：每步只记录空白格子移动的方向（1字节），重新开始时清空复用
+        self.history = UndoHistory(1, HISTORY_MAX_BYTES)
+        self.reset()
+    
+    def reset(self):
+        self.size = 4  # 4x4 拼图
+        self.cell_size = 120
+        self.puzzle_start_x = (SCREEN_WIDTH - self.cell_size * self.size) // 2
+        self.puzzle_start_y = (SCREEN_HEIGHT - self.cell_size * self.size) // 2
+        
+        # 创建初始拼图（已解决状态）
+        self.puzzle = [[i * self.size + j + 1 for j in range(self.size)] for i in range(self.size)]
+        self.puzzle[self.size-1][self.size-1] = 0  # 空白格子
+        
+        # 记录空白格子位置
+        self.empty_row = self.size - 1
+        self.empty_col = self.size - 1
+        
+        # 打乱拼图
+        self.shuffle()
+        
+        self.moves = 0
+        self.game_over = False
+        self.history.clear()
+    
+    def pack_state(self):
+        # 存档：步数、状态和拼图（每格4位），撤销历史不保存
+        return struct.pack("<IB", self.moves, self.game_over) + \
+            pack_cells(list(chain.from_iterable(self.puzzle)), 4)
+    
+    def load_state(self, data):
+        moves, game_over = struct.unpack_from("<IB", data)
+        cells = unpack_cells(data[struct.calcsize("<IB"):], self.size * self.size, 4)
+        self.puzzle = [cells[i * self.size:(i + 1) * self.size] for i in range(self.size)]
+        self.empty_row, self.empty_col = divmod(cells.index(0), self.size)
+        self.moves = moves
+        self.game_over = bool(game_over)
+        self.history.clear()
+    
+    def shuffle(self):
+        # 通过随机移动来打乱拼图
+        directions = self.DIRECTIONS
+        
+        # 执行1000次随机移动
+        for _ in range(1000):
+            # 找到可移动的方向
+            valid_moves = []
+            for dr, dc in directions:
+                new_row, new_col = self.empty_row + dr, self.empty_col + dc
+                if 0 <= new_row < self.size and 0 <= new_col < self.size:
+                    valid_moves.append((dr, dc))
+            
+            if valid_moves:
+                dr, dc = self.rng.choice(valid_moves)
+                self.move_empty(dr, dc)
+    
+    def move_empty(self, dr, dc):
+        # 交换空白格子和相邻格子
+        self.puzzle[self.empty_row][self.empty_col] = self.puzzle[self.empty_row + dr][self.empty_col + dc]
+        self.puzzle[self.empty_row + dr][self.empty_col + dc] = 0
+        # 更新空白格子位置
+        self.empty_row += dr
+        self.empty_col += dc
+    
+    def slide_tile(self, row, col):
+        # 玩家把(row, col)处的方块移入相邻的空白格子，并记入历史
+        dr, dc = row - self.empty_row, col - self.empty_col
+        self.move_empty(dr, dc)
+        self.moves += 1
+        self.history.push(bytes([self.DIRECTIONS.index((dr, dc))]))
+    
+    def undo(self):
+        record = self.history.undo()
+        if record is None:
+            return False
+        dr, dc = self.DIRECTIONS[record[0]]
+        self.move_empty(-dr, -dc)
+        self.moves -= 1
+        self.game_over = False
+        return True
+    
+    def redo(self):
+        record = self.history.redo()
+        if record is None:
+            return False
+        dr, dc = self.DIRECTIONS[record[0]]
+        self.move_empty(dr, dc)
+        self.moves += 1
+        return True
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_z:
+            # 任何状态下都可以撤销和重做
+            self.undo()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_y:
+            self.redo()
+        elif self.game_over:
+            # 游戏结束状态下的按键处理
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
+                    self.reset()
+        else:
+            # 游戏进行中的事件处理
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                # 鼠标点击
+                x, y = event.pos
+                row = (y - self.puzzle_start_y) // self.cell_size
+                col = (x - self.puzzle_start_x) // self.cell_size
+                
+                # 检查是否点击在拼图范围内
+                if 0 <= row < self.size and 0 <= col < self.size:
+                    # 检查是否与空白格子相邻
+                    if (abs(row - self.empty_row) == 1 and col == self.empty_col) or \
+                       (abs(col - self.empty_col) == 1 and row == self.empty_row):
+                        self.slide_tile(row, col)
+            elif event.type == pygame.KEYDOWN:
+                # 键盘控制
+                row, col = self.empty_row, self.empty_col
+                if event.key == pygame.K_UP and row < self.size - 1:
+                    row += 1
+                elif event.key == pygame.K_DOWN and row > 0:
+                    row -= 1
+                elif event.key == pygame.K_LEFT and col < self.size - 1:
+                    col += 1
+                elif event.key == pygame.K_RIGHT and col > 0:
+                    col -= 1
+                
+                if (row, col) != (self.empty_row, self.empty_col):
+                    self.slide_tile(row, col)
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 检查是否完成
+        if not self.game_over and self.check_win():
+            self.game_over = True
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def check_win(self):
+        # 检查是否按顺序排列
+        for i in range(self.size):
+            for j in range(self.size):
+                if i == self.size - 1 and j == self.size - 1:
+                    # 最后一个格子应该是0
+                    if self.puzzle[i][j] != 0:
+                        return False
+                else:
+                    # 其他格子应该按顺序排列
+                    if self.puzzle[i][j] != i * self.size + j + 1:
+                        return False
+        return True
+    
+    def draw(self):
+        screen.fill(BLACK)
+        
+        # 绘制拼图
+        for i in range(self.size):
+            for j in range(self.size):
+                value = self.puzzle[i][j]
+                x = self.puzzle_start_x + j * self.cell_size
+                y = self.puzzle_start_y + i * self.cell_size
+                
+                if value != 0:
+                    # 绘制数字方块
+                    pygame.draw.rect(screen, BLUE, (x, y, self.cell_size - 2, self.cell_size - 2))
+                    text = game_font.render(str(value), True, WHITE)
+                    text_rect = text.get_rect(center=(x + self.cell_size // 2, y + self.cell_size // 2))
+                    screen.blit(text, text_rect)
+                else:
+                    # 绘制空白格子
+                    pygame.draw.rect(screen, (50, 50, 50), (x, y, self.cell_size - 2, self.cell_size - 2))
+        
+        # 显示移动次数
+        self.moves_label.set_text(f"步数: {self.moves}")
+        self.moves_label.draw(screen)
+        
+        # 显示提示
+        self.hint_label.draw(screen)
+    
+    def show_game_over(self):
+        # 半透明覆盖层
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))  # 半透明黑色
+        screen.blit(overlay, (0, 0))
+        
+        win_text = game_font.render("恭喜你完成拼图！", True, GREEN)
+        moves_text = game_font.render(f"总步数: {self.moves}", True, WHITE)
+        retry_text = game_font.render("按R重试，按ESC返回", True, WHITE)
+        
+        screen.blit(win_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 - 80))
+        screen.blit(moves_text, (SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT//2 - 20))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 40))
@@ -0,0 +1,61 @@
+"""游戏注册表
+
+每个游戏在这里声明标题、所在模块、类名和能力，菜单只需要这些信息。
+游戏模块在第一次被选中时才导入，启动时不加载任何游戏的代码，
+增加游戏也不会让第一帧变慢。
+
+能力：
+    rewind  按住退格键倒带
+    undo    Z/Y 撤销和重做
+    ai      有电脑AI（提示、自动游戏或电脑对手）
+    mouse   需要鼠标点击
+"""
+import importlib
+
+
+class GameInfo:
+    """一个游戏的声明，factory 为模块中的类名，用 create(seed) 创建实例"""
+
+    def __init__(self, title, module, factory, capabilities=()):
+        self.title = title
+        self.module = module
+        self.factory = factory
+        self.capabilities = frozenset(capabilities)
+
+    def load(self):
+        """导入游戏模块（已导入过时直接从 sys.modules 取得），返回游戏类"""
+        return getattr(importlib.import_module(self.module), self.factory)
+
+    def create(self, seed=None):
+        return self.load()(seed=seed)
+
+    def supports(self, capability):
+        return capability in self.capabilities
+
+
+GAMES = []
+
+
+def register(title, module, factory, capabilities=()):
+    """声明一个游戏，按注册顺序显示在菜单中；游戏编号用于存档和回放，只能在末尾添加"""
+    info = GameInfo(title, module, factory, capabilities)
+    GAMES.append(info)
+    return info
+
+
+def find(title):
+    """按标题查找游戏，返回编号，找不到时返回None"""
+    for index, info in enumerate(GAMES):
+        if info.title == title:
+            return index
+    return None
+
+
+register("贪吃蛇", "game_snake", "SnakeGame", ("rewind",))
+register("打砖块", "game_breakout", "BreakoutGame", ("rewind",))
+register("乒乓球", "game_pong", "PongGame", ("rewind", "ai"))
+register("俄罗斯方块", "game_tetris", "TetrisGame", ("rewind",))
+register("井字棋", "game_tictactoe", "TicTacToeGame", ("ai", "mouse"))
+register("数字拼图", "game_puzzle", "PuzzleGame", ("undo", "mouse"))
+register("2048", "game_2048", "Game2048", ("undo", "ai"))
+register("猜数字", "game_guess", "GuessNumberGame")
@@ -0,0 +1,223 @@
+"""贪吃蛇"""
+import pygame
+import random
+import struct
+from array import array
+from itertools import chain
+
+from rewind import RewindBuffer
+from ui import Panel, Label
+from particles import ParticleSystem
+from game_common import (
+    screen, render_text, get_gradient, warm_texts, SCREEN_WIDTH, SCREEN_HEIGHT, FPS,
+    REWIND_MAX_BYTES, WHITE, RED, YELLOW, rewind_step)
+
+
+class SnakeGame:
+    DIRECTIONS = ["UP", "DOWN", "LEFT", "RIGHT"]
+    # 菜单空闲时预热的固定文本
+    WARM_TEXTS = [("方向键控制蛇的移动", WHITE, 24), ("游戏结束！", RED, 48),
+                  ("按R重新开始，按ESC返回", WHITE, 28)]
+    # 背景渐变：底部颜色和顶部颜色
+    BACKGROUND = ((30, 50, 20), (10, 30, 10))
+    
+    @classmethod
+    def warm_up(cls):
+        """分帧预热背景和固定文本"""
+        get_gradient(*cls.BACKGROUND)
+        yield
+        yield from warm_texts(cls.WARM_TEXTS)
+    
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.rewind_buffer = RewindBuffer(REWIND_MAX_BYTES, FPS)
+        self.particles = ParticleSystem(seed=seed)
+        # 信息栏：分数和控制提示，分数改变时才重画
+        self.score_label = Label("分数: 0", YELLOW, 32, (20, 20))
+        self.info_bar = Panel((0, SCREEN_HEIGHT - 80, SCREEN_WIDTH, 80), color=(50, 50, 50), border=(80, 80, 80),
+                              children=(self.score_label, Label("方向键控制蛇的移动", WHITE, 24, (SCREEN_WIDTH - 300, 20))))
+        self.reset()
+    
+    def reset(self):
+        # 重新开始后不能倒带回上一局
+        self.rewind_buffer.clear()
+        self.snake = [(100, 100), (90, 100), (80, 100)]
+        # 蛇身坐标的紧凑副本（int16），随蛇身增量更新，用于快速生成倒带快照
+        self.snake_data = bytearray(array("h", chain.from_iterable(self.snake)).tobytes())
+        self.snake_dir = "RIGHT"
+        self.next_dir = "RIGHT"
+        self.food = (300, 300)
+        self.generate_food()
+        self.score = 0
+        self.game_over = False
+    
+    def generate_food(self):
+        self.food = (self.rng.randint(1, (SCREEN_WIDTH-20)//10) * 10, 
+                    self.rng.randint(1, (SCREEN_HEIGHT-20)//10) * 10)
+        if self.food in self.snake:
+            self.generate_food()
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        if event.type == pygame.KEYDOWN:
+            if self.game_over:
+                # 游戏结束状态下的按键处理
+                if event.key == pygame.K_r:
+                    self.reset()
+            else:
+                # 游戏进行中的按键处理
+                if event.key == pygame.K_UP and self.snake_dir != "DOWN":
+                    self.next_dir = "UP"
+                elif event.key == pygame.K_DOWN and self.snake_dir != "UP":
+                    self.next_dir = "DOWN"
+                elif event.key == pygame.K_LEFT and self.snake_dir != "RIGHT":
+                    self.next_dir = "LEFT"
+                elif event.key == pygame.K_RIGHT and self.snake_dir != "LEFT":
+                    self.next_dir = "RIGHT"
+    
+    def pack_state(self):
+        # 倒带快照：方向、食物、分数、状态，后面是蛇身坐标（int16）
+        header = struct.pack("<BBhhIB", self.DIRECTIONS.index(self.snake_dir),
+                             self.DIRECTIONS.index(self.next_dir),
+                             self.food[0], self.food[1], self.score, self.game_over)
+        return header + self.snake_data
+    
+    def load_state(self, data):
+        snake_dir, next_dir, food_x, food_y, self.score, game_over = struct.unpack_from("<BBhhIB", data)
+        self.snake_dir = self.DIRECTIONS[snake_dir]
+        self.next_dir = self.DIRECTIONS[next_dir]
+        self.food = (food_x, food_y)
+        self.game_over = bool(game_over)
+        self.snake_data = bytearray(data[struct.calcsize("<BBhhIB"):])
+        coords = array("h")
+        coords.frombytes(self.snake_data)
+        self.snake = list(zip(coords[::2], coords[1::2]))
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 粒子在更新中前进，绘制时只画出来
+        self.particles.update()
+        
+        # 按住退格键倒带
+        if rewind_step(self):
+            return
+        
+        if not self.game_over:
+            self.step()
+            self.rewind_buffer.record(self.pack_state())
+    
+    def step(self):
+        """蛇移动一格，不包括倒带记录"""
+        # 更新方向
+        self.snake_dir = self.next_dir
+        
+        # 移动蛇
+        head_x, head_y = self.snake[0]
+        if self.snake_dir == "UP":
+            head_y -= 10
+        elif self.snake_dir == "DOWN":
+            head_y += 10
+        elif self.snake_dir == "LEFT":
+            head_x -= 10
+        elif self.snake_dir == "RIGHT":
+            head_x += 10
+        
+        # 检查边界碰撞
+        if head_x < 0 or head_x >= SCREEN_WIDTH or head_y < 0 or head_y >= SCREEN_HEIGHT:
+            self.game_over = True
+        
+        # 检查自身碰撞
+        if (head_x, head_y) in self.snake[1:]:
+            self.game_over = True
+        
+        # 更新蛇身
+        self.snake.insert(0, (head_x, head_y))
+        self.snake_data[0:0] = struct.pack("<hh", head_x, head_y)
+        
+        # 检查食物
+        if (head_x, head_y) == self.food:
+            self.score += 10
+            self.particles.emit(head_x, head_y, 30, (255, 80, 40), speed=(1, 3), life=(15, 30),
+                                width=10, height=10)
+            self.generate_food()
+        else:
+            self.snake.pop()
+            del self.snake_data[-4:]
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def draw(self):
+        # 渐变背景只绘制一次
+        screen.blit(get_gradient(*self.BACKGROUND), (0, 0))
+        
+        # 绘制游戏区域边框
+        game_area = pygame.Rect(5, 5, SCREEN_WIDTH - 10, SCREEN_HEIGHT - 90)
+        pygame.draw.rect(screen, (50, 100, 50), game_area, 2)
+        
+        # 绘制蛇身
+        for segment in self.snake[1:]:
+            pygame.draw.rect(screen, (30, 200, 30), (segment[0], segment[1], 10, 10), 0, 2)
+        
+        # 绘制头部（带眼睛效果）
+        pygame.draw.rect(screen, (255, 215, 0), (self.snake[0][0], self.snake[0][1], 10, 10), 0, 2)
+        # 眼睛
+        eye_size = 2
+        if self.snake_dir == "RIGHT":
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 7, self.snake[0][1] + 3), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 7, self.snake[0][1] + 7), eye_size)
+        elif self.snake_dir == "LEFT":
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 3, self.snake[0][1] + 3), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 3, self.snake[0][1] + 7), eye_size)
+        elif self.snake_dir == "UP":
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 3, self.snake[0][1] + 3), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 7, self.snake[0][1] + 3), eye_size)
+        elif self.snake_dir == "DOWN":
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 3, self.snake[0][1] + 7), eye_size)
+            pygame.draw.circle(screen, (0, 0, 0), (self.snake[0][0] + 7, self.snake[0][1] + 7), eye_size)
+        
+        # 绘制食物（苹果样式）
+        pygame.draw.rect(screen, (255, 0, 0), (self.food[0], self.food[1], 10, 10), 0, 5)
+        # 食物顶部叶子
+        pygame.draw.polygon(screen, (0, 255, 0), [(self.food[0]+5, self.food[1]), 
+                                                (self.food[0]+8, self.food[1]-3), 
+                                                (self.food[0]+2, self.food[1]-3)])
+        
+        self.particles.draw(screen)
+        
+        # 绘制信息栏
+        self.score_label.set_text(f"分数: {self.score}")
+        self.info_bar.draw(screen)
+    
+    def show_game_over(self):
+        # 创建半透明遮罩
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))
+        screen.blit(overlay, (0, 0))
+        
+        # 创建游戏结束面板
+        game_over_panel = pygame.Rect(SCREEN_WIDTH//2 - 200, SCREEN_HEIGHT//2 - 150, 400, 300)
+        pygame.draw.rect(screen, (80, 30, 30), game_over_panel, 0, 10)
+        pygame.draw.rect(screen, (150, 50, 50), game_over_panel, 2, 10)
+        
+        # 绘制游戏结束文本
+        game_over_text = render_text("游戏结束！", RED, 48)
+        game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 80))
+        screen.blit(game_over_text, game_over_rect)
+        
+        # 绘制最终分数
+        final_score = render_text(f"最终分数: {self.score}", YELLOW, 36)
+        final_score_rect = final_score.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 10))
+        screen.blit(final_score, final_score_rect)
+        
+        # 绘制重新开始提示
+        restart_text = render_text("按R重新开始，按ESC返回", WHITE, 28)
+        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 70))
+        screen.blit(restart_text, restart_rect)
@@ -0,0 +1,416 @@
+"""俄罗斯方块（简化版）"""
+import pygame
+import random
+import struct
+from itertools import chain
+
+from rewind import RewindBuffer
+from history import pack_cells, unpack_cells
+from ui import Label
+from particles import ParticleSystem
+from game_common import (
+    screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, REWIND_MAX_BYTES,
+    WHITE, BLACK, RED, GREEN, BLUE, YELLOW, sim_clock, key_state, rewind_step)
+
+
+class TetrisGame:
+    # 左右移动的自动重复（毫秒）：按下时立即移动一格，按住超过 DAS_MS 后每 ARR_MS 移动一格
+    DAS_MS = 170
+    ARR_MS = 50
+    # 按住下方向键时每 SOFT_DROP_MS 下落一格
+    SOFT_DROP_MS = 50
+    SHIFT_KEYS = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1}
+    # 计时用的时钟和按键状态；对战模式中每个棋盘使用自己的（见 versus_tetris）。
+    # 时钟是按tick推进的模拟时钟而不是真实时间：计时精度为 1000/FPS 毫秒，
+    # 真实帧率下降时游戏整体变慢，但回放和锁步对战能逐tick重现同样的移动
+    clock = sim_clock
+    keys = key_state
+    
+    def __init__(self, seed=None, effects=True):
+        self.rng = random.Random(seed)
+        self.rewind_buffer = RewindBuffer(REWIND_MAX_BYTES, FPS)
+        # 不显示的棋盘（观战墙、对战测试）不创建粒子系统
+        self.particles = ParticleSystem(gravity=0.1, seed=seed) if effects else None
+        self.score_label = Label("分数: 0", WHITE, None, (20, 20))
+        self.level_label = Label("等级: 1", WHITE, None, (20, 60))
+        self.next_label = Label("下一个:", WHITE, None, (SCREEN_WIDTH - 150, 20))
+        self.reset()
+    
+    def reset(self):
+        # 重新开始后不能倒带回上一局
+        self.rewind_buffer.clear()
+        self.board_width = 10
+        self.board_height = 20
+        self.cell_size = 30
+        
+        # 计算游戏区域位置（居中）
+        self.board_x = (SCREEN_WIDTH - self.board_width * self.cell_size) // 2
+        self.board_y = 50
+        
+        # 创建空白棋盘
+        self.board = [[0 for _ in range(self.board_width)] for _ in range(self.board_height)]
+        
+        # 定义方块形状
+        self.shapes = [
+            [[1, 1, 1, 1]],  # I
+            [[1, 1], [1, 1]],  # O
+            [[1, 1, 1], [0, 1, 0]],  # T
+            [[1, 1, 1], [1, 0, 0]],  # L
+            [[1, 1, 1], [0, 0, 1]],  # J
+            [[0, 1, 1], [1, 1, 0]],  # S
+            [[1, 1, 0], [0, 1, 1]]   # Z
+        ]
+        
+        # 定义额外的颜色
+        self.CYAN = (0, 255, 255)
+        self.MAGENTA = (255, 0, 255)
+        self.ORANGE = (255, 165, 0)
+        
+        # 方块颜色
+        self.colors = [WHITE, RED, GREEN, BLUE, self.CYAN, self.MAGENTA, YELLOW, self.ORANGE]
+        
+        self.current_piece = self.new_piece()
+        self.next_piece = self.new_piece()
+        self.game_over = False
+        self.score = 0
+        self.level = 1
+        self.fall_speed = 1.0  # 每秒下落一次
+        self.last_fall_time = self.clock.get_ticks()
+        
+        # 左右自动重复的方向和下一次移动的时间，软降下一次下落的时间
+        self.shift_dir = 0
+        self.shift_next = 0
+        self.drop_next = 0
+    
+    def new_piece(self):
+        shape_idx = self.rng.randint(0, len(self.shapes) - 1)
+        shape = self.shapes[shape_idx]
+        color_idx = shape_idx + 1  # 0 是空白颜色
+        
+        # 初始位置
+        x = self.board_width // 2 - len(shape[0]) // 2
+        y = 0
+        
+        return {
+            'shape': shape,
+            'color': color_idx,
+            'x': x,
+            'y': y
+        }
+    
+    @staticmethod
+    def pack_piece(piece):
+        # 方块：颜色、位置、形状的行列数和形状位图
+        shape = piece['shape']
+        mask = 0
+        for index, cell in enumerate(chain.from_iterable(shape)):
+            if cell:
+                mask |= 1 << index
+        return struct.pack("<BbbBBH", piece['color'], piece['x'], piece['y'],
+                           len(shape), len(shape[0]), mask)
+    
+    @staticmethod
+    def unpack_piece(data, offset=0):
+        color, x, y, rows, cols, mask = struct.unpack_from("<BbbBBH", data, offset)
+        shape = [[(mask >> (i * cols + j)) & 1 for j in range(cols)] for i in range(rows)]
+        return {'shape': shape, 'color': color, 'x': x, 'y': y}
+    
+    def pack_state(self):
+        # 倒带快照：分数、等级、距上次下落的时间、状态、两个方块和棋盘（每格4位）
+        elapsed = max(0, self.clock.get_ticks() - self.last_fall_time)
+        return struct.pack("<IHIB", self.score, self.level, elapsed, self.game_over) + \
+            self.pack_piece(self.current_piece) + self.pack_piece(self.next_piece) + \
+            pack_cells(list(chain.from_iterable(self.board)), 4)
+    
+    def load_state(self, data):
+        self.score, self.level, elapsed, game_over = struct.unpack_from("<IHIB", data)
+        self.game_over = bool(game_over)
+        self.fall_speed = 1.0 + (self.level - 1) * 0.2
+        self.last_fall_time = self.clock.get_ticks() - elapsed
+        offset = struct.calcsize("<IHIB")
+        piece_size = struct.calcsize("<BbbBBH")
+        self.current_piece = self.unpack_piece(data, offset)
+        self.next_piece = self.unpack_piece(data, offset + piece_size)
+        cells = unpack_cells(data[offset + 2 * piece_size:], self.board_width * self.board_height, 4)
+        self.board = [cells[i * self.board_width:(i + 1) * self.board_width]
+                      for i in range(self.board_height)]
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 按住退格键倒带
+        if rewind_step(self):
+            return
+        
+        if self.game_over:
+            return
+        
+        self.step()
+        self.rewind_buffer.record(self.pack_state())
+    
+    def step(self):
+        """前进一帧：粒子、处理按住的键和自动下落"""
+        # 粒子在更新中前进，绘制时只画出来
+        if self.particles is not None:
+            self.particles.update()
+        if self.game_over:
+            return
+        
+        # 处理输入
+        self.handle_input()
+        
+        # 自动下落
+        current_time = self.clock.get_ticks()
+        if current_time - self.last_fall_time > (1000 / self.fall_speed):
+            if not self.move(0, 1):
+                self.lock_piece()
+                self.burst_full_rows()
+                self.clear_lines()
+                self.spawn_new_piece()
+            self.last_fall_time = current_time
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def handle_input(self):
+        # 按住的键按时间自动重复，一帧内可能移动多格
+        now = self.clock.get_ticks()
+        if self.shift_dir:
+            while now >= self.shift_next:
+                if not self.move(self.shift_dir, 0):
+                    # 被挡住时保持蓄力，但计时器不能落后，否则让开后会一次补走多格
+                    self.shift_next = now + self.ARR_MS
+                    break
+                self.shift_next += self.ARR_MS
+        if self.keys[pygame.K_DOWN]:
+            while now >= self.drop_next:
+                if not self.move(0, 1):
+                    self.drop_next = now + self.SOFT_DROP_MS
+                    break
+                self.score += 1
+                self.drop_next += self.SOFT_DROP_MS
+    
+    def suspend(self):
+        # 挂起或失去焦点：按键状态已清空，停止自动重复
+        self.shift_dir = 0
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        now = self.clock.get_ticks()
+        if event.type == pygame.WINDOWFOCUSLOST:
+            # 失去焦点后收不到KEYUP，停止自动重复
+            self.suspend()
+            return
+        if event.type == pygame.KEYUP:
+            if self.SHIFT_KEYS.get(event.key) == self.shift_dir:
+                # 松开当前方向时，如果另一个方向键还按着就改为那个方向
+                self.shift_dir = 0
+                for key, direction in self.SHIFT_KEYS.items():
+                    if self.keys[key]:
+                        self.shift_dir = direction
+                        self.shift_next = now + self.DAS_MS
+            return
+        if event.type != pygame.KEYDOWN:
+            return
+        if self.game_over:
+            if event.key == pygame.K_r:
+                self.reset()
+        elif event.key in self.SHIFT_KEYS:
+            # 按下时立即移动一格，之后等待 DAS_MS 再自动重复
+            self.shift_dir = self.SHIFT_KEYS[event.key]
+            self.shift_next = now + self.DAS_MS
+            self.move(self.shift_dir, 0)
+        elif event.key == pygame.K_UP:
+            # 旋转只在按下时触发一次
+            self.rotate()
+        elif event.key == pygame.K_DOWN:
+            if self.move(0, 1):
+                self.score += 1
+            self.drop_next = now + self.SOFT_DROP_MS
+        elif event.key == pygame.K_SPACE:
+            # 硬降
+            while self.move(0, 1):
+                self.score += 2
+    
+    def move(self, dx, dy):
+        self.current_piece['x'] += dx
+        self.current_piece['y'] += dy
+        
+        if self.check_collision():
+            self.current_piece['x'] -= dx
+            self.current_piece['y'] -= dy
+            return False
+        
+        return True
+    
+    def rotate(self):
+        # 旋转形状
+        shape = self.current_piece['shape']
+        rows, cols = len(shape), len(shape[0])
+        rotated = [[shape[rows-j-1][i] for j in range(rows)] for i in range(cols)]
+        
+        old_shape = self.current_piece['shape']
+        self.current_piece['shape'] = rotated
+        
+        if self.check_collision():
+            # 如果旋转后碰撞，恢复原形状
+            self.current_piece['shape'] = old_shape
+    
+    def check_collision(self):
+        shape = self.current_piece['shape']
+        x, y = self.current_piece['x'], self.current_piece['y']
+        
+        for i in range(len(shape)):
+            for j in range(len(shape[i])):
+                if shape[i][j] == 0:
+                    continue
+                
+                # 检查边界
+                if (x + j < 0 or x + j >= self.board_width or
+                    y + i >= self.board_height):
+                    return True
+                
+                # 检查与已有方块的碰撞
+                if y + i >= 0 and self.board[y + i][x + j] != 0:
+                    return True
+        
+        return False
+    
+    def burst_full_rows(self):
+        # 即将消除的行：每个格子发射它颜色的粒子
+        if self.particles is None:
+            return
+        for i, row in enumerate(self.board):
+            if all(row):
+                y = self.board_y + i * self.cell_size
+                for j, cell in enumerate(row):
+                    self.particles.emit(self.board_x + j * self.cell_size, y, 12, self.colors[cell],
+                                        speed=(0.5, 3), life=(20, 40),
+                                        width=self.cell_size, height=self.cell_size)
+    
+    def lock_piece(self):
+        shape = self.current_piece['shape']
+        x, y = self.current_piece['x'], self.current_piece['y']
+        color = self.current_piece['color']
+        
+        for i in range(len(shape)):
+            for j in range(len(shape[i])):
+                if shape[i][j] == 0:
+                    continue
+                
+                if y + i >= 0:
+                    self.board[y + i][x + j] = color
+    
+    def clear_lines(self):
+        """消除所有满行，返回消除的行数"""
+        lines_cleared = 0
+        i = self.board_height - 1
+        
+        while i >= 0:
+            if all(cell != 0 for cell in self.board[i]):
+                # 移除当前行
+                del self.board[i]
+                # 在顶部添加新行
+                self.board.insert(0, [0 for _ in range(self.board_width)])
+                lines_cleared += 1
+            else:
+                i -= 1
+        
+        # 计算得分
+        if lines_cleared > 0:
+            self.score += lines_cleared * lines_cleared * 100
+            # 更新等级
+            self.level = self.score // 1000 + 1
+            self.fall_speed = 1.0 + (self.level - 1) * 0.2
+        return lines_cleared
+    
+    def spawn_new_piece(self):
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+        # 新方块重新计时，按住的键每帧最多补一步
+        now = self.clock.get_ticks()
+        self.shift_next = now + self.ARR_MS
+        self.drop_next = now + self.SOFT_DROP_MS
+        
+        # 检查游戏是否结束
+        if self.check_collision():
+            self.game_over = True
+    
+    def draw(self):
+        screen.fill(BLACK)
+        self.draw_board()
+        
+        # 绘制分数和等级
+        self.score_label.set_text(f"分数: {self.score}")
+        self.level_label.set_text(f"等级: {self.level}")
+        self.score_label.draw(screen)
+        self.level_label.draw(screen)
+        
+        # 绘制下一个方块预览
+        self.next_label.draw(screen)
+        self.draw_preview(SCREEN_WIDTH - 150, 60)
+    
+    def draw_board(self):
+        """绘制边框、棋盘、当前方块和粒子"""
+        # 绘制边界
+        pygame.draw.rect(screen, WHITE, 
+                        (self.board_x - 2, self.board_y - 2, 
+                        self.board_width * self.cell_size + 4, 
+                        self.board_height * self.cell_size + 4), 2)
+        
+        # 绘制棋盘
+        for i in range(self.board_height):
+            for j in range(self.board_width):
+                if self.board[i][j] != 0:
+                    color = self.colors[self.board[i][j]]
+                    pygame.draw.rect(screen, color, 
+                                    (self.board_x + j * self.cell_size, 
+                                    self.board_y + i * self.cell_size, 
+                                    self.cell_size - 1, self.cell_size - 1))
+        
+        # 绘制当前方块
+        shape = self.current_piece['shape']
+        x, y = self.current_piece['x'], self.current_piece['y']
+        color = self.colors[self.current_piece['color']]
+        
+        for i in range(len(shape)):
+            for j in range(len(shape[i])):
+                if shape[i][j] != 0 and y + i >= 0:
+                    pygame.draw.rect(screen, color, 
+                                    (self.board_x + (x + j) * self.cell_size, 
+                                    self.board_y + (y + i) * self.cell_size, 
+                                    self.cell_size - 1, self.cell_size - 1))
+        
+        if self.particles is not None:
+            self.particles.draw(screen)
+    
+    def draw_preview(self, preview_x, preview_y):
+        """在 (preview_x, preview_y) 绘制下一个方块"""
+        next_shape = self.next_piece['shape']
+        next_color = self.colors[self.next_piece['color']]
+        
+        for i in range(len(next_shape)):
+            for j in range(len(next_shape[i])):
+                if next_shape[i][j] != 0:
+                    pygame.draw.rect(screen, next_color, 
+                                    (preview_x + (j * self.cell_size), 
+                                    preview_y + (i * self.cell_size), 
+                                    self.cell_size - 1, self.cell_size - 1))
+    
+    def show_game_over(self):
+        screen.fill(BLACK)
+        game_over_text = game_font.render("游戏结束！", True, RED)
+        score_text = game_font.render(f"最终分数: {self.score}", True, WHITE)
+        level_text = game_font.render(f"达到等级: {self.level}", True, WHITE)
+        retry_text = game_font.render("按R重试，按ESC返回", True, WHITE)
+        
+        screen.blit(game_over_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 - 80))
+        screen.blit(score_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 - 30))
+        screen.blit(level_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 20))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 80))
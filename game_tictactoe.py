@@ -0,0 +1,222 @@
+"""井字棋：与电脑对战，电脑的落子在后台计算"""
+import pygame
+import random
+import struct
+from itertools import chain
+
+from history import pack_cells, unpack_cells
+from ui import Label
+from game_common import (
+    screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, RED, GREEN,
+    BLUE, YELLOW, ai_scheduler, submit_ai, poll_ai, draw_thinking, THINKING_TEXTS)
+
+
+class TicTacToeGame:
+    # 菜单空闲时预热的固定文本
+    WARM_TEXTS = THINKING_TEXTS
+    
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.turn_label = Label("你的回合 (X)", WHITE, None, (SCREEN_WIDTH // 2 - 100, 50))
+        self.reset()
+    
+    def reset(self):
+        self.board = [[0 for _ in range(3)] for _ in range(3)]  # 0: 空, 1: X, 2: O
+        self.current_player = 1  # 1: 玩家, 2: AI
+        self.game_over = False
+        self.winner = 0
+        # 电脑的落子在后台计算，ai_task 为正在进行的搜索
+        self.cancel_ai()
+        self.cell_size = 150
+        self.board_start_x = (SCREEN_WIDTH - self.cell_size * 3) // 2
+        self.board_start_y = (SCREEN_HEIGHT - self.cell_size * 3) // 2
+    
+    def pack_state(self):
+        # 存档：当前玩家、状态、胜者和棋盘（每格2位）
+        return struct.pack("<BBB", self.current_player, self.game_over, self.winner) + \
+            pack_cells(list(chain.from_iterable(self.board)), 2)
+    
+    def load_state(self, data):
+        self.current_player, game_over, self.winner = struct.unpack_from("<BBB", data)
+        self.game_over = bool(game_over)
+        cells = unpack_cells(data[3:], 9, 2)
+        self.board = [cells[i * 3:(i + 1) * 3] for i in range(3)]
+        self.cancel_ai()
+    
+    def cancel_ai(self):
+        ai_scheduler.cancel(self)
+        self.ai_task = None
+    
+    def suspend(self):
+        # 返回菜单时挂起：停止后台搜索，恢复后重新提交
+        self.cancel_ai()
+    
+    def handle_event(self, event):
+        """处理单个事件，由GameManager传递"""
+        if self.game_over:
+            # 游戏结束状态下的按键处理
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
+                    self.reset()
+        else:
+            # 游戏进行中的事件处理
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if self.current_player == 1:
+                    x, y = event.pos
+                    col = (x - self.board_start_x) // self.cell_size
+                    row = (y - self.board_start_y) // self.cell_size
+                    
+                    if 0 <= row < 3 and 0 <= col < 3 and self.board[row][col] == 0:
+                        self.board[row][col] = 1
+                        self.current_player = 2
+    
+    def run(self):
+        self.update()
+        self.render()
+    
+    def update(self):
+        # 如果游戏未结束且轮到AI回合：提交搜索，完成后落子
+        if not self.game_over and self.current_player == 2:
+            if self.ai_task is None:
+                self.ai_task = submit_ai(self, self.choose_cell, [row[:] for row in self.board])
+                return
+            # 格子编号为 行*3+列，9 表示没有空位
+            cell = poll_ai(self.ai_task, lambda cell: 9 if cell is None else cell)
+            if cell is None:
+                return
+            self.ai_task = None
+            self.place_ai(cell if cell < 9 else None)
+            self.check_game_state()
+    
+    def render(self):
+        # 绘制游戏
+        if self.game_over:
+            self.show_game_over()
+        else:
+            self.draw()
+    
+    def ai_move(self):
+        # 同步计算并落子
+        self.place_ai(self.choose_cell(self.board))
+    
+    def place_ai(self, cell):
+        # 电脑在 cell（行*3+列）落子后轮到玩家
+        if cell is not None:
+            i, j = divmod(cell, 3)
+            self.board[i][j] = 2
+        self.current_player = 1
+    
+    @classmethod
+    def choose_cell(cls, board, token=None):
+        # 简单的AI逻辑：优先赢，然后阻止玩家赢，否则选第一个空位；返回格子编号
+        # 可以在后台线程中运行，只修改传入的棋盘副本
+        board = [row[:] for row in board]
+        empty = [(i, j) for i in range(3) for j in range(3) if board[i][j] == 0]
+        # 先检查是否有获胜机会，再检查是否需要阻止玩家获胜
+        for player in (2, 1):
+            for i, j in empty:
+                board[i][j] = player
+                won = cls.board_winner(board, player)
+                board[i][j] = 0
+                if won:
+                    return i * 3 + j
+        if empty:
+            i, j = empty[0]
+            return i * 3 + j
+        return None
+    
+    def check_game_state(self):
+        # 检查玩家胜利
+        if self.check_winner(1):
+            self.winner = 1
+            self.game_over = True
+        # 检查AI胜利
+        elif self.check_winner(2):
+            self.winner = 2
+            self.game_over = True
+        # 检查平局
+        elif all(self.board[i][j] != 0 for i in range(3) for j in range(3)):
+            self.winner = 0
+            self.game_over = True
+    
+    def check_winner(self, player):
+        return self.board_winner(self.board, player)
+    
+    @staticmethod
+    def board_winner(board, player):
+        # 检查行
+        for i in range(3):
+            if all(board[i][j] == player for j in range(3)):
+                return True
+        # 检查列
+        for j in range(3):
+            if all(board[i][j] == player for i in range(3)):
+                return True
+        # 检查对角线
+        if all(board[i][i] == player for i in range(3)) or all(board[i][2-i] == player for i in range(3)):
+            return True
+        return False
+    
+    def draw(self):
+        screen.fill(BLACK)
+        
+        # 绘制棋盘
+        for i in range(1, 3):
+            # 横线
+            pygame.draw.line(screen, WHITE, 
+                            (self.board_start_x, self.board_start_y + i * self.cell_size),
+                            (self.board_start_x + 3 * self.cell_size, self.board_start_y + i * self.cell_size),
+                            3)
+            # 竖线
+            pygame.draw.line(screen, WHITE, 
+                            (self.board_start_x + i * self.cell_size, self.board_start_y),
+                            (self.board_start_x + i * self.cell_size, self.board_start_y + 3 * self.cell_size),
+                            3)
+        
+        # 绘制棋子
+        for i in range(3):
+            for j in range(3):
+                if self.board[i][j] == 1:  # X
+                    pygame.draw.line(screen, RED, 
+                                    (self.board_start_x + j * self.cell_size + 30, 
+                                    self.board_start_y + i * self.cell_size + 30),
+                                    (self.board_start_x + (j+1) * self.cell_size - 30, 
+                                    self.board_start_y + (i+1) * self.cell_size - 30),
+                                    5)
+                    pygame.draw.line(screen, RED, 
+                                    (self.board_start_x + (j+1) * self.cell_size - 30, 
+                                    self.board_start_y + i * self.cell_size + 30),
+                                    (self.board_start_x + j * self.cell_size + 30, 
+                                    self.board_start_y + (i+1) * self.cell_size - 30),
+                                    5)
+                elif self.board[i][j] == 2:  # O
+                    pygame.draw.circle(screen, BLUE, 
+                                    (self.board_start_x + j * self.cell_size + self.cell_size // 2, 
+                                    self.board_start_y + i * self.cell_size + self.cell_size // 2),
+                                    self.cell_size // 2 - 30,
+                                    5)
+        
+        # 显示当前玩家
+        if not self.game_over:
+            self.turn_label.set_text("你的回合 (X)" if self.current_player == 1 else "电脑回合 (O)")
+            self.turn_label.draw(screen)
+            if self.ai_task is not None:
+                draw_thinking((SCREEN_WIDTH // 2 - 60, 100))
+    
+    def show_game_over(self):
+        # 半透明覆盖层
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 180))  # 半透明黑色
+        screen.blit(overlay, (0, 0))
+        
+        if self.winner == 1:
+            result_text = game_font.render("你赢了！", True, GREEN)
+        elif self.winner == 2:
+            result_text = game_font.render("电脑赢了！", True, RED)
+        else:
+            result_text = game_font.render("平局！", True, YELLOW)
+        
+        retry_text = game_font.render("按R重试，按ESC返回", True, WHITE)
+        
+        screen.blit(result_text, (SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT//2 - 50))
+        screen.blit(retry_text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 50))
@@ -0,0 +1,97 @@
+"""紧凑的撤销/重做历史
+
+每一步保存为定长的字节记录，所有记录放在一个 bytearray 环形缓冲区中，
+超出内存上限时丢弃最旧的记录。
+"""
+
+
+def pack_cells(values, bits):
+    """把一串非负整数按每个 bits 位打包成字节串"""
+    packed = 0
+    for index, value in enumerate(values):
+        packed |= value << (index * bits)
+    return packed.to_bytes(packed_size(len(values), bits), "little")
+
+
+def unpack_cells(data, count, bits):
+    """pack_cells 的逆操作"""
+    packed = int.from_bytes(data, "little")
+    mask = (1 << bits) - 1
+    return [(packed >> (index * bits)) & mask for index in range(count)]
+
+
+def packed_size(count, bits):
+    """count 个 bits 位的整数打包后的字节数"""
+    return (count * bits + 7) // 8
+
+
+class UndoHistory:
+    """定长记录的环形撤销缓冲区
+
+    cursor 之前的记录可以撤销，cursor 之后的记录可以重做；
+    压入新记录会丢弃所有可重做的记录。
+    undo/redo 可以用 swap 函数把取出的记录替换为 swap(记录) 的返回值，
+    这样同一条记录在撤销后保存“之后”的状态，在重做后保存“之前”的状态。
+    """
+
+    def __init__(self, record_size, max_bytes=1 << 20):
+        self.record_size = record_size
+        self.capacity = max(1, max_bytes // record_size)
+        self.buffer = bytearray(self.capacity * record_size)
+        self.start = 0
+        self.count = 0
+        self.cursor = 0
+
+    def _slot(self, index):
+        offset = (self.start + index) % self.capacity * self.record_size
+        return slice(offset, offset + self.record_size)
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.cursor = 0
+
+    def push(self, record):
+        """记录新的一步"""
+        # 丢弃可重做的记录
+        self.count = self.cursor
+        if self.count == self.capacity:
+            # 缓冲区已满，覆盖最旧的记录
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+            self.cursor -= 1
+        self.buffer[self._slot(self.count)] = record
+        self.count += 1
+        self.cursor += 1
+
+    def undo(self, swap=None):
+        """取出最近一步的记录，没有可撤销的步骤时返回None"""
+        if self.cursor == 0:
+            return None
+        self.cursor -= 1
+        slot = self._slot(self.cursor)
+        record = bytes(self.buffer[slot])
+        if swap is not None:
+            self.buffer[slot] = swap(record)
+        return record
+
+    def redo(self, swap=None):
+        """取出下一步的记录，没有可重做的步骤时返回None"""
+        if self.cursor == self.count:
+            return None
+        slot = self._slot(self.cursor)
+        record = bytes(self.buffer[slot])
+        if swap is not None:
+            self.buffer[slot] = swap(record)
+        self.cursor += 1
+        return record
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < self.count
+
+    def memory_usage(self):
+        """已使用的字节数"""
+        return self.count * self.record_size
@@ -0,0 +1,67 @@
+"""统一的输入管线
+
+每帧只在一个地方调用 pygame.event.get()：InputDispatcher.poll() 把取到的
+事件连同取出的时间放进缓冲区，GameManager 再按顺序把它们分发给菜单或
+当前游戏。游戏代码不再自己读取事件队列，按键不会再被绘制代码“偷走”。
+
+画面提交（display.flip）之后调用 presented()，统计这一帧处理过的输入
+从取出到显示在屏幕上的延迟。
+
+鼠标事件的坐标在取出时换算为游戏使用的逻辑坐标（见 display）。
+"""
+import time
+from collections import deque
+
+import pygame
+
+# 统计延迟时保留的最近样本数
+LATENCY_SAMPLES = 600
+# 参与延迟统计的事件类型：会改变画面的输入
+LATENCY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+# 带有 pos 坐标的事件类型
+POSITION_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+
+
+class InputDispatcher:
+    """输入事件的缓冲区和输入延迟统计
+
+    latencies 为最近的输入到显示延迟（毫秒）。
+    to_logical 不为None时用来把鼠标的窗口坐标换算为逻辑坐标。
+    """
+
+    def __init__(self, to_logical=None):
+        self.to_logical = to_logical
+        self.buffer = deque()
+        self.handled = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def poll(self):
+        """取出SDL队列中的所有事件，记下取出的时间"""
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            if self.to_logical is not None and event.type in POSITION_EVENTS:
+                event = pygame.event.Event(event.type, event.dict, pos=self.to_logical(event.pos))
+            self.buffer.append((now, event))
+
+    def drain(self):
+        """按顺序取出缓冲的事件，返回 [(时间, 事件)]"""
+        events = list(self.buffer)
+        self.buffer.clear()
+        for timestamp, event in events:
+            if event.type in LATENCY_EVENTS:
+                self.handled.append(timestamp)
+        return events
+
+    def presented(self):
+        """画面已提交到屏幕，记录这一帧处理的输入的延迟"""
+        if not self.handled:
+            return
+        now = time.perf_counter()
+        self.latencies.extend((now - timestamp) * 1000 for timestamp in self.handled)
+        self.handled.clear()
+
+    def latency_stats(self):
+        """最近输入延迟的(平均值, 最大值)，没有样本时返回None"""
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies), max(self.latencies)
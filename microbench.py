@@ -0,0 +1,324 @@
+"""游戏逻辑热点的微基准测试
+
+不创建窗口（SDL dummy 驱动），每项测试用固定种子生成输入，
+只计时被测的函数调用。结果按提交保存为 JSON，便于发现算法退化：
+
+    python microbench.py                       # 保存到 microbench/<提交>.json
+    python microbench.py --compare microbench/abc1234.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from array import array
+from itertools import chain
+
+import bench
+
+# 每项测试默认的操作次数和重复次数
+DEFAULT_COUNT = 2000
+DEFAULT_REPEAT = 5
+RESULT_DIR = "microbench"
+
+BENCHMARKS = {}
+
+
+def benchmark(name, count=DEFAULT_COUNT):
+    """注册一项测试：函数接收(随机数生成器, 次数)，返回只包含被测调用的无参函数"""
+    def register(function):
+        BENCHMARKS[name] = (function, count)
+        return function
+    return register
+
+
+def load_game(module):
+    """导入一个游戏模块；游戏模块导入时会初始化pygame，所以使用dummy驱动"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import contextlib
+    import importlib
+    import io
+    # game_common 导入时会打印字体加载信息
+    with contextlib.redirect_stdout(io.StringIO()):
+        return importlib.import_module(module)
+
+
+def random_tetris_board(game, rng):
+    """底部随机填充的俄罗斯方块棋盘，部分行是满的"""
+    board = [[0] * game.board_width for _ in range(game.board_height)]
+    for i in range(game.board_height // 2, game.board_height):
+        if rng.random() < 0.3:
+            board[i] = [rng.randint(1, 7) for _ in range(game.board_width)]
+        else:
+            board[i] = [rng.randint(1, 7) if rng.random() < 0.7 else 0 for _ in range(game.board_width)]
+    return board
+
+
+def random_tetris_piece(game, rng):
+    shape = rng.choice(game.shapes)
+    return {'shape': [row[:] for row in shape], 'color': 1,
+            'x': rng.randint(0, game.board_width - len(shape[0])),
+            'y': rng.randint(0, game.board_height - len(shape))}
+
+
+@benchmark("tetris.check_collision")
+def bench_tetris_check_collision(rng, count):
+    game = load_game("game_tetris").TetrisGame(rng.getrandbits(64))
+    game.board = random_tetris_board(game, rng)
+    pieces = [random_tetris_piece(game, rng) for _ in range(count)]
+
+    def run():
+        for piece in pieces:
+            game.current_piece = piece
+            game.check_collision()
+    return run
+
+
+@benchmark("tetris.clear_lines")
+def bench_tetris_clear_lines(rng, count):
+    game = load_game("game_tetris").TetrisGame(rng.getrandbits(64))
+    boards = [random_tetris_board(game, rng) for _ in range(count)]
+
+    def run():
+        for board in boards:
+            game.board = board
+            game.clear_lines()
+    return run
+
+
+@benchmark("tetris.rotate")
+def bench_tetris_rotate(rng, count):
+    game = load_game("game_tetris").TetrisGame(rng.getrandbits(64))
+    game.board = random_tetris_board(game, rng)
+    pieces = [random_tetris_piece(game, rng) for _ in range(count)]
+
+    def run():
+        for piece in pieces:
+            game.current_piece = piece
+            game.rotate()
+    return run
+
+
+def random_2048_boards(game, rng, count, moves=200):
+    """随机走 moves 步得到的中局棋盘（压缩形式）"""
+    boards = []
+    methods = (game.move_up, game.move_down, game.move_left, game.move_right)
+    for _ in range(count):
+        game.reset()
+        for _ in range(rng.randint(0, moves)):
+            if not game.can_move():
+                break
+            if rng.choice(methods)():
+                game.add_new_number()
+        boards.append(game.pack_board())
+    return boards
+
+
+@benchmark("2048.move_left", count=500)
+def bench_2048_move_left(rng, count):
+    """包含用 load_board 恢复棋盘的时间"""
+    game = load_game("game_2048").Game2048(seed=rng.getrandbits(64))
+    boards = random_2048_boards(game, rng, count)
+
+    def run():
+        for board in boards:
+            game.load_board(board)
+            game.move_left()
+    return run
+
+
+@benchmark("2048.can_move", count=20000)
+def bench_2048_can_move(rng, count):
+    game = load_game("game_2048").Game2048(seed=rng.getrandbits(64))
+    # 没有空格的棋盘，必须检查相邻的数字
+    for i in range(game.size):
+        for j in range(game.size):
+            game.set_cell(i, j, 1 << rng.randint(1, 11))
+
+    def run():
+        for _ in range(count):
+            game.can_move()
+    return run
+
+
+def random_tictactoe_boards(rng, count):
+    boards = []
+    for _ in range(count):
+        cells = [0] * 9
+        for index in rng.sample(range(9), rng.randint(0, 8)):
+            cells[index] = rng.randint(1, 2)
+        boards.append([cells[i * 3:(i + 1) * 3] for i in range(3)])
+    return boards
+
+
+@benchmark("tictactoe.check_winner")
+def bench_tictactoe_check_winner(rng, count):
+    game = load_game("game_tictactoe").TicTacToeGame(rng.getrandbits(64))
+    boards = random_tictactoe_boards(rng, count)
+
+    def run():
+        for board in boards:
+            game.board = board
+            game.check_winner(1)
+            game.check_winner(2)
+    return run
+
+
+@benchmark("tictactoe.ai_move")
+def bench_tictactoe_ai_move(rng, count):
+    game = load_game("game_tictactoe").TicTacToeGame(rng.getrandbits(64))
+    boards = random_tictactoe_boards(rng, count)
+
+    def run():
+        for board in boards:
+            game.board = board
+            game.ai_move()
+    return run
+
+
+@benchmark("puzzle.check_win", count=20000)
+def bench_puzzle_check_win(rng, count):
+    game = load_game("game_puzzle").PuzzleGame(rng.getrandbits(64))
+    solved = [[i * game.size + j + 1 for j in range(game.size)] for i in range(game.size)]
+    solved[-1][-1] = 0
+    # 一半已完成（需要检查所有格子），一半打乱
+    puzzles = [solved, game.puzzle]
+
+    def run():
+        for index in range(count):
+            game.puzzle = puzzles[index & 1]
+            game.check_win()
+    return run
+
+
+@benchmark("puzzle.shuffle", count=20)
+def bench_puzzle_shuffle(rng, count):
+    game = load_game("game_puzzle").PuzzleGame(rng.getrandbits(64))
+
+    def run():
+        for _ in range(count):
+            game.shuffle()
+    return run
+
+
+@benchmark("snake.tick_long", count=100)
+def bench_snake_tick(rng, count):
+    """长度约2000的蛇每帧移动一格，蛇头在空行中向右移动；只测移动逻辑，不包括倒带记录"""
+    snake_module = load_game("game_snake")
+    game = snake_module.SnakeGame(rng.getrandbits(64))
+    body = []
+    y = 400
+    while len(body) < 2000:
+        row = [(x, y) for x in range(0, snake_module.SCREEN_WIDTH - 10, 10)]
+        body += row if (y // 10) % 2 == 0 else row[::-1]
+        y += 10
+    snake = [(0, 390)] + body[:1999]
+    data = game.pack_state()
+    header = data[:len(data) - len(game.snake_data)]
+    game.load_state(header + array("h", chain.from_iterable(snake)).tobytes())
+    game.food = (0, 0)
+    count = min(count, (snake_module.SCREEN_WIDTH - 10) // 10)
+
+    def run():
+        for _ in range(count):
+            game.step()
+    return run
+
+
+@benchmark("particles.frame_30k", count=50)
+def bench_particles_frame(rng, count):
+    """30000个粒子每帧更新并绘制到逻辑画面大小的 Surface 上"""
+    load_game("game_common")
+    import pygame
+    from particles import ParticleSystem
+    surface = pygame.Surface((1024, 768), 0, 32)
+    particles = ParticleSystem(32768, seed=rng.getrandbits(64))
+    # 寿命足够长、速度足够慢，计时期间粒子数保持不变
+    particles.emit(12, 12, 30000, (255, 160, 40), speed=(0.05, 0.1), life=(count + 10, count + 20),
+                   width=1000, height=744)
+
+    def run():
+        for _ in range(count):
+            particles.update()
+            particles.draw(surface)
+    return run
+
+
+def run_benchmarks(names=None, seed=0, repeat=DEFAULT_REPEAT):
+    """运行选中的测试，返回 {名称: {"ns_per_op": 最快一次的每次操作纳秒数, ...}}"""
+    results = {}
+    for name, (function, count) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        times = []
+        for _ in range(repeat):
+            # 每次重复重新生成相同的输入
+            run = function(random.Random(f"{seed}:{name}"), count)
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        results[name] = {
+            "count": count,
+            "ns_per_op": best / count * 1e9,
+            "ns_per_op_median": sorted(times)[len(times) // 2] / count * 1e9,
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """返回比基线慢超过 threshold 的测试描述列表"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        old, new = base["ns_per_op"], result["ns_per_op"]
+        if new > old * (1 + threshold):
+            regressions.append(f"{name}: {old:.0f}ns -> {new:.0f}ns (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="游戏逻辑热点的微基准测试")
+    parser.add_argument("names", nargs="*", help="只运行这些测试，默认全部")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help=f"结果JSON的路径，默认为 {RESULT_DIR}/<提交>.json")
+    parser.add_argument("--compare", metavar="PATH", help="与之前保存的结果比较，退化时返回1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的退化比例")
+    parser.add_argument("--list", action="store_true", help="列出所有测试")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names, args.seed, args.repeat)
+    for name, result in results.items():
+        print(f"{name:28} {result['ns_per_op']:12.0f} ns/次  (中位数 {result['ns_per_op_median']:.0f})")
+
+    report = bench.make_report(results, seed=args.seed, repeat=args.repeat)
+    output = args.output or os.path.join(RESULT_DIR, f"{report['commit'] or 'unknown'}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    bench.save_report(report, output)
+    print(f"结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"退化: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
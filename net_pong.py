@@ -0,0 +1,597 @@
+"""局域网双人乒乓球
+
+服务器是权威的：以固定的 TICK_RATE 运行模拟，两个客户端只发送输入。客户端
+立即用自己的输入预测画面（对手按它最后一次已知的输入预测），收到服务器状态
+后核对：状态与当时的预测一致就什么也不做，不一致时回滚到服务器状态，
+重新模拟还没被确认的输入。
+
+使用UDP，所有数据包用 asyncio 收发：
+
+    HELLO    客户端 -> 服务器: 加入对局
+    WELCOME  服务器 -> 客户端: 分配的一侧(0左/1右)和随机种子
+    INPUT    客户端 -> 服务器: 最近收到的状态tick、发送时间，以及所有还没被
+             确认的输入（丢包时下一个包会补上）
+    STATE    服务器 -> 客户端: tick、已处理的最后一个输入序号、回显的发送时间、
+             对手的输入和状态。状态只包含相对于客户端已确认的状态改变了的字段
+
+    python net_pong.py --serve --port 5005
+    python net_pong.py --connect 192.168.1.10:5005
+    python net_pong.py --selftest --latency 40 --jitter 10 --loss 0.05 --seconds 10
+
+--latency/--jitter/--loss 在发送端模拟网络条件（单向延迟，往返约为两倍）。
+--selftest 在本机运行服务器和两个电脑控制的客户端，报告往返时间、带宽和回滚
+次数，并检查客户端最终确认的状态与服务器一致（一致时返回0）。
+"""
+import argparse
+import asyncio
+import random
+import struct
+import sys
+from collections import deque
+
+import pygame
+
+from game_pong import PongGame
+from game_common import (
+    screen, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WHITE, YELLOW, GREEN, RED, game_font, render_text)
+
+TICK_RATE = FPS
+DEFAULT_PORT = 5005
+PROTOCOL_VERSION = 1
+# 游戏结束后服务器等待多少tick开始下一局
+RESTART_TICKS = 2 * TICK_RATE
+# 服务器保留的已发送状态（作为差量的基准）和客户端保留的已收到状态
+STATE_HISTORY = 128
+# 一个INPUT包最多携带的未确认输入数
+MAX_INPUTS_PER_PACKET = 32
+# 服务器排队的输入超过这个数时丢弃最旧的，避免延迟越积越大
+INPUT_BACKLOG = 4
+# UDP和IPv4头部，统计带宽时计入
+UDP_OVERHEAD = 28
+
+# 输入位
+INPUT_UP = 1
+INPUT_DOWN = 2
+
+# 数据包类型
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+STATE = 4
+
+HELLO_PACKET = struct.Struct("<BB")
+WELCOME_PACKET = struct.Struct("<BBQ")
+# 类型、已收到的最新状态tick、发送时间(毫秒)、第一个输入的序号、输入个数
+INPUT_HEADER = struct.Struct("<BIIIB")
+# 类型、tick、基准tick、已处理的输入序号、回显的发送时间、服务器持有时间(毫秒)、对手的输入
+STATE_HEADER = struct.Struct("<BIIIIHB")
+NO_BASE = 0xFFFFFFFF
+# 服务器还没收到过这个客户端的输入时，持有时间填这个值，客户端不计算往返时间
+NO_ECHO = 0xFFFF
+
+# 状态的各个字段，与 PongGame.pack_state 的格式一致
+STATE_FORMAT = struct.Struct("<ddddddBBB")
+FIELDS = [struct.Struct("<" + code) for code in "ddddddBBB"]
+MASK = struct.Struct("<H")
+
+
+def encode_delta(state, base):
+    """只编码与 base 不同的字段：字段位图(2字节)加改变了的字段，base 为None时编码全部"""
+    mask = 0
+    parts = []
+    for index, value in enumerate(state):
+        if base is None or value != base[index]:
+            mask |= 1 << index
+            parts.append(FIELDS[index].pack(value))
+    return MASK.pack(mask) + b"".join(parts)
+
+
+def decode_delta(data, pos, base):
+    """解码 encode_delta 的结果，返回状态元组"""
+    (mask,) = MASK.unpack_from(data, pos)
+    pos += MASK.size
+    state = list(base) if base is not None else [0] * len(FIELDS)
+    for index, field in enumerate(FIELDS):
+        if mask >> index & 1:
+            (state[index],) = field.unpack_from(data, pos)
+            pos += field.size
+        elif base is None:
+            raise ValueError("没有基准状态时必须包含所有字段")
+    return tuple(state)
+
+
+def timestamp(loop):
+    """事件循环时间的毫秒数，取低32位"""
+    return int(loop.time() * 1000) & 0xFFFFFFFF
+
+
+class NetPongGame(PongGame):
+    """两个玩家各控制一个球拍的乒乓球
+
+    step 是服务器和客户端预测共用的确定性模拟。发球方向只取决于种子和比分，
+    所以 pack_state 就能完整描述一局，客户端回滚到任何一个服务器状态都能
+    得到和服务器相同的后续。
+    """
+
+    def __init__(self, seed, side=0):
+        self.seed = seed
+        self.side = side
+        super().__init__(seed)
+
+    def reset(self):
+        super().reset()
+        # 两个球拍速度相同
+        self.ai_speed = self.player_speed
+
+    def reset_ball(self):
+        self.rng = random.Random(f"{self.seed}:{self.player_score}:{self.ai_score}")
+        super().reset_ball()
+
+    def state(self):
+        return STATE_FORMAT.unpack(self.pack_state())
+
+    def set_state(self, state):
+        self.load_state(STATE_FORMAT.pack(*state))
+
+    def move_paddle(self, y, bits):
+        if bits & INPUT_UP and y > 0:
+            y -= self.player_speed
+        if bits & INPUT_DOWN and y < SCREEN_HEIGHT - self.player_height:
+            y += self.player_speed
+        return y
+
+    def step(self, left, right):
+        """按两个玩家的输入前进一个tick"""
+        if self.game_over:
+            return
+        self.player_y = self.move_paddle(self.player_y, left)
+        self.ai_y = self.move_paddle(self.ai_y, right)
+        self.advance_ball()
+
+    def show_game_over(self):
+        # 画在逻辑画布上，由 display.present() 缩放到窗口
+        scores = (self.player_score, self.ai_score)
+        won = scores[self.side] >= self.max_score
+        screen.fill((0, 0, 0))
+        result = game_font.render("你赢了！" if won else "对手赢了！", True, GREEN if won else RED)
+        score = game_font.render(f"分数: {scores[self.side]} - {scores[1 - self.side]}", True, WHITE)
+        screen.blit(result, (SCREEN_WIDTH//2 - 80, SCREEN_HEIGHT//2 - 50))
+        screen.blit(score, (SCREEN_WIDTH//2 - 120, SCREEN_HEIGHT//2))
+
+
+class LinkConditioner:
+    """在发送端模拟网络：按概率丢包，其余的延迟 latency±jitter 毫秒后发出，并统计流量"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, loss=0.0, seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.sent_packets = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+
+    def send(self, transport, data, addr=None):
+        self.sent_packets += 1
+        self.sent_bytes += len(data) + UDP_OVERHEAD
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + (self.rng.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay <= 0:
+            transport.sendto(data, addr)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._deliver, transport, data, addr)
+
+    @staticmethod
+    def _deliver(transport, data, addr):
+        if not transport.is_closing():
+            transport.sendto(data, addr)
+
+
+class RemotePlayer:
+    """服务器端的一个客户端：排队的输入和已确认的状态"""
+
+    def __init__(self, addr, side):
+        self.addr = addr
+        self.side = side
+        self.pending = {}
+        self.next_seq = 1
+        self.last_input = 0
+        self.processed_seq = 0
+        self.ack_tick = NO_BASE
+        self.echo = 0
+        self.echo_received = 0.0
+
+    def receive(self, first_seq, inputs):
+        for offset, bits in enumerate(inputs):
+            seq = first_seq + offset
+            if seq >= self.next_seq:
+                self.pending[seq] = bits
+
+    def next_input(self):
+        """这个tick使用的输入：下一个序号的输入还没到时重复上一个"""
+        while len(self.pending) > INPUT_BACKLOG:
+            self.pending.pop(self.next_seq, None)
+            self.next_seq += 1
+        bits = self.pending.pop(self.next_seq, None)
+        if bits is not None:
+            self.last_input = bits
+            self.processed_seq = self.next_seq
+            self.next_seq += 1
+        return self.last_input
+
+
+class PongServer(asyncio.DatagramProtocol):
+    """权威服务器：等待两个玩家加入后以固定频率运行，每个tick给每个玩家发送状态"""
+
+    def __init__(self, seed=None, conditioner=None):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.conditioner = conditioner or LinkConditioner()
+        self.game = NetPongGame(self.seed)
+        self.players = {}
+        self.tick = 0
+        self.history = {}
+        self.over_ticks = 0
+        self.transport = None
+        self.ready = asyncio.Event()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        kind = data[0]
+        if kind == HELLO:
+            self.join(addr)
+        elif kind == INPUT and addr in self.players:
+            _, ack_tick, sent, first_seq, count = INPUT_HEADER.unpack_from(data)
+            player = self.players[addr]
+            player.receive(first_seq, data[INPUT_HEADER.size:INPUT_HEADER.size + count])
+            if ack_tick != NO_BASE and (player.ack_tick == NO_BASE or ack_tick > player.ack_tick):
+                player.ack_tick = ack_tick
+            player.echo = sent
+            player.echo_received = asyncio.get_running_loop().time()
+
+    def join(self, addr):
+        player = self.players.get(addr)
+        if player is None:
+            if len(self.players) >= 2:
+                return
+            player = self.players[addr] = RemotePlayer(addr, len(self.players))
+            print(f"玩家 {player.side + 1} 加入: {addr[0]}:{addr[1]}")
+            if len(self.players) == 2:
+                self.ready.set()
+        # 重复的HELLO说明WELCOME丢了，再发一次
+        self.conditioner.send(self.transport, WELCOME_PACKET.pack(WELCOME, player.side, self.seed), addr)
+
+    async def run(self, ticks=None):
+        """等待两个玩家后运行 ticks 个tick（None为一直运行）"""
+        await self.ready.wait()
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while ticks is None or self.tick < ticks:
+            self.step()
+            next_time += 1 / TICK_RATE
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+
+    def step(self):
+        inputs = [0, 0]
+        for player in self.players.values():
+            inputs[player.side] = player.next_input()
+        self.game.step(*inputs)
+        if self.game.game_over:
+            self.over_ticks += 1
+            if self.over_ticks >= RESTART_TICKS:
+                self.game.reset()
+                self.over_ticks = 0
+        self.tick += 1
+        state = self.game.state()
+        self.history[self.tick] = state
+        self.history.pop(self.tick - STATE_HISTORY, None)
+
+        now = asyncio.get_running_loop().time()
+        for player in self.players.values():
+            base = self.history.get(player.ack_tick)
+            hold = min(NO_ECHO - 1, int((now - player.echo_received) * 1000)) if player.processed_seq else NO_ECHO
+            header = STATE_HEADER.pack(STATE, self.tick, player.ack_tick if base else NO_BASE,
+                                       player.processed_seq, player.echo, hold, inputs[1 - player.side])
+            self.conditioner.send(self.transport, header + encode_delta(state, base), player.addr)
+
+
+class PongClient(asyncio.DatagramProtocol):
+    """预测和回滚的客户端；controller(client) 返回这个tick的输入位"""
+
+    def __init__(self, controller, conditioner=None):
+        self.controller = controller
+        self.conditioner = conditioner or LinkConditioner()
+        self.transport = None
+        self.game = None
+        self.side = None
+        self.welcomed = asyncio.Event()
+        self.started = asyncio.Event()
+        # 本地输入序号、还没被确认的输入 [(序号, 输入)] 和每个输入之后的预测状态
+        self.seq = 0
+        self.unacked = deque()
+        self.predicted = {}
+        # 已收到的服务器状态（差量的基准），最新的tick、状态和对手的输入
+        self.states = {}
+        self.server_tick = NO_BASE
+        self.server_state = None
+        self.remote_input = 0
+        # 统计
+        self.rtts = deque(maxlen=600)
+        self.received_packets = 0
+        self.received_bytes = 0
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.confirmed = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def hello(self):
+        self.conditioner.send(self.transport, HELLO_PACKET.pack(HELLO, PROTOCOL_VERSION))
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        self.received_packets += 1
+        self.received_bytes += len(data) + UDP_OVERHEAD
+        kind = data[0]
+        if kind == WELCOME and self.game is None:
+            _, self.side, seed = WELCOME_PACKET.unpack(data)
+            self.game = NetPongGame(seed, self.side)
+            self.welcomed.set()
+        elif kind == STATE and self.game is not None:
+            self.receive_state(data)
+
+    def receive_state(self, data):
+        _, tick, base_tick, input_seq, echo, hold, remote_input = STATE_HEADER.unpack_from(data)
+        if base_tick != NO_BASE and base_tick not in self.states:
+            # 基准已经丢弃了，等下一个包
+            return
+        state = decode_delta(data, STATE_HEADER.size, self.states.get(base_tick))
+        self.states[tick] = state
+        self.states.pop(tick - STATE_HISTORY, None)
+        if self.server_tick != NO_BASE and tick <= self.server_tick:
+            # 乱序到达的旧状态只用作基准
+            return
+        if hold != NO_ECHO:
+            rtt = (timestamp(asyncio.get_running_loop()) - echo) & 0xFFFFFFFF
+            self.rtts.append(max(0, rtt - hold))
+        self.server_tick = tick
+        self.server_state = state
+        self.remote_input = remote_input
+        self.started.set()
+        self.reconcile(input_seq, state)
+
+    def reconcile(self, input_seq, state):
+        # 丢掉已被服务器处理的输入，比较服务器状态和当时的预测
+        while self.unacked and self.unacked[0][0] <= input_seq:
+            self.unacked.popleft()
+        predicted = self.predicted.pop(input_seq, None)
+        for seq in [seq for seq in self.predicted if seq < input_seq]:
+            del self.predicted[seq]
+        if predicted == state:
+            self.confirmed += 1
+            return
+        # 预测错误：回到服务器状态，重新模拟还没确认的输入
+        self.rollbacks += 1
+        self.game.set_state(state)
+        for seq, bits in self.unacked:
+            self.step_game(bits)
+            self.predicted[seq] = self.game.state()
+            self.resimulated += 1
+
+    def step_game(self, bits):
+        if self.side == 0:
+            self.game.step(bits, self.remote_input)
+        else:
+            self.game.step(self.remote_input, bits)
+
+    def tick(self):
+        """本地前进一个tick：读取输入、预测并发送所有未确认的输入"""
+        bits = self.controller(self)
+        self.seq += 1
+        self.unacked.append((self.seq, bits))
+        while len(self.unacked) > MAX_INPUTS_PER_PACKET:
+            self.unacked.popleft()
+        self.step_game(bits)
+        self.predicted[self.seq] = self.game.state()
+
+        first_seq = self.unacked[0][0]
+        header = INPUT_HEADER.pack(INPUT, self.server_tick, timestamp(asyncio.get_running_loop()),
+                                   first_seq, len(self.unacked))
+        self.conditioner.send(self.transport, header + bytes(bits for _, bits in self.unacked))
+
+    async def connect(self, timeout=5.0):
+        """发送HELLO直到收到WELCOME，再等待服务器开始发送状态"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self.welcomed.is_set():
+            if loop.time() > deadline:
+                raise TimeoutError("连接服务器超时")
+            self.hello()
+            try:
+                await asyncio.wait_for(self.welcomed.wait(), 0.25)
+            except asyncio.TimeoutError:
+                pass
+        await self.started.wait()
+
+    async def run(self, ticks=None, frame=None):
+        """以 TICK_RATE 运行 ticks 个tick；frame 为每个tick之后调用的函数，返回False时停止"""
+        await self.connect()
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        count = 0
+        while ticks is None or count < ticks:
+            self.tick()
+            count += 1
+            if frame is not None and frame(self) is False:
+                break
+            next_time += 1 / TICK_RATE
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+
+    def report(self, seconds):
+        """统计结果：往返时间(毫秒)、每秒收发的字节数和回滚次数"""
+        rtts = sorted(self.rtts)
+        return {
+            "rtt_mean": sum(rtts) / len(rtts) if rtts else 0.0,
+            "rtt_p50": rtts[len(rtts) // 2] if rtts else 0,
+            "rtt_p99": rtts[min(len(rtts) - 1, len(rtts) * 99 // 100)] if rtts else 0,
+            "up_bytes_per_s": self.conditioner.sent_bytes / seconds,
+            "down_bytes_per_s": self.received_bytes / seconds,
+            "down_packet_bytes": self.received_bytes / max(1, self.received_packets),
+            "rollbacks": self.rollbacks,
+            "resimulated": self.resimulated,
+            "confirmed": self.confirmed,
+            "dropped": self.conditioner.dropped,
+        }
+
+
+def keyboard_input(client):
+    keys = pygame.key.get_pressed()
+    return (INPUT_UP if keys[pygame.K_UP] else 0) | (INPUT_DOWN if keys[pygame.K_DOWN] else 0)
+
+
+def bot_input(seed):
+    """电脑控制的输入：球拍跟随球，偶尔随机按键，用于自测"""
+    rng = random.Random(seed)
+
+    def controller(client):
+        game = client.game
+        y = game.player_y if client.side == 0 else game.ai_y
+        if rng.random() < 0.05:
+            return rng.choice((0, INPUT_UP, INPUT_DOWN))
+        center = y + game.player_height // 2
+        if center < game.ball_y - 20:
+            return INPUT_DOWN
+        if center > game.ball_y + 20:
+            return INPUT_UP
+        return 0
+    return controller
+
+
+def print_report(name, report):
+    print(f"{name}: 往返 平均 {report['rtt_mean']:.1f}ms p50 {report['rtt_p50']}ms p99 {report['rtt_p99']}ms, "
+          f"上行 {report['up_bytes_per_s']:.0f} B/s, 下行 {report['down_bytes_per_s']:.0f} B/s "
+          f"(平均每包 {report['down_packet_bytes']:.0f} B), 回滚 {report['rollbacks']} 次 "
+          f"(重新模拟 {report['resimulated']} tick, 预测正确 {report['confirmed']} 次), "
+          f"丢弃 {report['dropped']} 个包")
+
+
+async def selftest(seconds=10.0, latency=0, jitter=0, loss=0.0, seed=0):
+    """本机运行服务器和两个电脑客户端，返回客户端最终确认的状态是否都与服务器一致"""
+    loop = asyncio.get_running_loop()
+    server = PongServer(seed, LinkConditioner(latency, jitter, loss, seed=f"{seed}:server"))
+    server_transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=("127.0.0.1", 0))
+    address = server_transport.get_extra_info("sockname")
+    clients = []
+    for side in range(2):
+        client = PongClient(bot_input(f"{seed}:{side}"), LinkConditioner(latency, jitter, loss, seed=f"{seed}:{side}"))
+        await loop.create_datagram_endpoint(lambda client=client: client, remote_addr=address)
+        clients.append(client)
+
+    ticks = int(seconds * TICK_RATE)
+    server_task = asyncio.ensure_future(server.run())
+    await asyncio.gather(*(client.run(ticks) for client in clients))
+    # 等最后的状态到达后停止服务器
+    await asyncio.sleep(0.5 + 2 * (latency + jitter) / 1000)
+    server_task.cancel()
+
+    ok = True
+    for side, client in enumerate(clients):
+        print_report(f"玩家 {side + 1}", client.report(seconds))
+        expected = server.history.get(client.server_tick)
+        if expected is not None and expected != client.server_state:
+            print(f"玩家 {side + 1}: tick {client.server_tick} 的状态与服务器不一致")
+            ok = False
+    print(f"服务器: {server.tick} tick, 上行 {server.conditioner.sent_bytes / seconds:.0f} B/s, "
+          f"比分 {server.game.player_score}:{server.game.ai_score}")
+    server_transport.close()
+    for client in clients:
+        client.transport.close()
+    return ok
+
+
+async def serve(port, seed=None, conditioner=None):
+    loop = asyncio.get_running_loop()
+    server = PongServer(seed, conditioner)
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=("0.0.0.0", port))
+    print(f"服务器已启动，端口 {port}，等待两个玩家")
+    try:
+        await server.run()
+    finally:
+        transport.close()
+
+
+async def play(host, port, conditioner=None):
+    """图形客户端：方向键控制球拍，ESC或关闭窗口退出"""
+    from game_common import display
+    loop = asyncio.get_running_loop()
+    client = PongClient(keyboard_input, conditioner)
+    transport, _ = await loop.create_datagram_endpoint(lambda: client, remote_addr=(host, port))
+    pygame.display.set_caption("乒乓球 - 联机对战")
+
+    def frame(client):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return False
+        client.game.render()
+        rtt = sorted(client.rtts)[len(client.rtts) // 2] if client.rtts else 0
+        side = "左" if client.side == 0 else "右"
+        screen.blit(render_text(f"{side}侧  延迟 {rtt}ms  回滚 {client.rollbacks}", YELLOW, 20),
+                    (10, SCREEN_HEIGHT - 30))
+        display.present()
+        return True
+
+    screen.fill((0, 0, 0))
+    screen.blit(render_text("等待对手加入...", WHITE, 32), (SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2))
+    display.present()
+    start = loop.time()
+    try:
+        await client.run(frame=frame)
+    finally:
+        print_report("本机", client.report(max(1e-3, loop.time() - start)))
+        transport.close()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, DEFAULT_PORT
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局域网双人乒乓球")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--serve", action="store_true", help="运行服务器")
+    mode.add_argument("--connect", metavar="HOST[:PORT]", help="连接服务器并开始游戏")
+    mode.add_argument("--selftest", action="store_true", help="在本机运行服务器和两个电脑客户端")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0, help="模拟的单向延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="延迟的随机波动（毫秒）")
+    parser.add_argument("--loss", type=float, default=0.0, help="模拟的丢包率")
+    parser.add_argument("--seconds", type=float, default=10.0, help="自测的时长")
+    args = parser.parse_args()
+
+    conditioner = LinkConditioner(args.latency, args.jitter, args.loss)
+    if args.selftest:
+        ok = asyncio.run(selftest(args.seconds, args.latency, args.jitter, args.loss, args.seed or 0))
+        return 0 if ok else 1
+    try:
+        if args.serve:
+            asyncio.run(serve(args.port, args.seed, conditioner))
+        else:
+            asyncio.run(play(*parse_address(args.connect), conditioner))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
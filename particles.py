@@ -0,0 +1,167 @@
+"""粒子特效
+
+所有粒子保存在预先分配好的 NumPy 数组中，每行一个粒子（位置、速度、剩余寿命、
+总寿命和颜色），更新和绘制都是对整列的向量运算，不逐个处理粒子。发射、更新和
+绘制都只写入预分配的数组，运行中不再申请内存；粒子数达到容量后新发射的粒子
+被丢弃。
+
+粒子只是视觉效果，不属于游戏状态：不进入存档、倒带快照和回放，随机数也使用
+自己的生成器，不影响游戏的随机数序列。
+"""
+import math
+
+import numpy as np
+import pygame
+
+from game_common import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# 每个游戏的默认容量
+DEFAULT_CAPACITY = 4096
+
+# 粒子数组的列
+X, Y, VX, VY, LIFE, MAX_LIFE, R, G, B = range(9)
+COLUMNS = 9
+
+
+class ParticleSystem:
+    """固定容量的粒子系统
+
+    速度单位为像素/帧，gravity 为每帧增加的向下速度，drag 为每帧速度的衰减系数。
+    fade 为真时颜色随剩余寿命变暗（适合深色背景）。粒子画成 size×size 的方块，
+    离开 bounds（默认为逻辑画面的大小）的粒子被删除。
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, gravity=0.0, drag=0.98, fade=True, size=2,
+                 bounds=(SCREEN_WIDTH, SCREEN_HEIGHT), seed=None):
+        self.capacity = capacity
+        self.gravity = gravity
+        self.drag = drag
+        self.fade = fade
+        self.size = size
+        self.bounds = bounds
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        # 两份粒子数组交替使用，删除死亡的粒子时压缩到另一份
+        self.data = np.zeros((capacity, COLUMNS), np.float32)
+        self.spare = np.zeros((capacity, COLUMNS), np.float32)
+        # 计算用的临时数组
+        self.alive = np.empty(capacity, bool)
+        self.inside = np.empty(capacity, bool)
+        self.scratch = np.empty(capacity, np.float32)
+        self.scratch2 = np.empty(capacity, np.float32)
+        self.xs = np.empty(capacity, np.intp)
+        self.ys = np.empty(capacity, np.intp)
+        self.pixels = np.empty(capacity, np.uint32)
+        self.channel = np.empty(capacity, np.uint32)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, x, y, count, color, speed=(1.0, 4.0), life=(20, 40), width=0, height=0):
+        """在 (x, y, width, height) 区域内随机位置发射 count 个粒子，方向随机"""
+        n = min(count, self.capacity - self.count)
+        if n <= 0:
+            return
+        block = self.data[self.count:self.count + n]
+        angle = self.scratch[:n]
+        magnitude = self.scratch2[:n]
+        rng = self.rng
+
+        # 速度：随机方向乘以随机大小
+        rng.random(dtype=np.float32, out=angle)
+        angle *= 2 * math.pi
+        rng.random(dtype=np.float32, out=magnitude)
+        magnitude *= speed[1] - speed[0]
+        magnitude += speed[0]
+        np.cos(angle, out=block[:, VX])
+        np.sin(angle, out=block[:, VY])
+        block[:, VX] *= magnitude
+        block[:, VY] *= magnitude
+
+        # 位置：区域内均匀分布
+        rng.random(dtype=np.float32, out=angle)
+        np.multiply(angle, width, out=block[:, X])
+        block[:, X] += x
+        rng.random(dtype=np.float32, out=angle)
+        np.multiply(angle, height, out=block[:, Y])
+        block[:, Y] += y
+
+        # 寿命（帧）
+        rng.random(dtype=np.float32, out=angle)
+        np.multiply(angle, life[1] - life[0], out=block[:, LIFE])
+        block[:, LIFE] += life[0]
+        block[:, MAX_LIFE] = block[:, LIFE]
+
+        block[:, R:B + 1] = color[:3]
+        self.count += n
+
+    def update(self):
+        """前进一帧：移动、受重力和阻力、减少寿命，删除死亡和出界的粒子"""
+        n = self.count
+        if not n:
+            return
+        data = self.data[:n]
+        data[:, X:Y + 1] += data[:, VX:VY + 1]
+        data[:, VX:VY + 1] *= self.drag
+        data[:, VY] += self.gravity
+        data[:, LIFE] -= 1
+
+        alive = self.alive[:n]
+        inside = self.inside[:n]
+        width, height = self.bounds
+        np.greater(data[:, LIFE], 0, out=alive)
+        np.greater_equal(data[:, X], 0, out=inside)
+        alive &= inside
+        np.greater_equal(data[:, Y], 0, out=inside)
+        alive &= inside
+        np.less(data[:, X], width - self.size, out=inside)
+        alive &= inside
+        np.less(data[:, Y], height - self.size, out=inside)
+        alive &= inside
+
+        remaining = int(np.count_nonzero(alive))
+        if remaining < n:
+            np.compress(alive, data, axis=0, out=self.spare[:remaining])
+            self.data, self.spare = self.spare, self.data
+            self.count = remaining
+
+    def draw(self, surface):
+        """把所有粒子画到32位的 surface 上"""
+        n = self.count
+        if not n or surface.get_bytesize() != 4:
+            return
+        data = self.data[:n]
+        xs, ys = self.xs[:n], self.ys[:n]
+        pixels, channel = self.pixels[:n], self.channel[:n]
+        np.copyto(xs, data[:, X], casting="unsafe")
+        np.copyto(ys, data[:, Y], casting="unsafe")
+
+        # 按 surface 的像素格式合成颜色，变暗时各通道乘以剩余寿命的比例
+        if self.fade:
+            fraction = self.scratch[:n]
+            np.divide(data[:, LIFE], data[:, MAX_LIFE], out=fraction)
+            value = self.scratch2[:n]
+        pixels.fill(0)
+        for column, shift in zip((R, G, B), surface.get_shifts()):
+            if self.fade:
+                np.multiply(data[:, column], fraction, out=value)
+                np.copyto(channel, value, casting="unsafe")
+            else:
+                np.copyto(channel, data[:, column], casting="unsafe")
+            channel <<= shift
+            pixels |= channel
+
+        # 每个粒子写 size×size 个像素，偏移量在原地增减，不生成新的索引数组
+        target = pygame.surfarray.pixels2d(surface)
+        try:
+            for dy in range(self.size):
+                for dx in range(self.size):
+                    target[xs, ys] = pixels
+                    xs += 1
+                xs -= self.size
+                ys += 1
+        finally:
+            del target
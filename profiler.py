@@ -0,0 +1,191 @@
+"""帧性能分析器
+
+用 with profiler.scope("名称"): 标记要计时的代码段。分析器关闭时
+scope() 直接返回一个什么都不做的共享对象，开销只有一次属性判断。
+打开后记录每帧各代码段的耗时，HUD显示最近几秒的帧时间曲线和
+各代码段的平均耗时；录制期间的所有代码段可以导出为 Chrome 的
+trace event JSON（在 chrome://tracing 或 Perfetto 中打开）。
+"""
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+# HUD曲线保存的帧数和统计平均的帧数
+HISTORY_FRAMES = 240
+AVERAGE_FRAMES = 60
+# 一次录制最多保存的代码段数，超过后自动停止录制
+MAX_CAPTURE_EVENTS = 1_000_000
+
+
+class _NullScope:
+    """分析器关闭时使用的空代码段"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.frame_scopes.append((self.name, self.start, end, profiler.depth))
+        return False
+
+
+class Profiler:
+    """按帧统计代码段耗时
+
+    frame_times 为最近的帧时间（毫秒），frame_totals 为最近每帧中
+    各代码段名称的总耗时（毫秒）。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.depth = 0
+        self.frame_scopes = []
+        self.frame_start = None
+        self.frame_times = deque(maxlen=HISTORY_FRAMES)
+        self.frame_totals = deque(maxlen=AVERAGE_FRAMES)
+        # 录制的代码段：(名称, 开始, 结束, 深度)，时间为纳秒
+        self.capture = None
+        self.capture_origin = 0
+
+    def scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        return _Scope(self, name)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_scopes = []
+        self.frame_start = None
+        self.depth = 0
+        if not self.enabled:
+            self.frame_times.clear()
+            self.frame_totals.clear()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_scopes = []
+        self.frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        end = time.perf_counter_ns()
+        self.frame_times.append((end - self.frame_start) / 1e6)
+        totals = {}
+        for name, start, stop, depth in self.frame_scopes:
+            totals[name] = totals.get(name, 0.0) + (stop - start) / 1e6
+        self.frame_totals.append(totals)
+        if self.capture is not None:
+            self.capture.append(("frame", self.frame_start, end, 0))
+            self.capture.extend(self.frame_scopes)
+            if len(self.capture) >= MAX_CAPTURE_EVENTS:
+                print("录制的代码段过多，自动停止录制")
+                print(f"性能记录已保存: {self.stop_capture()}")
+        self.frame_start = None
+
+    def averages(self):
+        """最近 AVERAGE_FRAMES 帧中每个代码段的平均每帧耗时，按耗时从大到小排列"""
+        sums = {}
+        for totals in self.frame_totals:
+            for name, value in totals.items():
+                sums[name] = sums.get(name, 0.0) + value
+        count = max(1, len(self.frame_totals))
+        return sorted(((name, value / count) for name, value in sums.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def start_capture(self):
+        """开始录制，录制期间自动打开分析器"""
+        if not self.enabled:
+            self.toggle()
+        self.capture = []
+        self.capture_origin = time.perf_counter_ns()
+
+    def stop_capture(self, directory="traces"):
+        """停止录制并导出 Chrome trace，返回文件路径"""
+        events = self.capture or []
+        self.capture = None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        export_chrome_trace(events, path, self.capture_origin)
+        return path
+
+    @property
+    def capturing(self):
+        return self.capture is not None
+
+
+def export_chrome_trace(events, path, origin=0):
+    """把 (名称, 开始, 结束, 深度) 代码段写成 trace event 格式的 JSON"""
+    trace = [{"name": name, "ph": "X", "pid": 1, "tid": 1,
+              "ts": (start - origin) / 1000, "dur": (end - start) / 1000,
+              "args": {"depth": depth}}
+             for name, start, end, depth in events]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+
+
+def draw_hud(surface, profiler, render, budget_ms=1000 / 60, extra_lines=()):
+    """在左上角绘制帧时间曲线和各代码段的平均耗时
+
+    render(文本, 颜色, 字号) 返回文本的 Surface，extra_lines 为额外显示的文本行。
+    """
+    width, height = 300, 120
+    averages = profiler.averages()[:8]
+    panel = pygame.Surface((width, height + 22 + 18 * (len(averages) + len(extra_lines))),
+                           pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 180))
+
+    # 帧时间曲线，纵轴上限为两倍的帧预算，横线表示预算
+    scale = height / (budget_ms * 2)
+    budget_y = height - budget_ms * scale
+    pygame.draw.line(panel, (80, 80, 80), (0, budget_y), (width, budget_y))
+    times = list(profiler.frame_times)
+    step = width / HISTORY_FRAMES
+    for index, value in enumerate(times):
+        bar = min(height, value * scale)
+        color = (80, 220, 80) if value <= budget_ms else (230, 80, 60)
+        x = int(index * step)
+        pygame.draw.line(panel, color, (x, height), (x, height - bar))
+
+    y = height + 2
+    if times:
+        recent = times[-AVERAGE_FRAMES:]
+        text = f"帧 {sum(recent) / len(recent):.2f}ms  最大 {max(recent):.2f}ms"
+        if profiler.capturing:
+            text += "  录制中"
+        panel.blit(render(text, (255, 255, 255), 16), (4, y))
+    y += 18
+    for text in extra_lines:
+        panel.blit(render(text, (255, 255, 160), 16), (4, y))
+        y += 18
+    for name, value in averages:
+        panel.blit(render(f"{name}: {value:.2f}ms", (200, 200, 200), 16), (4, y))
+        y += 18
+
+    surface.blit(panel, (8, 8))
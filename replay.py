@@ -0,0 +1,216 @@
+"""输入回放日志
+
+记录一局游戏中分发给游戏的所有输入事件，用于复现问题和性能回归测试。
+
+文件格式（小端）：
+    头部: b"SGRP", 版本(1字节), 游戏编号(1字节), 随机种子(8字节)
+    初始状态: varint(长度), 从存档继续时为存档数据（见 savegame），否则为空
+    记录: varint(与上一条记录的tick差), 类型(1字节), 类型相关的数据
+    受时间预算影响、无法重算的结果（如2048 AI的选择）作为 DECISION 记录
+    返回菜单时游戏被挂起（见 game_pool），记为 SUSPEND，之后的记录接着挂起时的tick
+    结尾: 类型 END，数据为结束时的状态摘要(20字节SHA-1)
+"""
+import hashlib
+import os
+import struct
+import time
+
+import pygame
+
+MAGIC = b"SGRP"
+VERSION = 2
+HEADER = struct.Struct("<4sBBQ")
+
+# 记录类型
+END = 0
+KEY_DOWN = 1
+KEY_UP = 2
+MOUSE_DOWN = 3
+MOUSE_UP = 4
+FOCUS_LOST = 5
+DECISION = 6
+SUSPEND = 7
+
+# 游戏被挂起到实例池时分发给游戏的事件
+GAME_SUSPENDED = pygame.event.custom_type()
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def state_digest(game):
+    """游戏状态的摘要，只包含简单类型的公开属性"""
+    def canonical(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return repr(value)
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value).hex()
+        if isinstance(value, pygame.Rect):
+            return repr(tuple(value))
+        if isinstance(value, (list, tuple)):
+            items = [canonical(item) for item in value]
+            return "[" + ",".join(item for item in items if item is not None) + "]"
+        if isinstance(value, dict):
+            items = [(repr(key), canonical(item)) for key, item in value.items()]
+            return "{" + ",".join(f"{key}:{item}" for key, item in sorted(items) if item is not None) + "}"
+        # 随机数生成器、缓冲区、字体等对象不参与比较
+        return None
+
+    parts = []
+    for name in sorted(vars(game)):
+        if name.startswith("_"):
+            continue
+        text = canonical(getattr(game, name))
+        if text is not None:
+            parts.append(f"{name}={text}")
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).digest()
+
+
+class InputRecorder:
+    """把输入事件记录到内存中的紧凑日志，结束时写入文件"""
+
+    def __init__(self, game_index, seed, initial_state=b""):
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, game_index, seed))
+        _write_varint(self.data, len(initial_state))
+        self.data += initial_state
+        self.last_tick = 0
+
+    def _begin(self, tick, kind):
+        _write_varint(self.data, tick - self.last_tick)
+        self.data.append(kind)
+        self.last_tick = tick
+
+    def record(self, tick, event):
+        """记录一个事件，游戏不使用的事件类型会被忽略"""
+        if event.type == pygame.KEYDOWN:
+            self._begin(tick, KEY_DOWN)
+            _write_varint(self.data, event.key)
+            unicode = getattr(event, "unicode", "")
+            _write_varint(self.data, ord(unicode) if len(unicode) == 1 else 0)
+        elif event.type == pygame.KEYUP:
+            self._begin(tick, KEY_UP)
+            _write_varint(self.data, event.key)
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            self._begin(tick, MOUSE_DOWN if event.type == pygame.MOUSEBUTTONDOWN else MOUSE_UP)
+            self.data.append(event.button)
+            _write_varint(self.data, max(0, event.pos[0]))
+            _write_varint(self.data, max(0, event.pos[1]))
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self._begin(tick, FOCUS_LOST)
+        elif event.type == GAME_SUSPENDED:
+            self._begin(tick, SUSPEND)
+
+    def record_decision(self, tick, value):
+        """记录一个非确定的决策结果（0-255）"""
+        self._begin(tick, DECISION)
+        self.data.append(value)
+
+    def finish(self, tick, digest):
+        """写入结尾记录，返回完整的日志"""
+        self._begin(tick, END)
+        self.data += digest
+        return bytes(self.data)
+
+    def save(self, directory, tick, digest, name=None):
+        """写入结尾记录并保存到 directory，返回文件路径"""
+        data = self.finish(tick, digest)
+        os.makedirs(directory, exist_ok=True)
+        if name is not None:
+            path = os.path.join(directory, name)
+            with open(path, "wb") as file:
+                file.write(data)
+            return path
+        # 默认文件名按秒计时，同一秒保存的同一游戏的回放加上序号，不覆盖已有的文件
+        stem = time.strftime("%Y%m%d-%H%M%S") + f"-{data[5]}"
+        attempt = 0
+        while True:
+            path = os.path.join(directory, f"{stem}-{attempt}.rpl" if attempt else f"{stem}.rpl")
+            try:
+                with open(path, "xb") as file:
+                    file.write(data)
+                return path
+            except FileExistsError:
+                attempt += 1
+
+
+class Replay:
+    """解析后的回放日志
+
+    initial_state 为开始时恢复的存档数据（可能为空），
+    events 为 [(tick, pygame事件)]，decisions 为 [(tick, 决策结果)]，
+    end_tick 和 digest 来自结尾记录。
+    """
+
+    def __init__(self, data):
+        magic, version, self.game_index, self.seed = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("不是回放文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的回放版本: {version}")
+
+        self.events = []
+        self.decisions = []
+        self.end_tick = None
+        self.digest = None
+        length, pos = _read_varint(data, HEADER.size)
+        self.initial_state = bytes(data[pos:pos + length])
+        pos += length
+        tick = 0
+        while pos < len(data):
+            delta, pos = _read_varint(data, pos)
+            tick += delta
+            kind = data[pos]
+            pos += 1
+            if kind == END:
+                self.end_tick = tick
+                self.digest = bytes(data[pos:pos + 20])
+                break
+            if kind == KEY_DOWN:
+                key, pos = _read_varint(data, pos)
+                code, pos = _read_varint(data, pos)
+                event = pygame.event.Event(pygame.KEYDOWN, key=key, mod=0,
+                                           unicode=chr(code) if code else "")
+            elif kind == KEY_UP:
+                key, pos = _read_varint(data, pos)
+                event = pygame.event.Event(pygame.KEYUP, key=key, mod=0)
+            elif kind in (MOUSE_DOWN, MOUSE_UP):
+                button = data[pos]
+                x, pos = _read_varint(data, pos + 1)
+                y, pos = _read_varint(data, pos)
+                event_type = pygame.MOUSEBUTTONDOWN if kind == MOUSE_DOWN else pygame.MOUSEBUTTONUP
+                event = pygame.event.Event(event_type, button=button, pos=(x, y))
+            elif kind == FOCUS_LOST:
+                event = pygame.event.Event(pygame.WINDOWFOCUSLOST)
+            elif kind == SUSPEND:
+                event = pygame.event.Event(GAME_SUSPENDED)
+            elif kind == DECISION:
+                self.decisions.append((tick, data[pos]))
+                pos += 1
+                continue
+            else:
+                raise ValueError(f"未知的记录类型: {kind}")
+            self.events.append((tick, event))
+
+        if self.end_tick is None:
+            raise ValueError("回放文件不完整")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls(file.read())
@@ -0,0 +1,216 @@
+"""实时游戏的倒带缓冲区
+
+游戏每一帧把状态压缩成一个字节串（快照）交给 RewindBuffer。
+每隔 keyframe_interval 帧保存一个完整的关键帧，其余帧只保存相对
+上一帧的差异（复制/字面量操作序列）。所有帧放在一块固定大小的
+bytearray 环形缓冲区中，空间不够时丢弃最旧的帧。
+"""
+from collections import deque
+
+# 差异编码中值得复制的最短匹配
+MIN_MATCH = 4
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _match_length(base, base_pos, data, data_pos):
+    """base[base_pos:] 与 data[data_pos:] 的公共前缀长度"""
+    length = min(len(base) - base_pos, len(data) - data_pos)
+    if length <= 0:
+        return 0
+    # 常见情况是剩余部分完全相同，整段比较最快
+    if base[base_pos:base_pos + length] == data[data_pos:data_pos + length]:
+        return length
+    # 二分缩小第一个不同字节所在的范围，[low, high) 中一定有不同的字节
+    low, high = 0, length
+    while high - low > 64:
+        mid = (low + high) // 2
+        if base[base_pos + low:base_pos + mid] == data[data_pos + low:data_pos + mid]:
+            low = mid
+        else:
+            high = mid
+    diff = (int.from_bytes(base[base_pos + low:base_pos + high], "little")
+            ^ int.from_bytes(data[data_pos + low:data_pos + high], "little"))
+    # 最低的不同位所在的字节就是第一个不同的字节
+    return low + ((diff & -diff).bit_length() - 1) // 8
+
+
+def encode_delta(base, data):
+    """把 data 编码为相对 base 的复制/字面量操作序列
+
+    每个操作以 varint(长度 << 1 | 是否复制) 开头，
+    复制操作后跟 varint(base 中的偏移)，字面量操作后跟原始字节。
+    """
+    out = bytearray()
+    size = len(data)
+    pos = 0
+    literal_start = 0
+    # 优先尝试紧接上一次复制的位置，适合原地修改的情况
+    hint = 0
+    while pos < size:
+        chunk = data[pos:pos + MIN_MATCH]
+        if len(chunk) < MIN_MATCH:
+            break
+        if base[hint:hint + MIN_MATCH] == chunk:
+            source = hint
+        else:
+            source = base.find(chunk)
+        if source < 0:
+            pos += MIN_MATCH
+            continue
+
+        length = _match_length(base, source, data, pos)
+        if literal_start < pos:
+            _write_varint(out, (pos - literal_start) << 1)
+            out += data[literal_start:pos]
+        _write_varint(out, (length << 1) | 1)
+        _write_varint(out, source)
+        pos += length
+        literal_start = pos
+        hint = source + length
+
+    if literal_start < size:
+        _write_varint(out, (size - literal_start) << 1)
+        out += data[literal_start:]
+    return bytes(out)
+
+
+def decode_delta(base, delta):
+    """encode_delta 的逆操作"""
+    out = bytearray()
+    pos = 0
+    while pos < len(delta):
+        header, pos = _read_varint(delta, pos)
+        length = header >> 1
+        if header & 1:
+            source, pos = _read_varint(delta, pos)
+            out += base[source:source + length]
+        else:
+            out += delta[pos:pos + length]
+            pos += length
+    return bytes(out)
+
+
+class RewindBuffer:
+    """固定内存的倒带缓冲区
+
+    frames 中每一项为(偏移, 长度, 是否关键帧)，按时间顺序排列，
+    在环形缓冲区中的位置也是按时间顺序的。
+    """
+
+    def __init__(self, max_bytes=4 << 20, keyframe_interval=60):
+        # 环形缓冲区在第一次记录时才分配，从不记录的实例（联机、观战）不占内存
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.keyframe_interval = keyframe_interval
+        self.frames = deque()
+        self.write_pos = 0
+        # 上一帧的快照，用于编码差异帧；为None时下一帧保存为关键帧
+        self.previous = None
+        self.since_keyframe = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def clear(self):
+        self.frames.clear()
+        self.write_pos = 0
+        self.previous = None
+        self.since_keyframe = 0
+
+    def _evict(self, start, end):
+        """丢弃与 [start, end) 重叠的旧帧，以及失去关键帧的差异帧"""
+        frames = self.frames
+        while frames:
+            offset, length, _ = frames[0]
+            if offset < end and start < offset + length:
+                frames.popleft()
+            elif not frames[0][2]:
+                frames.popleft()
+            else:
+                break
+
+    def _store(self, data, is_keyframe):
+        if not self.buffer:
+            self.buffer = bytearray(self.max_bytes)
+        size = len(data)
+        if size > len(self.buffer):
+            # 单帧比整个缓冲区还大，无法保存
+            self.clear()
+            return
+        if self.write_pos + size > len(self.buffer):
+            # 尾部空间不够，从头开始写；写入位置之后的帧都是上一圈写的最旧的帧
+            while self.frames and self.frames[0][0] >= self.write_pos:
+                self.frames.popleft()
+            self.write_pos = 0
+        start = self.write_pos
+        self._evict(start, start + size)
+        self.buffer[start:start + size] = data
+        self.frames.append((start, size, is_keyframe))
+        self.write_pos = start + size
+
+    def _store_keyframe(self, snapshot):
+        self._store(snapshot, True)
+        self.since_keyframe = 0
+
+    def record(self, snapshot):
+        """记录一帧快照"""
+        if self.previous is None or self.since_keyframe >= self.keyframe_interval:
+            self._store_keyframe(snapshot)
+        else:
+            self._store(encode_delta(self.previous, snapshot), False)
+            self.since_keyframe += 1
+            if self.frames and not self.frames[0][2]:
+                # 写入时覆盖了这一组的关键帧，改为保存关键帧
+                offset, _, _ = self.frames.pop()
+                self.write_pos = offset
+                self._store_keyframe(snapshot)
+        self.previous = snapshot if self.frames else None
+
+    def _read(self, index):
+        offset, length, is_keyframe = self.frames[index]
+        return bytes(self.buffer[offset:offset + length]), is_keyframe
+
+    def _decode(self, index):
+        """还原第 index 帧的快照：从所属的关键帧开始依次应用差异"""
+        key_index = index
+        while not self.frames[key_index][2]:
+            key_index -= 1
+        snapshot, _ = self._read(key_index)
+        for delta_index in range(key_index + 1, index + 1):
+            snapshot = decode_delta(snapshot, self._read(delta_index)[0])
+        return snapshot
+
+    def rewind(self, ticks=1):
+        """丢弃最近的 ticks 帧（至少保留一帧），返回此后最新一帧的快照
+
+        没有更早的帧时返回None。
+        """
+        count = min(ticks, len(self.frames) - 1)
+        if count <= 0:
+            return None
+        for _ in range(count):
+            self.frames.pop()
+        offset, length, _ = self.frames[-1]
+        self.write_pos = offset + length
+        snapshot = self._decode(len(self.frames) - 1)
+        # 继续记录时重新从关键帧开始
+        self.previous = None
+        return snapshot
@@ -0,0 +1,120 @@
+"""游戏存档
+
+每个游戏的 pack_state() 把状态压缩成字节串，存档在它前面加上头部和
+随机数生成器的状态。写文件在后台线程中进行，先写临时文件再原子地
+替换，不会阻塞渲染，也不会留下写了一半的存档。
+
+文件格式（小端）：
+    头部: b"SGSV", 版本(1字节), 游戏编号(1字节), 数据的CRC32(4字节)
+    数据: 随机数生成器状态, 游戏的 pack_state()
+"""
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b"SGSV"
+VERSION = 1
+HEADER = struct.Struct("<4sBBI")
+
+# random.Random 的状态：版本、624个状态字和位置、是否有缓存的高斯值、高斯值
+RNG_STATE = struct.Struct("<B625IBd")
+
+
+def pack_rng(rng):
+    version, internal, gauss_next = rng.getstate()
+    return RNG_STATE.pack(version, *internal, gauss_next is not None, gauss_next or 0.0)
+
+
+def unpack_rng(data, offset=0):
+    """从 data[offset:] 解析随机数生成器的状态，用于 rng.setstate"""
+    values = RNG_STATE.unpack_from(data, offset)
+    version, internal, has_gauss, gauss_next = values[0], values[1:626], values[626], values[627]
+    return version, internal, gauss_next if has_gauss else None
+
+
+def encode_save(game_index, game):
+    """把游戏状态编码为存档"""
+    payload = pack_rng(game.rng) + game.pack_state()
+    return HEADER.pack(MAGIC, VERSION, game_index, zlib.crc32(payload)) + payload
+
+
+def decode_save(data):
+    """解析存档，返回(游戏编号, 数据)；数据交给 restore_save 恢复"""
+    magic, version, game_index, crc = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("不是存档文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的存档版本: {version}")
+    payload = data[HEADER.size:]
+    if zlib.crc32(payload) != crc:
+        raise ValueError("存档已损坏")
+    return game_index, payload
+
+
+def restore_save(game, payload):
+    """把 decode_save 得到的数据恢复到游戏实例中"""
+    # load_state 可能重建棋盘并消耗随机数，最后再恢复随机数生成器
+    game.load_state(payload[RNG_STATE.size:])
+    game.rng.setstate(unpack_rng(payload))
+
+
+def write_atomic(path, data):
+    """先写临时文件并刷到磁盘，再替换目标文件"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class SaveWriter:
+    """在后台线程中写存档
+
+    同一路径还没写出的旧数据会被新数据覆盖，只写最新的一份；
+    data 为None表示删除该存档。
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, data):
+        with self.condition:
+            self.pending[path] = data
+            self.condition.notify_all()
+
+    def delete(self, path):
+        self.submit(path, None)
+
+    def flush(self):
+        """等待所有已提交的存档写完"""
+        with self.condition:
+            while self.pending or self.busy:
+                self.condition.wait()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                path, data = self.pending.popitem()
+                self.busy = True
+            try:
+                if data is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    write_atomic(path, data)
+            except OSError as e:
+                print(f"写入存档失败 {path}: {e}")
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
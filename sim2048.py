@@ -0,0 +1,232 @@
+"""NumPy 批量 2048 模拟器，用于大规模蒙特卡洛模拟
+
+所有棋盘保存在一个 (N, size, size) 的 uint8 数组中，元素为指数
+（0 表示空格，k 表示数值 2**k），移动和生成新数字对所有棋盘批量执行。
+移动和生成规则与 Game2048 一致。
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# 方向编号
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def _orient(boards, direction):
+    """把棋盘变换为“向左移动”的方向"""
+    if direction == LEFT:
+        return boards
+    if direction == RIGHT:
+        return boards[:, :, ::-1]
+    if direction == UP:
+        return boards.transpose(0, 2, 1)
+    return boards.transpose(0, 2, 1)[:, :, ::-1]
+
+
+def _unorient(boards, direction):
+    """_orient 的逆变换"""
+    if direction == LEFT:
+        return boards
+    if direction == RIGHT:
+        return boards[:, :, ::-1]
+    if direction == UP:
+        return boards.transpose(0, 2, 1)
+    return boards[:, :, ::-1].transpose(0, 2, 1)
+
+
+def slide_left(boards):
+    """把所有棋盘向左滑动合并，返回(新棋盘, 每个棋盘的得分)
+
+    与 Game2048.move_left 一样，合并后的数字还能与后面的数字继续合并。
+    """
+    count, rows, cols = boards.shape
+    # 压缩：非零元素稳定地移到左边
+    order = np.argsort(boards == 0, axis=2, kind="stable")
+    result = np.take_along_axis(boards, order, axis=2)
+    gained = np.zeros((count, rows), dtype=np.int64)
+
+    for j in range(cols - 1):
+        # 同一位置可能连续合并多次
+        for _ in range(cols - 1 - j):
+            mask = (result[:, :, j] == result[:, :, j + 1]) & (result[:, :, j] != 0)
+            if not mask.any():
+                break
+            merged = result[:, :, j] + mask
+            result[:, :, j] = merged
+            gained += np.where(mask, np.left_shift(1, merged.astype(np.int64)), 0)
+            # 合并处右侧的元素左移一格
+            shifted = np.concatenate(
+                [result[:, :, j + 2:], np.zeros((count, rows, 1), dtype=result.dtype)], axis=2)
+            result[:, :, j + 1:] = np.where(mask[:, :, None], shifted, result[:, :, j + 1:])
+
+    return result, gained.sum(axis=1)
+
+
+_row_tables = {}
+
+
+def _row_table(cols):
+    """cols 列、每格4位的行查找表：行编码 -> (滑动后的行, 得分)
+
+    只对列数不超过4的棋盘建表，表大小为 16**cols。
+    """
+    table = _row_tables.get(cols)
+    if table is None:
+        codes = np.arange(16 ** cols, dtype=np.int64)
+        rows = ((codes[:, None] >> (4 * np.arange(cols))) & 0xF).astype(np.uint8)
+        slid, gained = slide_left(rows[:, None, :])
+        table = (slid[:, 0, :], gained)
+        _row_tables[cols] = table
+    return table
+
+
+def slide_left_fast(boards):
+    """slide_left 的查表版本，数字超出表范围时退回逐列计算"""
+    cols = boards.shape[2]
+    # 合并后指数加1，必须仍能用4位表示
+    if cols > 4 or boards.size == 0 or boards.max() >= 15:
+        return slide_left(boards)
+    slid, gained = _row_table(cols)
+    codes = (boards.astype(np.int64) << (4 * np.arange(cols))).sum(axis=2)
+    return slid[codes], gained[codes].sum(axis=1)
+
+
+def can_move(boards):
+    """返回每个棋盘是否还有合法移动"""
+    has_empty = (boards == 0).any(axis=(1, 2))
+    horizontal = (boards[:, :, :-1] == boards[:, :, 1:]).any(axis=(1, 2))
+    vertical = (boards[:, :-1, :] == boards[:, 1:, :]).any(axis=(1, 2))
+    return has_empty | horizontal | vertical
+
+
+class Batch2048:
+    """同时模拟 count 局 2048
+
+    scores 为每局得分，done 为每局是否已经结束，moves 为每局的步数。
+    """
+
+    def __init__(self, count, size=4, seed=None):
+        self.count = count
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((count, size, size), dtype=np.uint8)
+        self.scores = np.zeros(count, dtype=np.int64)
+        self.moves = np.zeros(count, dtype=np.int64)
+        self.done = np.zeros(count, dtype=bool)
+
+        # 与 Game2048.reset 一样生成两个初始数字
+        self.spawn()
+        self.spawn()
+
+    def spawn(self, index=None):
+        """在选中的棋盘上各生成一个新数字：90%为2，10%为4
+
+        index 为棋盘编号数组，None 表示所有棋盘。
+        """
+        if index is None:
+            index = np.arange(self.count)
+        flat = self.boards.reshape(self.count, -1)
+        selected = flat[index]
+        empty = selected == 0
+        # 空格上的均匀随机数取最大值，相当于在空格中均匀选择
+        keys = self.rng.random(selected.shape)
+        keys[~empty] = -1.0
+        cells = keys.argmax(axis=1)
+        values = np.where(self.rng.random(index.size) < 0.9, 1, 2).astype(np.uint8)
+
+        has_empty = empty.any(axis=1)
+        flat[index[has_empty], cells[has_empty]] = values[has_empty]
+
+    def step(self, directions):
+        """每个棋盘按 directions 中对应的方向移动一步
+
+        directions 可以是单个方向编号或长度为 count 的数组。
+        已结束的棋盘不再变化。返回(本步得分, 是否移动)两个数组。
+        """
+        directions = np.broadcast_to(np.asarray(directions), (self.count,))
+        gained = np.zeros(self.count, dtype=np.int64)
+        moved = np.zeros(self.count, dtype=bool)
+        active = np.nonzero(~self.done)[0]
+        active_directions = directions[active]
+
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            index = active[active_directions == direction]
+            if index.size == 0:
+                continue
+            before = self.boards[index]
+            after, score = slide_left_fast(_orient(before, direction))
+            after = _unorient(after, direction)
+            changed = (after != before).any(axis=(1, 2))
+            self.boards[index] = after
+            gained[index] = score
+            moved[index] = changed
+
+        # 只有移动过的棋盘才生成新数字
+        self.spawn(np.nonzero(moved)[0])
+        self.scores += gained
+        self.moves += moved
+        self.done[active] = ~can_move(self.boards[active])
+        return gained, moved
+
+    def max_tiles(self):
+        """每个棋盘上的最大数字"""
+        exponents = self.boards.reshape(self.count, -1).max(axis=1).astype(np.int64)
+        return np.where(exponents > 0, np.left_shift(1, exponents), 0)
+
+    def run_random(self, max_steps=100000):
+        """所有棋盘随机移动直到全部结束，返回总步数"""
+        steps = 0
+        while not self.done.all() and steps < max_steps:
+            self.step(self.rng.integers(0, 4, self.count))
+            steps += 1
+        return int(self.moves.sum())
+
+
+def benchmark_batch(boards=4096, seed=0):
+    """随机策略下批量模拟器的每秒移动数"""
+    sim = Batch2048(boards, seed=seed)
+    start = time.perf_counter()
+    moves = sim.run_random()
+    elapsed = time.perf_counter() - start
+    return moves / elapsed, sim
+
+
+def benchmark_scalar(games=20, seed=0):
+    """随机策略下 Game2048 类（不渲染）的每秒移动数"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from game_2048 import Game2048
+
+    rng = random.Random(seed)
+    moves = 0
+    start = time.perf_counter()
+    for index in range(games):
+        game = Game2048(seed=seed + index)
+        methods = (game.move_up, game.move_down, game.move_left, game.move_right)
+        while game.can_move():
+            if rng.choice(methods)():
+                game.add_new_number()
+                moves += 1
+    elapsed = time.perf_counter() - start
+    return moves / elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量2048模拟器")
+    parser.add_argument("--boards", type=int, default=4096)
+    parser.add_argument("--games", type=int, default=20, help="标量基准测试的局数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    batch_rate, sim = benchmark_batch(args.boards, args.seed)
+    print(f"批量模拟: {args.boards} 局, 平均得分 {sim.scores.mean():.0f}, "
+          f"最大数字 {sim.max_tiles().max()}, {batch_rate:.0f} 步/秒")
+    scalar_rate = benchmark_scalar(args.games, args.seed)
+    print(f"Game2048 类: {args.games} 局, {scalar_rate:.0f} 步/秒")
+    print(f"加速比: {batch_rate / scalar_rate:.1f}x")
+    sys.exit(0)
@@ -0,0 +1,437 @@
+"""观战广播
+
+主机每个tick把当前游戏的状态快照（与倒带、存档相同的 pack_state）编码一次，
+把同一段字节发给所有观众：每隔 KEYFRAME_TICKS 个tick发送完整的关键帧，其余
+tick只发送相对上一帧的差异（rewind.encode_delta 的复制/字面量操作，蛇身整体
+平移、消除的砖块、改变的俄罗斯方块行和2048的格子都只占几个字节）。观众端自己
+还原快照，用 load_state 恢复到本地的游戏实例后绘制。
+
+编码的开销与观众数无关，每个观众只多一次非阻塞的 send。新连接的观众从下一个
+关键帧开始接收；发送缓冲积压超过 MAX_BACKLOG 的观众丢弃积压的消息，同样等
+下一个关键帧重新同步，不会拖慢主机和其他观众。
+
+消息格式（小端）：
+    连接后: b"SGSP", 版本(1字节)
+    每条消息: 类型(1字节), 游戏编号(1字节), tick(4字节), 长度(4字节), 数据
+    KEYFRAME 数据为完整快照，DELTA 为相对上一条消息的差异，
+    END（游戏结束或返回菜单）为最后一个快照的SHA-1，观众用它校验还原结果
+
+    python game_collection.py --spectate-port 5007
+    python spectate.py --watch 192.168.1.10:5007
+    python spectate.py --loadtest --viewers 1,100,400 --seconds 5
+
+--loadtest 在本机用电脑输入运行一个游戏并广播，在另一个进程中模拟大量观众，
+报告主机每个tick的编码和发送耗时、每个观众的流量，并检查所有观众还原的最终
+状态与主机一致（一致时返回0）。
+"""
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import random
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+import pygame
+
+import game_registry
+from rewind import encode_delta, decode_delta
+from game_common import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WHITE, YELLOW, render_text, sim_clock, key_state
+
+DEFAULT_PORT = 5007
+# 关键帧间隔（tick），也是新观众最多等待的时间
+KEYFRAME_TICKS = FPS
+# 一个观众最多积压的字节数，超过后丢弃积压的消息等待下一个关键帧
+MAX_BACKLOG = 64 * 1024
+
+HEADER = struct.Struct("<4sB")
+MAGIC = b"SGSP"
+PROTOCOL_VERSION = 1
+FRAME = struct.Struct("<BBII")
+
+# 消息类型
+KEYFRAME = 1
+DELTA = 2
+END = 3
+
+
+class Viewer:
+    """一个观众的连接：等待发送的消息、第一条消息已发送的字节数、是否已同步"""
+
+    __slots__ = ("sock", "queue", "offset", "backlog", "synced")
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.queue = deque()
+        self.offset = 0
+        self.backlog = 0
+        self.synced = False
+
+    def push(self, message):
+        self.queue.append(message)
+        self.backlog += len(message)
+
+
+class SpectatorBroadcaster:
+    """主机端：在游戏循环中每个tick调用 publish，不阻塞
+
+    统计信息：encode_seconds/send_seconds 为编码和发送的累计耗时，
+    sent_bytes 为发给所有观众的总字节数，resyncs 为因积压而重新同步的次数。
+    """
+
+    def __init__(self, port=DEFAULT_PORT, host="127.0.0.1", keyframe_interval=KEYFRAME_TICKS,
+                 max_backlog=MAX_BACKLOG):
+        self.listener = socket.create_server((host, port), backlog=1024)
+        self.listener.setblocking(False)
+        self.keyframe_interval = keyframe_interval
+        self.max_backlog = max_backlog
+        self.viewers = []
+        # 上一条消息的游戏编号和快照，快照为None时下一条消息为关键帧
+        self.game_index = None
+        self.previous = None
+        self.since_keyframe = 0
+
+        self.ticks = 0
+        self.keyframes = 0
+        self.encoded_bytes = 0
+        self.sent_bytes = 0
+        self.resyncs = 0
+        self.encode_seconds = 0.0
+        self.send_seconds = 0.0
+
+    @property
+    def port(self):
+        return self.listener.getsockname()[1]
+
+    def accept(self):
+        """接受所有等待中的连接"""
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            viewer = Viewer(sock)
+            viewer.push(HEADER.pack(MAGIC, PROTOCOL_VERSION))
+            self.viewers.append(viewer)
+
+    def publish(self, game_index, tick, snapshot):
+        """广播一个tick的快照"""
+        start = time.perf_counter()
+        self.accept()
+        if (game_index != self.game_index or self.previous is None
+                or self.since_keyframe >= self.keyframe_interval):
+            kind, body = KEYFRAME, snapshot
+            self.since_keyframe = 0
+            self.keyframes += 1
+        else:
+            kind, body = DELTA, encode_delta(self.previous, snapshot)
+            self.since_keyframe += 1
+        message = FRAME.pack(kind, game_index, tick & 0xFFFFFFFF, len(body)) + body
+        self.game_index = game_index
+        self.previous = snapshot
+        self.ticks += 1
+        self.encoded_bytes += len(message)
+        middle = time.perf_counter()
+        self.broadcast(message, kind == KEYFRAME)
+        self.encode_seconds += middle - start
+        self.send_seconds += time.perf_counter() - middle
+
+    def end(self):
+        """当前一局结束或返回菜单：发送最后一个快照的摘要，下一局从关键帧开始"""
+        if self.previous is None:
+            return
+        digest = hashlib.sha1(self.previous).digest()
+        self.broadcast(FRAME.pack(END, self.game_index, 0, len(digest)) + digest, False)
+        self.game_index = None
+        self.previous = None
+
+    def broadcast(self, message, keyframe):
+        # 所有观众共用同一个消息对象；还没同步的观众从关键帧开始接收
+        for viewer in self.viewers:
+            if not viewer.synced and keyframe:
+                viewer.synced = True
+            if viewer.synced:
+                viewer.push(message)
+        self.flush_all()
+
+    def flush_all(self):
+        """给每个观众发送积压的消息，关闭已断开的连接"""
+        alive = []
+        for viewer in self.viewers:
+            if self.flush(viewer):
+                alive.append(viewer)
+            else:
+                viewer.sock.close()
+        self.viewers = alive
+
+    def flush(self, viewer):
+        """尽量发送积压的消息，连接已断开时返回False"""
+        queue = viewer.queue
+        while queue:
+            data = queue[0]
+            try:
+                sent = viewer.sock.send(memoryview(data)[viewer.offset:])
+            except BlockingIOError:
+                break
+            except OSError:
+                return False
+            self.sent_bytes += sent
+            viewer.backlog -= sent
+            viewer.offset += sent
+            if viewer.offset < len(data):
+                break
+            queue.popleft()
+            viewer.offset = 0
+        if viewer.backlog > self.max_backlog:
+            # 跟不上的观众：只保留已经发送了一部分的消息，之后等下一个关键帧
+            partial = queue.popleft() if viewer.offset else None
+            queue.clear()
+            viewer.backlog = 0
+            if partial is not None:
+                queue.append(partial)
+                viewer.backlog = len(partial) - viewer.offset
+            viewer.synced = False
+            self.resyncs += 1
+        return True
+
+    def close(self):
+        for viewer in self.viewers:
+            viewer.sock.close()
+        self.viewers.clear()
+        self.listener.close()
+
+
+class SpectatorStream:
+    """观众端：解析收到的字节流，还原每个tick的快照
+
+    feed 返回这次收到的数据中是否有新的快照。END 之后 verified 为还原的最后一个
+    快照是否与主机一致，snapshot 为None直到下一局的关键帧。
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.header_seen = False
+        self.game_index = None
+        self.tick = None
+        self.snapshot = None
+        self.verified = None
+        self.received_bytes = 0
+        self.keyframes = 0
+        self.deltas = 0
+
+    def feed(self, data):
+        self.received_bytes += len(data)
+        buffer = self.buffer
+        buffer += data
+        pos = 0
+        if not self.header_seen:
+            if len(buffer) < HEADER.size:
+                return False
+            magic, version = HEADER.unpack_from(buffer)
+            if magic != MAGIC or version != PROTOCOL_VERSION:
+                raise ValueError("不是同一版本的观战广播")
+            self.header_seen = True
+            pos = HEADER.size
+        updated = False
+        while len(buffer) - pos >= FRAME.size:
+            kind, game_index, tick, length = FRAME.unpack_from(buffer, pos)
+            end = pos + FRAME.size + length
+            if len(buffer) < end:
+                break
+            body = bytes(buffer[pos + FRAME.size:end])
+            pos = end
+            if kind == KEYFRAME:
+                self.snapshot = body
+                self.keyframes += 1
+            elif kind == DELTA:
+                if self.snapshot is None or game_index != self.game_index or tick != self.tick + 1:
+                    raise ValueError(f"tick {tick} 的差异帧没有对应的上一帧")
+                self.snapshot = decode_delta(self.snapshot, body)
+                self.deltas += 1
+            elif kind == END:
+                if self.snapshot is not None:
+                    self.verified = hashlib.sha1(self.snapshot).digest() == body
+                self.snapshot = None
+                continue
+            else:
+                raise ValueError(f"未知的消息类型 {kind}")
+            self.game_index = game_index
+            self.tick = tick
+            updated = True
+        del buffer[:pos]
+        return updated
+
+
+def watch(host, port):
+    """图形界面观战：用收到的快照恢复本地的游戏实例并绘制；ESC或关闭窗口退出"""
+    from game_common import display, screen
+    sock = socket.create_connection((host, port))
+    sock.setblocking(False)
+    stream = SpectatorStream()
+    games = {}
+    game = None
+    clock = pygame.time.Clock()
+    pygame.display.set_caption("观战")
+    try:
+        while True:
+            clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return
+            updated = False
+            while True:
+                try:
+                    data = sock.recv(65536)
+                except BlockingIOError:
+                    break
+                if not data:
+                    return
+                updated = stream.feed(data) or updated
+
+            if stream.snapshot is None:
+                game = None
+                screen.fill((0, 0, 0))
+                screen.blit(render_text("等待主机开始游戏...", WHITE, 32),
+                            (SCREEN_WIDTH // 2 - 140, SCREEN_HEIGHT // 2))
+            elif updated or game is None:
+                # 每个游戏只创建一个实例，只用来恢复状态和绘制
+                index = stream.game_index
+                if index not in games:
+                    games[index] = game_registry.GAMES[index].create(0)
+                game = games[index]
+                game.load_state(stream.snapshot)
+                game.render()
+                title = game_registry.GAMES[index].title
+                screen.blit(render_text(f"观战: {title}  tick {stream.tick}", YELLOW, 20), (10, SCREEN_HEIGHT - 30))
+            display.present()
+    finally:
+        sock.close()
+
+
+# 负载测试中电脑输入使用的键
+LOAD_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+
+
+def run_viewers(host, port, count, connected, results):
+    """观众进程：建立 count 个连接，接收到 END 为止，把统计结果放入 results"""
+    async def viewer(reader, writer):
+        stream = SpectatorStream()
+        try:
+            while stream.verified is None:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                stream.feed(data)
+        finally:
+            writer.close()
+        return stream
+
+    async def main():
+        # 所有连接都建立之后再通知主机开始
+        connections = [await asyncio.open_connection(host, port) for _ in range(count)]
+        connected.set()
+        tasks = [viewer(reader, writer) for reader, writer in connections]
+        streams = await asyncio.gather(*tasks, return_exceptions=True)
+        ok = sum(1 for stream in streams if isinstance(stream, SpectatorStream) and stream.verified)
+        received = sum(stream.received_bytes for stream in streams if isinstance(stream, SpectatorStream))
+        errors = [repr(stream) for stream in streams if isinstance(stream, BaseException)]
+        results.put((ok, received, errors[:3]))
+
+    asyncio.run(main())
+
+
+def loadtest(game_index, viewers, seconds, seed=0):
+    """用电脑输入运行游戏 seconds 秒并广播给 viewers 个观众，返回所有观众是否都还原一致"""
+    broadcaster = SpectatorBroadcaster(0)
+    connected = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_viewers,
+                                      args=("127.0.0.1", broadcaster.port, viewers, connected, results))
+    process.start()
+    while not connected.wait(0.01):
+        broadcaster.accept()
+    broadcaster.accept()
+
+    sim_clock.reset()
+    key_state.clear()
+    game = game_registry.GAMES[game_index].create(seed)
+    rng = random.Random(seed)
+    ticks = int(seconds * FPS)
+    next_time = time.perf_counter()
+    publish_times = []
+    for tick in range(ticks):
+        if rng.random() < 0.1 or getattr(game, "game_over", False):
+            key = pygame.K_r if getattr(game, "game_over", False) else rng.choice(LOAD_KEYS)
+            for event_type in (pygame.KEYDOWN, pygame.KEYUP):
+                event = pygame.event.Event(event_type, key=key, mod=0, unicode="")
+                key_state.update(event)
+                game.handle_event(event)
+        game.update()
+        sim_clock.advance()
+        start = time.perf_counter()
+        broadcaster.publish(game_index, tick, game.pack_state())
+        publish_times.append(time.perf_counter() - start)
+        next_time += 1 / FPS
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+    broadcaster.end()
+    # 把剩下的积压发完
+    deadline = time.perf_counter() + 5
+    while any(viewer.queue for viewer in broadcaster.viewers) and time.perf_counter() < deadline:
+        broadcaster.flush_all()
+        time.sleep(0.01)
+    ok, received, errors = results.get()
+    process.join()
+    broadcaster.close()
+
+    publish_times.sort()
+    ms = 1000 / broadcaster.ticks
+    print(f"{viewers} 个观众: 每tick 编码 {broadcaster.encode_seconds * ms:.3f}ms, "
+          f"发送 {broadcaster.send_seconds * ms:.3f}ms（每个观众 {broadcaster.send_seconds * ms * 1000 / viewers:.1f}µs）, "
+          f"p99 {publish_times[len(publish_times) * 99 // 100] * 1000:.3f}ms; "
+          f"每条消息 {broadcaster.encoded_bytes / broadcaster.ticks:.1f} 字节（关键帧 {broadcaster.keyframes} 个）, "
+          f"每个观众 {received / viewers / seconds / 1024:.1f} KB/s; "
+          f"重新同步 {broadcaster.resyncs} 次; 还原一致 {ok}/{viewers}")
+    for error in errors:
+        print(f"  观众出错: {error}")
+    return ok == viewers
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, DEFAULT_PORT
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="观战广播")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--watch", metavar="HOST[:PORT]", help="连接主机观战")
+    mode.add_argument("--loadtest", action="store_true", help="在本机模拟大量观众，测量主机的开销")
+    parser.add_argument("--game", default="俄罗斯方块", help="负载测试运行的游戏")
+    parser.add_argument("--viewers", default="1,100,400", help="负载测试的观众数，逗号分隔")
+    parser.add_argument("--seconds", type=float, default=5.0, help="负载测试每轮的时长")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.loadtest:
+        game_index = game_registry.find(args.game)
+        if game_index is None:
+            parser.error(f"没有游戏 {args.game}")
+        ok = all([loadtest(game_index, int(count), args.seconds, args.seed)
+                  for count in args.viewers.split(",")])
+        return 0 if ok else 1
+    try:
+        watch(*parse_address(args.watch))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""猜数字的输入和存档"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from game_guess import GuessNumberGame
+from savegame import encode_save, decode_save, restore_save
+
+
+def type_text(game, text):
+    for char in text:
+        game.handle_event(pygame.event.Event(pygame.KEYDOWN, key=0, unicode=char, mod=0))
+
+
+def test_full_width_digits_are_saved_as_ascii():
+    game = GuessNumberGame(seed=1)
+    type_text(game, "４２")
+    assert game.current_guess == "42"
+
+    _, payload = decode_save(encode_save(0, game))
+    restored = GuessNumberGame(seed=2)
+    restore_save(restored, payload)
+    assert restored.current_guess == "42"
+    assert restored.target_number == game.target_number
+
+
+def test_non_digit_characters_are_ignored():
+    game = GuessNumberGame(seed=1)
+    type_text(game, "a½²7")
+    assert game.current_guess == "7"
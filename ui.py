@@ -0,0 +1,237 @@
+"""保留模式的界面控件
+
+菜单和游戏的信息栏由控件树组成，每个控件缓存自己绘制好的 Surface，
+内容不变时每帧只需要把缓存画到屏幕上。控件的内容改变时调用 invalidate，
+只有这个控件重新绘制，它所在的面板只重画它占据的区域，其他控件不受影响。
+
+    label = Label("分数: 0", YELLOW, 32, (20, 700))
+    label.set_text(f"分数: {score}")   # 文本没变时什么也不做
+    label.draw(screen)
+
+控件的 rect 使用父面板内的坐标，没有父面板时就是屏幕坐标。
+"""
+import pygame
+
+from game_common import render_text
+
+
+class Widget:
+    """控件基类：子类实现 layout（计算 rect）和 render（返回 rect 大小的 Surface）"""
+
+    def __init__(self):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.parent = None
+        self.visible = True
+        self.cache = None
+
+    def layout(self):
+        pass
+
+    def render(self):
+        raise NotImplementedError
+
+    def surface(self):
+        """缓存的绘制结果，失效后第一次用到时重新绘制"""
+        if self.cache is None:
+            self.cache = self.render()
+        return self.cache
+
+    def invalidate(self):
+        """内容改变后调用：丢弃缓存，重新计算位置，通知父面板重画新旧两个区域"""
+        old = self.rect.copy()
+        self.cache = None
+        self.layout()
+        if self.parent is not None:
+            self.parent.damage(old.union(self.rect))
+
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            if self.parent is not None:
+                self.parent.damage(self.rect)
+
+    def draw(self, target):
+        if self.visible:
+            target.blit(self.surface(), self.rect)
+
+
+class Label(Widget):
+    """一行文本，pos 按 anchor（如 "center"、"topleft"）对齐，可以带阴影"""
+
+    def __init__(self, text, color, size=None, pos=(0, 0), anchor="topleft", shadow=None,
+                 shadow_offset=3):
+        super().__init__()
+        self.text = text
+        self.color = color
+        self.size = size
+        self.pos = pos
+        self.anchor = anchor
+        self.shadow = shadow
+        self.shadow_offset = shadow_offset
+        self.shadow_surface = None
+        self.layout()
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.invalidate()
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self.invalidate()
+
+    def text_rect(self):
+        rect = render_text(self.text, self.color, self.size).get_rect()
+        setattr(rect, self.anchor, self.pos)
+        return rect
+
+    def layout(self):
+        self.rect = self.text_rect()
+        if self.shadow is not None:
+            self.rect.union_ip(self.rect.move(self.shadow_offset, self.shadow_offset))
+
+    def render(self):
+        # render_text 的结果是共享的，只用来绘制
+        if self.shadow is not None:
+            self.shadow_surface = render_text(self.text, self.shadow, self.size)
+        return render_text(self.text, self.color, self.size)
+
+    def draw(self, target):
+        if not self.visible:
+            return
+        text = self.surface()
+        if self.shadow is not None:
+            # 阴影和文字直接画到目标上，与逐次绘制的结果完全一致
+            target.blit(self.shadow_surface, self.rect.move(self.shadow_offset, self.shadow_offset))
+        target.blit(text, self.rect)
+
+
+class ListItem(Label):
+    """列表中的一项，文本居中于 pos，选中时画圆角高亮背景
+
+    高亮背景的大小固定，选中和取消选中不会改变 rect。
+    """
+
+    PADDING = (40, 15)
+
+    def __init__(self, text, color, size, pos, highlight):
+        self.selected = False
+        self.highlight = highlight
+        super().__init__(text, color, size, pos, "center")
+
+    def set_selected(self, selected, color):
+        if selected != self.selected or color != self.color:
+            self.selected = selected
+            self.color = color
+            self.invalidate()
+
+    def layout(self):
+        self.rect = self.text_rect().inflate(self.PADDING)
+
+    def render(self):
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        if self.selected:
+            pygame.draw.rect(surface, self.highlight, surface.get_rect(), 0, 10)
+        text = render_text(self.text, self.color, self.size)
+        surface.blit(text, text.get_rect(center=surface.get_rect().center))
+        return surface
+
+
+class Panel(Widget):
+    """控件容器：背景（图像、纯色或透明）加上子控件，合成结果缓存在一张 Surface 上
+
+    子控件改变时只在它的区域内重画背景和与这个区域相交的子控件。
+    """
+
+    def __init__(self, rect, color=None, background=None, border=None, radius=0, children=()):
+        super().__init__()
+        self.rect = pygame.Rect(rect)
+        self.color = color
+        self.background = background
+        self.border = border
+        self.radius = radius
+        self.children = []
+        self.dirty = []
+        for child in children:
+            self.add(child)
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        self.damage(child.rect)
+        return child
+
+    def damage(self, rect):
+        """标记面板内需要重画的区域，并通知上层面板"""
+        rect = rect.clip(self.rect.move(-self.rect.x, -self.rect.y))
+        if not rect:
+            return
+        if self.cache is not None:
+            self.dirty.append(rect)
+        if self.parent is not None:
+            self.parent.damage(rect.move(self.rect.topleft))
+
+    def invalidate(self):
+        self.dirty.clear()
+        super().invalidate()
+
+    def surface(self):
+        if self.cache is None:
+            opaque = self.background is not None or (self.color is not None and not self.radius)
+            self.cache = pygame.Surface(self.rect.size, 0 if opaque else pygame.SRCALPHA)
+            self.paint(self.cache.get_rect())
+            self.dirty.clear()
+        elif self.dirty:
+            for area in self.dirty:
+                self.paint(area)
+            self.dirty.clear()
+        return self.cache
+
+    def paint(self, area):
+        # 在 area 内重画背景和子控件，clip 让绘制不超出这个区域
+        surface = self.cache
+        surface.set_clip(area)
+        if self.background is not None:
+            surface.blit(self.background, (0, 0))
+        elif self.color is not None and not self.radius:
+            surface.fill(self.color)
+        else:
+            surface.fill((0, 0, 0, 0))
+            if self.color is not None:
+                pygame.draw.rect(surface, self.color, surface.get_rect(), 0, self.radius)
+        if self.border is not None:
+            pygame.draw.rect(surface, self.border, surface.get_rect(), 1, self.radius)
+        for child in self.children:
+            if child.visible and child.rect.colliderect(area):
+                child.draw(surface)
+        surface.set_clip(None)
+
+
+class ListView(Panel):
+    """纵向排列、水平居中的文本列表，选中项高亮
+
+    rect 为整个列表占据的区域，第一项的中心在 rect 顶部向下 spacing // 2 处。
+    """
+
+    def __init__(self, rect, items, size, spacing, color, selected_color, highlight):
+        super().__init__(rect)
+        self.color_normal = color
+        self.color_selected = selected_color
+        self.selected = None
+        center_x = self.rect.width // 2
+        for i, text in enumerate(items):
+            self.add(ListItem(text, color, size, (center_x, spacing // 2 + i * spacing), highlight))
+
+    def set_items(self, items):
+        for item, text in zip(self.children, items):
+            item.set_text(text)
+
+    def set_selected(self, index):
+        if index == self.selected:
+            return
+        for i in (self.selected, index):
+            if i is not None:
+                color = self.color_selected if i == index else self.color_normal
+                self.children[i].set_selected(i == index, color)
+        self.selected = index
@@ -0,0 +1,531 @@
+"""双人俄罗斯方块对战（确定性锁步）
+
+两名玩家的方块序列相同（同一个种子），一次消除2/3/4行给对手送去1/2/4行垃圾行，
+垃圾行在对手下一个方块出现前从底部顶上来，同一批垃圾行的缺口在同一列。
+
+双方都在本地模拟两个棋盘，通过TCP只交换每个tick的按键：每条消息为tick的
+低16位和5个键的位图，共3字节。本地按键安排在 INPUT_DELAY 个tick之后执行，
+这段时间用来等对方的输入到达；某个tick的两份输入都到齐了才模拟这个tick，
+所以双方的棋盘始终完全相同，不需要回滚。对方的输入来迟时画面停住等待。
+
+    python versus_tetris.py --host --port 5006
+    python versus_tetris.py --connect 192.168.1.10:5006
+    python versus_tetris.py --soak --matches 20
+
+--soak 在本机通过TCP运行多局电脑对战，每 CHECKPOINT_TICKS 个tick比较双方
+的状态摘要，报告每个tick的流量和等待次数，全部一致时返回0。
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import socket
+import struct
+import sys
+import time
+
+import pygame
+
+from game_tetris import TetrisGame
+from game_common import SimClock, KeyState, SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WHITE, YELLOW, RED, render_text
+from ui import Label
+
+DEFAULT_PORT = 5006
+# 本地输入延迟执行的tick数
+INPUT_DELAY = 4
+# 每隔多少tick比较一次状态摘要
+CHECKPOINT_TICKS = 60
+# 按键位图中各位对应的键
+INPUT_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+# 一次消除的行数对应送给对手的垃圾行数
+GARBAGE_LINES = (0, 0, 1, 2, 4)
+GARBAGE_COLOR = (110, 110, 110)
+
+# 开局握手（主机 -> 客户端）：标识、版本、种子、输入延迟
+HANDSHAKE = struct.Struct("<4sBQB")
+MAGIC = b"TTVS"
+PROTOCOL_VERSION = 1
+# 每个tick的输入：tick的低16位、按键位图
+MESSAGE = struct.Struct("<HB")
+
+
+class DesyncError(Exception):
+    """对方的输入顺序不对，双方的状态已经无法保证一致"""
+
+
+class VersusTetrisGame(TetrisGame):
+    """对战中的一个棋盘：使用自己的时钟和按键状态，按输入位图前进，可以接收垃圾行
+
+    effects 为False时不创建粒子系统，用于不显示的棋盘。
+    """
+
+    def __init__(self, seed, garbage_seed, side=0, effects=True):
+        self.side = side
+        self.clock = SimClock()
+        self.keys = KeyState()
+        self.garbage_rng = random.Random(garbage_seed)
+        super().__init__(seed, effects)
+        self.score_label = Label("分数: 0", WHITE, 28, (self.board_x, self.board_y + 615))
+        self.garbage_label = Label("", RED, 24, (self.board_x + 180, self.board_y + 619))
+
+    def reset(self):
+        super().reset()
+        # 左右两个棋盘，预览在各自棋盘的右侧
+        self.board_x = 60 if self.side == 0 else 560
+        self.colors.append(GARBAGE_COLOR)
+        self.pending_garbage = 0
+        self.lines = 0
+        self.input_mask = 0
+
+    def restart(self, seed, garbage_seed):
+        """用新的种子重新开始一局，复用这个棋盘对象"""
+        self.rng.seed(seed)
+        self.garbage_rng.seed(garbage_seed)
+        self.clock.reset()
+        self.keys.clear()
+        self.reset()
+
+    def clear_lines(self):
+        lines_cleared = super().clear_lines()
+        self.lines += lines_cleared
+        return lines_cleared
+
+    def spawn_new_piece(self):
+        if self.pending_garbage:
+            self.insert_garbage(self.pending_garbage)
+            self.pending_garbage = 0
+        if not self.game_over:
+            super().spawn_new_piece()
+
+    def insert_garbage(self, rows):
+        """从底部加入 rows 行垃圾行，顶部有方块被挤出棋盘时游戏结束"""
+        rows = min(rows, self.board_height)
+        hole = self.garbage_rng.randrange(self.board_width)
+        if any(any(row) for row in self.board[:rows]):
+            self.game_over = True
+        del self.board[:rows]
+        garbage = len(self.colors) - 1
+        for _ in range(rows):
+            row = [garbage] * self.board_width
+            row[hole] = 0
+            self.board.append(row)
+
+    def apply_input(self, mask):
+        """把这个tick的按键位图转换为按下和松开事件，然后前进一个tick"""
+        changed = mask ^ self.input_mask
+        for bit, key in enumerate(INPUT_KEYS):
+            if changed >> bit & 1:
+                event_type = pygame.KEYDOWN if mask >> bit & 1 else pygame.KEYUP
+                event = pygame.event.Event(event_type, key=key, mod=0)
+                self.keys.update(event)
+                self.handle_event(event)
+        self.input_mask = mask
+        self.step()
+        self.clock.advance()
+
+    def pack_state(self):
+        # 在单人快照之后加上等待的垃圾行、消除的行数和按键位图
+        return super().pack_state() + struct.pack("<BIB", self.pending_garbage, self.lines, self.input_mask)
+
+    def draw_versus(self, screen):
+        self.draw_board()
+        self.draw_preview(self.board_x + self.board_width * self.cell_size + 20, self.board_y + 10)
+        self.score_label.set_text(f"分数: {self.score}")
+        self.garbage_label.set_text(f"垃圾行 +{self.pending_garbage}" if self.pending_garbage else "")
+        self.score_label.draw(screen)
+        self.garbage_label.draw(screen)
+
+
+class VersusMatch:
+    """一局对战：两个棋盘按双方的输入一起前进，消除的行变为对手的垃圾行"""
+
+    def __init__(self, seed, effects=True):
+        self.seed = seed
+        self.games = [VersusTetrisGame(seed, f"{seed}:garbage:{side}", side, effects)
+                      for side in range(2)]
+        self.lines_sent = [0, 0]
+        self.tick = 0
+
+    def step(self, masks):
+        for game, mask in zip(self.games, masks):
+            game.apply_input(mask)
+        for side, game in enumerate(self.games):
+            if game.lines != self.lines_sent[side]:
+                cleared = game.lines - self.lines_sent[side]
+                self.lines_sent[side] = game.lines
+                self.games[1 - side].pending_garbage += GARBAGE_LINES[min(cleared, 4)]
+        self.tick += 1
+
+    @property
+    def finished(self):
+        return any(game.game_over for game in self.games)
+
+    @property
+    def winner(self):
+        """获胜的一方；还没结束或同时失败时为None"""
+        alive = [side for side, game in enumerate(self.games) if not game.game_over]
+        return alive[0] if len(alive) == 1 else None
+
+    def digest(self):
+        sha = hashlib.sha1(struct.pack("<I", self.tick))
+        for game in self.games:
+            sha.update(game.pack_state())
+        return sha.digest()
+
+
+class LockstepPeer:
+    """对战的一方：发送本地输入，某个tick的双方输入都到齐后推进 match
+
+    controller(game) 返回本地玩家这个tick的按键位图，game 为本地玩家的棋盘。
+    """
+
+    def __init__(self, match, side, reader, writer, controller, input_delay=INPUT_DELAY):
+        self.match = match
+        self.side = side
+        self.reader = reader
+        self.writer = writer
+        self.controller = controller
+        self.input_delay = input_delay
+        # 双方每个tick的输入；最开始的 input_delay 个tick双方都没有按键
+        self.inputs = [dict.fromkeys(range(input_delay), 0) for _ in range(2)]
+        self.next_send = input_delay
+        self.next_receive = input_delay
+        self.arrived = asyncio.Event()
+        self.closed = False
+        self.checkpoints = []
+        self.sent_bytes = 0
+        self.stalls = 0
+
+    def send_inputs(self):
+        """采样本地输入并发送，直到 当前tick + input_delay"""
+        while self.next_send <= self.match.tick + self.input_delay:
+            mask = self.controller(self.match.games[self.side])
+            self.inputs[self.side][self.next_send] = mask
+            self.writer.write(MESSAGE.pack(self.next_send & 0xFFFF, mask))
+            self.sent_bytes += MESSAGE.size
+            self.next_send += 1
+
+    async def receive(self):
+        """读取对方的输入，直到连接关闭"""
+        try:
+            while True:
+                low, mask = MESSAGE.unpack(await self.reader.readexactly(MESSAGE.size))
+                if low != self.next_receive & 0xFFFF:
+                    raise DesyncError(f"期望tick {self.next_receive}，收到 {low}")
+                self.inputs[1 - self.side][self.next_receive] = mask
+                self.next_receive += 1
+                self.arrived.set()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+            self.arrived.set()
+
+    def advance(self):
+        """双方的输入都到齐时前进一个tick，返回是否前进了"""
+        self.send_inputs()
+        tick = self.match.tick
+        if tick not in self.inputs[1 - self.side]:
+            self.stalls += 1
+            return False
+        self.match.step((self.inputs[0].pop(tick), self.inputs[1].pop(tick)))
+        if self.match.tick % CHECKPOINT_TICKS == 0:
+            self.checkpoints.append(self.match.digest())
+        return True
+
+    async def run(self, max_ticks):
+        """不限帧率地运行到对局结束或 max_ticks，用于无界面的测试"""
+        while not self.match.finished and self.match.tick < max_ticks:
+            if self.advance():
+                continue
+            await self.writer.drain()
+            if self.closed:
+                break
+            self.arrived.clear()
+            if self.match.tick not in self.inputs[1 - self.side]:
+                await self.arrived.wait()
+        self.checkpoints.append(self.match.digest())
+        await self.writer.drain()
+
+
+def set_nodelay(writer):
+    # 每条消息只有3字节，关闭Nagle算法，不等攒够数据再发送
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+async def open_host(host, port):
+    """开始监听，返回 (服务器, future)；future 的结果为第一个连接的 (reader, writer)"""
+    connected = asyncio.get_running_loop().create_future()
+
+    def on_connect(reader, writer):
+        if connected.done():
+            writer.close()
+        else:
+            set_nodelay(writer)
+            connected.set_result((reader, writer))
+
+    server = await asyncio.start_server(on_connect, host, port)
+    return server, connected
+
+
+def send_handshake(writer, seed, input_delay):
+    writer.write(HANDSHAKE.pack(MAGIC, PROTOCOL_VERSION, seed, input_delay))
+
+
+async def connect_peer(host, port):
+    """连接主机并读取握手，返回 (reader, writer, 种子, 输入延迟)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    set_nodelay(writer)
+    magic, version, seed, input_delay = HANDSHAKE.unpack(await reader.readexactly(HANDSHAKE.size))
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        writer.close()
+        raise ConnectionError("对方不是同一版本的对战程序")
+    return reader, writer, seed, input_delay
+
+
+def rotate_shape(shape):
+    # 与 TetrisGame.rotate 相同的顺时针旋转
+    rows, cols = len(shape), len(shape[0])
+    return [[shape[rows - j - 1][i] for j in range(rows)] for i in range(cols)]
+
+
+def fits(board, shape, x, y):
+    for i, row in enumerate(shape):
+        for j, cell in enumerate(row):
+            if cell:
+                if x + j < 0 or x + j >= len(board[0]) or y + i >= len(board):
+                    return False
+                if y + i >= 0 and board[y + i][x + j]:
+                    return False
+    return True
+
+
+def evaluate(board):
+    """放置后棋盘的评分：消除的行多、高度低、空洞少、表面平整为好"""
+    height, width = len(board), len(board[0])
+    rows = [row for row in board if not all(row)]
+    cleared = height - len(rows)
+    heights = [0] * width
+    holes = 0
+    for j in range(width):
+        top = None
+        for i, row in enumerate(rows):
+            if row[j]:
+                if top is None:
+                    top = i
+            elif top is not None:
+                holes += 1
+        if top is not None:
+            heights[j] = len(rows) - top
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return 0.76 * cleared - 0.51 * sum(heights) - 0.36 * holes - 0.18 * bumpiness
+
+
+def plan_placement(game, noise, rng):
+    """为当前方块选择位置，返回 (旋转次数, 目标x)"""
+    piece = game.current_piece
+    best = None
+    shape = piece['shape']
+    for rotations in range(4):
+        for x in range(-1, game.board_width):
+            if not fits(game.board, shape, x, piece['y']):
+                continue
+            y = piece['y']
+            while fits(game.board, shape, x, y + 1):
+                y += 1
+            board = [row[:] for row in game.board]
+            for i, row in enumerate(shape):
+                for j, cell in enumerate(row):
+                    if cell and y + i >= 0:
+                        board[y + i][x + j] = 1
+            score = evaluate(board) + rng.uniform(0, noise)
+            if best is None or score > best[0]:
+                best = (score, rotations, x)
+        shape = rotate_shape(shape)
+    if best is None:
+        return 0, piece['x']
+    return best[1], best[2]
+
+
+def bot_controller(seed, noise=0.5):
+    """电脑玩家：为每个方块选好位置，依次点按旋转、左右移动，最后硬降
+
+    输入要在 input_delay 个tick之后才生效，所以按键序列在看到新方块时一次
+    排好，不根据还没反映出按键效果的棋盘逐步调整。noise 越大越容易放错位置。
+    """
+    rng = random.Random(seed)
+    plan = {"piece": None, "taps": []}
+    up, left, right, space = (1 << INPUT_KEYS.index(key) for key in
+                              (pygame.K_UP, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE))
+
+    def controller(game):
+        piece = game.current_piece
+        if game.game_over:
+            return 0
+        if piece is not plan["piece"]:
+            plan["piece"] = piece
+            rotations, x = plan_placement(game, noise, rng)
+            shift = right if x > piece['x'] else left
+            taps = [up] * rotations + [shift] * abs(x - piece['x']) + [space]
+            # 每次按键后松开一个tick，下一次才是新的按下
+            plan["taps"] = [mask for tap in reversed(taps) for mask in (0, tap)]
+        return plan["taps"].pop() if plan["taps"] else 0
+    return controller
+
+
+def keyboard_controller(game):
+    keys = pygame.key.get_pressed()
+    mask = 0
+    for bit, key in enumerate(INPUT_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+
+async def soak(matches=20, max_ticks=3 * 60 * FPS, seed=0, input_delay=INPUT_DELAY):
+    """在本机通过TCP运行多局电脑对战，返回双方的状态摘要是否始终一致"""
+    rng = random.Random(seed)
+    total_ticks = 0
+    total_bytes = 0
+    total_stalls = 0
+    desyncs = 0
+    start = time.perf_counter()
+    for index in range(matches):
+        match_seed = rng.getrandbits(64)
+        server, connected = await open_host("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client_task = asyncio.ensure_future(connect_peer("127.0.0.1", port))
+        host_reader, host_writer = await connected
+        send_handshake(host_writer, match_seed, input_delay)
+        client_reader, client_writer, client_seed, client_delay = await client_task
+
+        peers = [
+            LockstepPeer(VersusMatch(match_seed, effects=False), 0, host_reader, host_writer,
+                         bot_controller(f"{match_seed}:0"), input_delay),
+            LockstepPeer(VersusMatch(client_seed, effects=False), 1, client_reader, client_writer,
+                         bot_controller(f"{match_seed}:1"), client_delay),
+        ]
+        receivers = [asyncio.ensure_future(peer.receive()) for peer in peers]
+        await asyncio.gather(*(peer.run(max_ticks) for peer in peers))
+        for peer in peers:
+            peer.writer.close()
+        await asyncio.gather(*receivers)
+        server.close()
+        await server.wait_closed()
+
+        host, client = peers
+        same = host.checkpoints == client.checkpoints
+        desyncs += not same
+        winner = host.match.winner
+        if not host.match.finished:
+            result = "未分胜负"
+        elif winner is None:
+            result = "同时失败"
+        else:
+            result = f"玩家 {winner + 1} 获胜"
+        lines = [game.lines for game in host.match.games]
+        print(f"第 {index + 1} 局: {host.match.tick} tick, {result}, 消除 {lines[0]}/{lines[1]} 行, "
+              f"比较 {len(host.checkpoints)} 次 {'一致' if same else '不一致！'}")
+        total_ticks += host.match.tick
+        total_bytes += host.sent_bytes + client.sent_bytes
+        total_stalls += host.stalls + client.stalls
+    elapsed = time.perf_counter() - start
+    print(f"共 {matches} 局 {total_ticks} tick，用时 {elapsed:.1f}s（{total_ticks / elapsed:.0f} tick/s）；"
+          f"每名玩家每tick发送 {total_bytes / max(1, 2 * total_ticks):.2f} 字节，"
+          f"等待输入 {total_stalls} 次；状态不一致 {desyncs} 局")
+    return desyncs == 0
+
+
+async def play(reader, writer, seed, input_delay, side):
+    """图形界面：以 FPS 帧率推进，对方的输入没到时画面停住；ESC或关闭窗口退出"""
+    from game_common import display, screen
+    match = VersusMatch(seed)
+    peer = LockstepPeer(match, side, reader, writer, keyboard_controller, input_delay)
+    receiver = asyncio.ensure_future(peer.receive())
+    loop = asyncio.get_running_loop()
+    pygame.display.set_caption("俄罗斯方块 - 双人对战")
+    names = ["你", "对手"] if side == 0 else ["对手", "你"]
+    next_time = loop.time()
+    try:
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return
+            if not match.finished and not peer.advance() and peer.closed:
+                break
+            await writer.drain()
+
+            screen.fill((0, 0, 0))
+            for game, name in zip(match.games, names):
+                game.draw_versus(screen)
+                screen.blit(render_text(name, YELLOW, 28), (game.board_x, 10))
+            if match.finished:
+                winner = match.winner
+                text = "平局" if winner is None else f"{names[winner]}赢了！"
+                screen.blit(render_text(f"{text}  按ESC退出", RED, 40), (SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2))
+            screen.blit(render_text(f"tick {match.tick}  等待 {peer.stalls}", WHITE, 20), (10, SCREEN_HEIGHT - 30))
+            display.present()
+
+            next_time += 1 / FPS
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+    finally:
+        writer.close()
+        receiver.cancel()
+
+
+async def host_game(port, seed=None, input_delay=INPUT_DELAY):
+    from game_common import display, screen
+    server, connected = await open_host("0.0.0.0", port)
+    print(f"等待对手连接，端口 {port}")
+    screen.fill((0, 0, 0))
+    screen.blit(render_text("等待对手加入...", WHITE, 32), (SCREEN_WIDTH // 2 - 120, SCREEN_HEIGHT // 2))
+    display.present()
+    reader, writer = await connected
+    server.close()
+    seed = random.getrandbits(64) if seed is None else seed
+    send_handshake(writer, seed, input_delay)
+    await play(reader, writer, seed, input_delay, 0)
+
+
+async def join_game(host, port):
+    reader, writer, seed, input_delay = await connect_peer(host, port)
+    await play(reader, writer, seed, input_delay, 1)
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, DEFAULT_PORT
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="双人俄罗斯方块对战")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--host", action="store_true", help="等待对手连接")
+    mode.add_argument("--connect", metavar="HOST[:PORT]", help="连接主机并开始对战")
+    mode.add_argument("--soak", action="store_true", help="在本机运行多局电脑对战，检查双方状态一致")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--delay", type=int, default=INPUT_DELAY, help="本地输入延迟执行的tick数")
+    parser.add_argument("--matches", type=int, default=20, help="--soak 的局数")
+    parser.add_argument("--max-ticks", type=int, default=3 * 60 * FPS, help="--soak 每局的最多tick数")
+    args = parser.parse_args()
+
+    if args.soak:
+        ok = asyncio.run(soak(args.matches, args.max_ticks, args.seed or 0, args.delay))
+        return 0 if ok else 1
+    try:
+        if args.host:
+            asyncio.run(host_game(args.port, args.seed, args.delay))
+        else:
+            asyncio.run(join_game(*parse_address(args.connect)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
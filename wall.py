@@ -0,0 +1,457 @@
+"""观战墙：网格中同时显示许多由电脑玩的游戏
+
+棋盘在工作进程中模拟（每个进程负责一部分棋盘，以 FPS 的频率前进），每个棋盘
+把格子（颜色编号或2048的指数）和分数写入共享内存。主进程不运行任何游戏逻辑，
+每帧只读取改变了的棋盘，把格子写进一张每格一个像素的8位调色板 Surface，
+放大到这个棋盘自己的 subsurface 上，再盖上网格线和分数。
+
+共享内存中每个棋盘有一个序号：工作进程写之前加1（变为奇数），写完再加1；主进程
+读到奇数或读取前后序号不同时说明正在写，保留上一帧的内容，下一帧再读。
+序号没变的棋盘不重新绘制。
+
+    python wall.py --boards 16
+    python wall.py --game 2048 --boards 36
+    python wall.py --bench --boards 16,32,64 --seconds 5
+
+--bench 无界面地依次运行各个棋盘数，报告主进程每帧的耗时（读取、合成和显示）、
+每帧重画的棋盘数和工作进程实际达到的tick频率。
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pygame
+
+import bench
+from ai_2048 import ExpectimaxSearch, legal_moves, spawn_random
+from versus_tetris import VersusTetrisGame, bot_controller
+from ui import Label
+from game_common import display, screen, SCREEN_HEIGHT, FPS, WHITE, YELLOW, render_text
+
+# 每个棋盘的信息：写入序号、分数、已前进的tick数、是否结束
+SEQ, SCORE, TICKS, OVER = range(4)
+INFO_FIELDS = 4
+# 结束的棋盘停留多少tick后开始新的一局
+RESTART_TICKS = 2 * FPS
+# 2048 每隔多少tick走一步，以及电脑搜索的深度
+MOVE_TICKS_2048 = 8
+SEARCH_DEPTH_2048 = 1
+# 棋盘上方分数栏的高度
+HEADER_HEIGHT = 16
+# 棋盘之间的间距
+MARGIN = 6
+BACKGROUND = (20, 20, 30)
+EMPTY_COLOR = (35, 35, 45)
+GRID_COLOR = (0, 0, 0)
+
+
+class TetrisBoard:
+    """工作进程中的一个俄罗斯方块棋盘，由 versus_tetris 的电脑玩家控制"""
+
+    ROWS = 20
+    COLS = 10
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.cells = np.zeros((self.ROWS, self.COLS), np.uint8)
+        self.game = None
+        self.new_game()
+
+    def new_game(self):
+        seed = self.rng.getrandbits(64)
+        if self.game is None:
+            self.game = VersusTetrisGame(seed, seed, effects=False)
+        else:
+            self.game.restart(seed, seed)
+        self.controller = bot_controller(seed, noise=self.rng.uniform(0.5, 3.0))
+        self.waited = 0
+
+    @property
+    def score(self):
+        return self.game.score
+
+    @property
+    def game_over(self):
+        return self.game.game_over
+
+    def step(self):
+        """前进一个tick，返回格子或分数是否改变"""
+        game = self.game
+        if game.game_over:
+            self.waited += 1
+            if self.waited < RESTART_TICKS:
+                return False
+            self.new_game()
+            game = self.game
+        else:
+            score = game.score
+            piece = game.current_piece
+            position = (piece['x'], piece['y'], piece['shape'])
+            game.apply_input(self.controller(game))
+            if (game.current_piece is piece and score == game.score and not game.game_over
+                    and position == (piece['x'], piece['y'], piece['shape'])):
+                return False
+        # 棋盘加上当前方块
+        cells = self.cells
+        cells[:] = game.board
+        piece = game.current_piece
+        for i, row in enumerate(piece['shape']):
+            for j, cell in enumerate(row):
+                if cell and piece['y'] + i >= 0:
+                    cells[piece['y'] + i, piece['x'] + j] = piece['color']
+        return True
+
+
+class Board2048:
+    """工作进程中的一个2048棋盘，每 MOVE_TICKS_2048 个tick用 expectimax 走一步"""
+
+    ROWS = 4
+    COLS = 4
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.cells = np.zeros((self.ROWS, self.COLS), np.uint8)
+        self.new_game()
+
+    def new_game(self):
+        board = tuple(tuple(0 for _ in range(self.COLS)) for _ in range(self.ROWS))
+        self.board = spawn_random(spawn_random(board, self.rng), self.rng)
+        self.score = 0
+        self.game_over = False
+        self.waited = 0
+        self.cells[:] = self.board
+
+    def step(self):
+        self.waited += 1
+        if self.game_over:
+            if self.waited >= RESTART_TICKS:
+                self.new_game()
+                return True
+            return False
+        if self.waited < MOVE_TICKS_2048:
+            return False
+        self.waited = 0
+        search = ExpectimaxSearch()
+        best = None
+        for _, board, gained in legal_moves(self.board):
+            value = gained + search.chance_node(board, SEARCH_DEPTH_2048, 1.0)
+            if best is None or value > best[0]:
+                best = (value, board, gained)
+        if best is None:
+            self.game_over = True
+            return True
+        self.board = spawn_random(best[1], self.rng)
+        self.score += best[2]
+        self.cells[:] = self.board
+        return True
+
+
+BOARD_TYPES = {"俄罗斯方块": TetrisBoard, "2048": Board2048}
+
+
+def shared_arrays(buffer, kind, count):
+    """在共享内存上建立 (info, cells) 两个数组"""
+    board_type = BOARD_TYPES[kind]
+    info = np.ndarray((count, INFO_FIELDS), np.int64, buffer)
+    cells = np.ndarray((count, board_type.ROWS, board_type.COLS), np.uint8, buffer, info.nbytes)
+    return info, cells
+
+
+def shared_size(kind, count):
+    board_type = BOARD_TYPES[kind]
+    return count * (INFO_FIELDS * 8 + board_type.ROWS * board_type.COLS)
+
+
+def run_worker(name, kind, count, indices, seed, stop):
+    """工作进程：以 FPS 的频率推进 indices 中的棋盘，把改变写入共享内存"""
+    shm = SharedMemory(name=name)
+    info, cells = shared_arrays(shm.buf, kind, count)
+    try:
+        boards = [BOARD_TYPES[kind](f"{seed}:{index}") for index in indices]
+        for index, board in zip(indices, boards):
+            publish(info, cells, index, board)
+        next_time = time.perf_counter()
+        while not stop.is_set():
+            for index, board in zip(indices, boards):
+                if board.step():
+                    publish(info, cells, index, board)
+                info[index, TICKS] += 1
+            next_time += 1 / FPS
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 落后时不追赶，tick频率的下降会反映在统计中
+                next_time = time.perf_counter()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del info, cells
+        shm.close()
+
+
+def publish(info, cells, index, board):
+    # 写入期间序号为奇数
+    info[index, SEQ] += 1
+    cells[index] = board.cells
+    info[index, SCORE] = board.score
+    info[index, OVER] = board.game_over
+    info[index, SEQ] += 1
+
+
+def grid_layout(count, rows, cols, width, height):
+    """选择使格子最大的行列数，返回 (每格像素, 网格列数, 网格行数)"""
+    best = None
+    for grid_cols in range(1, count + 1):
+        grid_rows = math.ceil(count / grid_cols)
+        cell_width = (width - MARGIN) // grid_cols - MARGIN
+        cell_height = (height - MARGIN) // grid_rows - MARGIN - HEADER_HEIGHT
+        cell = min(cell_width // cols, cell_height // rows)
+        if best is None or cell > best[0]:
+            best = (cell, grid_cols, grid_rows)
+    return best
+
+
+class WallBoard:
+    """主进程中一个棋盘的显示：自己的 subsurface、格子的本地副本和调色板图像"""
+
+    def __init__(self, target, rect, rows, cols, cell, palette, grid):
+        self.surface = target.subsurface(rect)
+        self.cells = np.zeros((rows, cols), np.uint8)
+        self.seq = -1
+        self.score = 0
+        self.game_over = False
+        # 每格一个像素的8位图像，放大后得到整个棋盘
+        self.pixels = pygame.Surface((cols, rows), 0, 8)
+        self.pixels.set_palette(palette)
+        self.scaled = pygame.Surface((cols * cell, rows * cell), 0, 8)
+        self.scaled.set_palette(palette)
+        self.grid = grid
+        self.label = Label("0", WHITE, HEADER_HEIGHT, (0, 0))
+
+
+class SpectatorWall:
+    """主进程：读取共享内存，把改变了的棋盘合成到 target 上"""
+
+    def __init__(self, target, kind, count, info, cells):
+        self.target = target
+        self.kind = kind
+        self.info = info
+        self.shared_cells = cells
+        board_type = BOARD_TYPES[kind]
+        rows, cols = board_type.ROWS, board_type.COLS
+        width, height = target.get_size()
+        cell, grid_cols, grid_rows = grid_layout(count, rows, cols, width, height - 24)
+        self.cell = cell
+        palette = self.palette()
+        grid = pygame.Surface((cols * cell, rows * cell), pygame.SRCALPHA)
+        for i in range(rows + 1):
+            pygame.draw.line(grid, GRID_COLOR, (0, i * cell), (cols * cell, i * cell))
+        for j in range(cols + 1):
+            pygame.draw.line(grid, GRID_COLOR, (j * cell, 0), (j * cell, rows * cell))
+
+        board_width = cols * cell
+        board_height = rows * cell + HEADER_HEIGHT
+        left = (width - grid_cols * (board_width + MARGIN) + MARGIN) // 2
+        self.boards = []
+        for index in range(count):
+            x = left + index % grid_cols * (board_width + MARGIN)
+            y = MARGIN + index // grid_cols * (board_height + MARGIN)
+            self.boards.append(WallBoard(target, (x, y, board_width, board_height),
+                                         rows, cols, cell, palette, grid))
+        target.fill(BACKGROUND)
+
+    def palette(self):
+        """调色板：俄罗斯方块为颜色编号对应的颜色，2048为指数对应的格子颜色"""
+        palette = [EMPTY_COLOR] * 256
+        if self.kind == "2048":
+            from game_2048 import Game2048
+            for exponent in range(1, 18):
+                palette[exponent] = Game2048.get_cell_color(1 << exponent)
+        else:
+            colors = VersusTetrisGame(0, 0, effects=False).colors
+            palette[1:len(colors)] = colors[1:]
+        return palette
+
+    def sync(self):
+        """从共享内存复制改变了的棋盘，返回这些棋盘"""
+        info = self.info
+        dirty = []
+        for index, board in enumerate(self.boards):
+            seq = int(info[index, SEQ])
+            if seq == board.seq or seq & 1:
+                continue
+            np.copyto(board.cells, self.shared_cells[index])
+            score = int(info[index, SCORE])
+            game_over = bool(info[index, OVER])
+            if int(info[index, SEQ]) != seq:
+                # 复制期间工作进程写入了新内容，下一帧再读
+                continue
+            board.seq = seq
+            board.score = score
+            board.game_over = game_over
+            dirty.append(board)
+        return dirty
+
+    def draw(self, dirty):
+        for board in dirty:
+            surface = board.surface
+            surface.fill(BACKGROUND)
+            pygame.surfarray.blit_array(board.pixels, board.cells.T)
+            pygame.transform.scale(board.pixels, board.scaled.get_size(), board.scaled)
+            surface.blit(board.scaled, (0, HEADER_HEIGHT))
+            surface.blit(board.grid, (0, HEADER_HEIGHT))
+            if self.kind == "2048":
+                self.draw_numbers(board)
+            board.label.set_text(f"{board.score}  结束" if board.game_over else str(board.score))
+            board.label.set_color(YELLOW if board.game_over else WHITE)
+            board.label.draw(surface)
+
+    def draw_numbers(self, board):
+        # 格子足够大时在2048的格子上写数字
+        size = self.cell * 2 // 5
+        if size < 10:
+            return
+        for (i, j), exponent in np.ndenumerate(board.cells):
+            if exponent:
+                value = 1 << int(exponent)
+                text = render_text(str(value), (119, 110, 101) if value < 8 else (249, 246, 242), size)
+                center = ((j + 0.5) * self.cell, HEADER_HEIGHT + (i + 0.5) * self.cell)
+                board.surface.blit(text, text.get_rect(center=center))
+
+    def ticks(self):
+        return int(self.info[:, TICKS].sum())
+
+
+class WallProcesses:
+    """共享内存和工作进程，with 语句结束时停止进程并释放共享内存"""
+
+    def __init__(self, kind, count, workers, seed=0):
+        self.shm = SharedMemory(create=True, size=shared_size(kind, count))
+        self.info, self.cells = shared_arrays(self.shm.buf, kind, count)
+        self.info[:] = 0
+        self.stop = multiprocessing.Event()
+        self.processes = []
+        # 用 spawn 方式启动的工作进程会重新导入本模块，不能让它们打开窗口
+        driver = os.environ.get("SDL_VIDEODRIVER")
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        try:
+            for worker in range(workers):
+                indices = list(range(worker, count, workers))
+                if not indices:
+                    continue
+                process = multiprocessing.Process(target=run_worker, daemon=True,
+                                                  args=(self.shm.name, kind, count, indices, seed, self.stop))
+                process.start()
+                self.processes.append(process)
+        finally:
+            if driver is None:
+                del os.environ["SDL_VIDEODRIVER"]
+            else:
+                os.environ["SDL_VIDEODRIVER"] = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for process in self.processes:
+            process.join(2)
+            if process.is_alive():
+                process.terminate()
+        del self.info, self.cells
+        self.shm.close()
+        self.shm.unlink()
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1))
+
+
+def run_wall(kind, count, workers, seed=0):
+    """图形界面：ESC或关闭窗口退出，左下角显示帧时间"""
+    pygame.display.set_caption(f"观战墙 - {count} 个{kind}")
+    clock = pygame.time.Clock()
+    with WallProcesses(kind, count, workers, seed) as processes:
+        wall = SpectatorWall(screen, kind, count, processes.info, processes.cells)
+        status = Label("", WHITE, 18, (10, SCREEN_HEIGHT - 22))
+        frame_ms = 0.0
+        while True:
+            clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    return
+            start = time.perf_counter()
+            wall.draw(wall.sync())
+            screen.fill(BACKGROUND, status.rect)
+            status.set_text(f"{count} 个棋盘  {workers} 个工作进程  合成 {frame_ms:.2f}ms  {clock.get_fps():.0f} FPS")
+            status.draw(screen)
+            display.present()
+            frame_ms = frame_ms * 0.9 + (time.perf_counter() - start) * 1000 * 0.1
+
+
+def run_bench(kind, counts, workers, seconds, seed=0):
+    """依次运行各个棋盘数，返回每项的统计"""
+    results = []
+    for count in counts:
+        with WallProcesses(kind, count, workers, seed) as processes:
+            wall = SpectatorWall(screen, kind, count, processes.info, processes.cells)
+            # 等所有工作进程写入第一帧
+            while int((processes.info[:, SEQ] == 0).sum()):
+                time.sleep(0.01)
+            wall.draw(wall.sync())
+            display.present()
+            frames = int(seconds * FPS)
+            times = []
+            redrawn = 0
+            start_ticks = wall.ticks()
+            start = time.perf_counter()
+            next_time = start
+            for _ in range(frames):
+                frame_start = time.perf_counter()
+                dirty = wall.sync()
+                wall.draw(dirty)
+                display.present()
+                times.append(time.perf_counter() - frame_start)
+                redrawn += len(dirty)
+                next_time += 1 / FPS
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+            elapsed = time.perf_counter() - start
+            tick_rate = (wall.ticks() - start_ticks) / elapsed / count
+        stats = bench.summarize(times)
+        results.append({"boards": count, "frame": stats, "redrawn": redrawn / frames, "tick_rate": tick_rate})
+        print(f"{count:3d} 个棋盘: 每帧 平均 {stats['mean']:.2f}ms p99 {stats['p99']:.2f}ms "
+              f"最大 {stats['max']:.2f}ms, 每帧重画 {redrawn / frames:.1f} 个棋盘, "
+              f"工作进程 {tick_rate:.1f} tick/s（目标 {FPS}）")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="观战墙：同时显示许多由电脑玩的游戏")
+    parser.add_argument("--game", choices=sorted(BOARD_TYPES), default="俄罗斯方块")
+    parser.add_argument("--boards", default="16", help="棋盘数；--bench 时可以用逗号分隔多个")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="工作进程数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", action="store_true", help="无界面测量各个棋盘数下每帧的合成耗时")
+    parser.add_argument("--seconds", type=float, default=5.0, help="--bench 每项的时长")
+    args = parser.parse_args()
+    counts = [int(count) for count in args.boards.split(",")]
+
+    try:
+        if args.bench:
+            run_bench(args.game, counts, args.workers, args.seconds, args.seed)
+        else:
+            run_wall(args.game, counts[0], args.workers, args.seed)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())